@@ -0,0 +1,269 @@
+"""
+Serialisation benchmarks.
+
+Run with ``python -m benchmarks.bench_serialisation`` from the repository
+root. Timings are the best of several repeats, in milliseconds.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import datetime
+import functools
+import io
+import timeit
+from typing import Any, Callable, List
+
+import orjson
+import pytz
+
+from pygot import (binary, compression, encoding, jsonlines, lazy, patch,
+                   responses, schema, serialisation, static)
+
+
+@serialisation.register_type
+@dataclasses.dataclass
+class Placement:
+    """Unit placed on the board."""
+
+    unit: Any
+    house: Any
+    area: str
+    strength: int
+    supported: bool
+
+
+@serialisation.register_type
+@dataclasses.dataclass
+class GameState:
+    """Representative game state."""
+
+    round: int
+    placements: List[Placement]
+
+
+def game_state(units: int = 10_000) -> GameState:
+    """
+    Create a representative game state.
+
+    :param units: Number of units on the board
+    :return: Game state
+    """
+    unit_types = list(static.Unit)
+    houses = list(static.House)
+    ready = static.UnitState.READY
+    placements = [
+        Placement(unit=unit_types[i % len(unit_types)](state=ready),
+                  house=houses[i % len(houses)],
+                  area=f'area{i % 50}',
+                  strength=i,
+                  supported=bool(i % 2))
+        for i in range(units)
+    ]
+    return GameState(round=1, placements=placements)
+
+
+def event_chain(events: int = 5_000) -> List[Any]:
+    """
+    Create a deeply nested chain of events.
+
+    :param events: Chain length
+    :return: Outermost event list
+    """
+    chain: List[Any] = []
+    node = chain
+    for i in range(events):
+        event = {'order': i, 'area': f'area{i % 50}', 'follow_ups': []}
+        node.append(event)
+        node = event['follow_ups']
+    return chain
+
+
+def event_log(events: int = 10_000) -> List[Any]:
+    """
+    Create a timestamped event log.
+
+    :param events: Number of events
+    :return: Events
+    """
+    zones = [pytz.timezone(z) for z in ('Europe/London', 'Europe/Ljubljana',
+                                        'America/New_York')]
+    start = datetime.datetime(2020, 1, 1)
+    return [{'order': i,
+             'at': zones[i % len(zones)].localize(
+                 start + datetime.timedelta(seconds=37 * i))}
+            for i in range(events)]
+
+
+def timed(func: Callable[[], Any], number: int = 5, repeat: int = 3) -> float:
+    """
+    Time a callable.
+
+    :param func: Callable to time
+    :param number: Calls per repeat
+    :param repeat: Repeats
+    :return: Best time per call in milliseconds
+    """
+    best = min(timeit.repeat(func, number=number, repeat=repeat))
+    return best / number * 1e3
+
+
+def loop_lag(respond: Callable[[], responses.ORJSONResponse]) -> float:
+    """
+    Measure event loop lag while a response is created and sent.
+
+    :param respond: Response factory
+    :return: Longest delay of a 1 ms timer in milliseconds
+    """
+    async def _receive() -> Any:
+        return {'type': 'http.disconnect'}
+
+    async def _send(message: Any) -> None:
+        pass
+
+    async def _serve() -> None:
+        await respond()({'type': 'http'}, _receive, _send)
+
+    async def _measure() -> float:
+        loop = asyncio.get_running_loop()
+        task = loop.create_task(_serve())
+        worst = 0.0
+        while not task.done():
+            start = loop.time()
+            await asyncio.sleep(1e-3)
+            worst = max(worst, loop.time() - start - 1e-3)
+        await task
+        return worst * 1e3
+
+    return min(asyncio.run(_measure()) for _ in range(3))
+
+
+def main() -> None:
+    """Run benchmarks and print results."""
+    state = game_state()
+    chain = event_chain()
+    houses = list(static.House) * 1_000
+    events = event_log()
+    events_json = serialisation.jsonify(events)
+    events_compact = serialisation.jsonify(events, compact_datetimes=True)
+    chain_json = serialisation.jsonify(chain)
+    json = serialisation.jsonify(state)
+    dumped = encoding.dumps(state)
+    packed = binary.pack(state)
+    interned = orjson.dumps(serialisation.jsonify(state, intern_types=True))
+    referenced = serialisation.jsonify(state, references=True)
+    columnar = serialisation.jsonify(state, columnar=True)
+    state_schema = schema.Schema(GameState)
+    schema_json = state_schema.jsonify(state)
+    moved = dataclasses.replace(state, placements=list(state.placements))
+    moved.placements[0] = dataclasses.replace(moved.placements[0],
+                                              area='elsewhere')
+    moved_json = serialisation.jsonify(moved)
+    ops = patch.diff(state, moved)
+    projection = serialisation.Projection('round', 'placements.*.area')
+    events_file = io.BytesIO()
+    with jsonlines.JSONLinesWriter(events_file) as writer:
+        writer.write_many(events)
+    events_reader = jsonlines.JSONLinesReader(events_file)
+
+    timings = {
+        'jsonify': lambda: serialisation.jsonify(state),
+        'jsonify (intern_types)':
+            lambda: serialisation.jsonify(state, intern_types=True),
+        'jsonify (references)':
+            lambda: serialisation.jsonify(state, references=True),
+        'jsonify (columnar)':
+            lambda: serialisation.jsonify(state, columnar=True),
+        'Schema.jsonify': lambda: state_schema.jsonify(state),
+        'jsonify (projection)':
+            lambda: serialisation.jsonify(state, projection=projection),
+        'unjsonify': lambda: serialisation.unjsonify(json),
+        'Schema.unjsonify': lambda: state_schema.unjsonify(schema_json),
+        'unjsonify (columnar)': lambda: serialisation.unjsonify(columnar),
+        'unjsonify (lazy, one field)':
+            lambda: lazy.unjsonify(json)
+            .placements[5_000].area,
+        'unjsonify (references)':
+            lambda: serialisation.unjsonify(referenced),
+        'jsonify (deep)': lambda: serialisation.jsonify(chain),
+        'jsonify (datetimes)': lambda: serialisation.jsonify(events),
+        'jsonify (compact_datetimes)':
+            lambda: serialisation.jsonify(events, compact_datetimes=True),
+        'unjsonify (datetimes)': lambda: serialisation.unjsonify(events_json),
+        'unjsonify (compact_datetimes)':
+            lambda: serialisation.unjsonify(events_compact),
+        'unjsonify (deep)': lambda: serialisation.unjsonify(chain_json),
+        'orjson.dumps(jsonify)':
+            lambda: orjson.dumps(serialisation.jsonify(state)),
+        'dumps': lambda: encoding.dumps(state),
+        'dumps (canonical)':
+            lambda: encoding.dumps(state, canonical=True),
+        'state_digest': lambda: encoding.state_digest(state),
+        'jsonify (static data)': lambda: serialisation.jsonify(houses),
+        'dumps (static data)': lambda: encoding.dumps(houses),
+        'iter_jsonify_bytes (first chunk)':
+            lambda: next(encoding.iter_jsonify_bytes(state)),
+        'iter_jsonify_bytes (all chunks)':
+            lambda: list(encoding.iter_jsonify_bytes(state)),
+        'unjsonify(orjson.loads)':
+            lambda: serialisation.unjsonify(orjson.loads(dumped)),
+        'unjsonify(orjson.loads) (intern_types)':
+            lambda: serialisation.unjsonify(orjson.loads(interned)),
+        'diff (one change)': lambda: patch.diff(state, moved),
+        'diff_json (one change)':
+            lambda: patch.diff_json(json, moved_json),
+        'patch (one change)': lambda: patch.patch(json, ops),
+        'JSONLinesWriter.write_many (events)':
+            lambda: jsonlines.JSONLinesWriter(io.BytesIO()).write_many(events),
+        'JSONLinesReader (events)':
+            lambda: (events_file.seek(0), list(events_reader)),
+        'JSONLinesReader.tail (last 10 events)':
+            lambda: events_reader.tail(10),
+        'count_nodes': lambda: encoding.count_nodes(state),
+        'count_nodes (limit 10k)':
+            lambda: encoding.count_nodes(state, limit=10_000),
+        'pack': lambda: binary.pack(state),
+        'unpack': lambda: binary.unpack(packed),
+    }
+    sizes = {
+        'JSON': dumped,
+        'JSON (intern_types)': interned,
+        'JSON (references)': orjson.dumps(referenced),
+        'JSON (columnar)': orjson.dumps(columnar),
+        'JSON (Schema)': orjson.dumps(schema_json),
+        'JSON (datetimes)': orjson.dumps(events_json),
+        'JSON (compact_datetimes)': orjson.dumps(events_compact),
+        'binary': packed,
+    }
+
+    for level in (1, compression.DEFAULT_LEVEL, 9):
+        for coding in ('gzip', 'deflate'):
+            label = f'{coding} (level {level})'
+            timings[f'compress JSON, {label}'] = functools.partial(
+                compression.compress, dumped, coding, level)
+            sizes[f'JSON, {label}'] = compression.compress(dumped, coding,
+                                                           level)
+        sizes[f'binary, gzip (level {level})'] = compression.compress(
+            packed, 'gzip', level)
+
+    for label, func in timings.items():
+        print(f'{label:<40} {timed(func):10.2f} ms')
+    for label, data in sizes.items():
+        print(f'{label:<40} {len(data):10d} bytes')
+
+    class OffloadedResponse(responses.ORJSONResponse):
+        """Response serialising large states off the event loop."""
+
+        offload_threshold = 10_000
+
+    lags = {
+        'ORJSONResponse': lambda: responses.ORJSONResponse(state),
+        'ORJSONResponse (offloaded)': lambda: OffloadedResponse(state),
+    }
+    for label, respond in lags.items():
+        print(f'{label + " loop lag":<40} {loop_lag(respond):10.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
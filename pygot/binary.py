@@ -0,0 +1,366 @@
+"""
+Compact binary serialisation format.
+
+A msgpack-like encoding of "JSON-ified" objects, which writes repeated
+strings only once, for clients that can decode it.
+"""
+
+from __future__ import annotations
+
+__all__ = ('pack', 'unpack')
+
+import logging
+import struct
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pygot import serialisation
+from pygot.utils import type_name
+
+logger = logging.getLogger(__name__)
+
+
+def pack(obj: Any, camel_case_keys: bool = True) -> bytes:
+    """
+    Serialise object to the compact binary format.
+
+    The binary format is a msgpack-like encoding of the "JSON-ified"
+    object with argument structures, where tagged objects store their
+    ``$module`` and ``$type`` in a dedicated header and repeated strings
+    are written once and referenced by index afterwards. Buffers of
+    bytes, memoryviews and NumPy arrays are written raw rather than as
+    base64 text.
+
+    :param obj: Python object
+    :param camel_case_keys: Use camelCase keys
+    :return: Binary data
+    """
+    out = bytearray()
+    _pack(serialisation.jsonify(obj, camel_case_keys=camel_case_keys,
+                                arg_struct=True),
+          out, {})
+    return bytes(out)
+
+
+def unpack(data: bytes, camel_case_keys: bool = True) -> Any:
+    """
+    Deserialise object from the compact binary format.
+
+    Decoded memoryviews and NumPy arrays share memory with `data`.
+
+    :param data: Binary data
+    :param camel_case_keys: Use camelCase keys
+    :return: Python object
+    """
+    reader = _Reader(data)
+    try:
+        json = reader.read()
+    except (IndexError, struct.error, TypeError, RecursionError) as e:
+        # Unhashable map keys and excessive nesting included
+        raise ValueError('Malformed binary data') from e
+    if reader.pos != len(reader.data):
+        raise ValueError('Trailing binary data')
+    return serialisation.unjsonify(json, camel_case_keys=camel_case_keys)
+
+
+# Binary format markers, msgpack-compatible for the types they share
+_NIL = 0xc0
+_FALSE = 0xc2
+_TRUE = 0xc3
+_FLOAT64 = 0xcb
+_UINT8 = 0xcc
+_UINT16 = 0xcd
+_UINT32 = 0xce
+_UINT64 = 0xcf
+_INT8 = 0xd0
+_INT16 = 0xd1
+_INT32 = 0xd2
+_INT64 = 0xd3
+_BIN8 = 0xc4
+_BIN16 = 0xc5
+_BIN32 = 0xc6
+_STR8 = 0xd9
+_STR16 = 0xda
+_STR32 = 0xdb
+_ARRAY16 = 0xdc
+_ARRAY32 = 0xdd
+_MAP16 = 0xde
+_MAP32 = 0xdf
+
+# In-project extensions replacing msgpack's ext types
+_REF8 = 0xd4
+_REF16 = 0xd5
+_TAGGED = 0xd6
+
+# Strings up to this many UTF-8 bytes are written once per document
+_INTERN_MAX_BYTES = 64
+_INTERN_MAX_STRINGS = 1 << 16
+
+# Keys moved to the header of tagged objects
+_TAG_KEYS = frozenset({serialisation.MODULE_KEY, serialisation.NAME_KEY,
+                       serialisation.TAG_KEY})
+
+_U8 = struct.Struct('>B')
+_U16 = struct.Struct('>H')
+_U32 = struct.Struct('>I')
+_U64 = struct.Struct('>Q')
+_I8 = struct.Struct('>b')
+_I16 = struct.Struct('>h')
+_I32 = struct.Struct('>i')
+_I64 = struct.Struct('>q')
+_F64 = struct.Struct('>d')
+
+
+def _pack(obj: Any, out: bytearray, strings: Dict[str, int]) -> None:
+    cls = type(obj)
+    if cls is str:
+        _pack_str(obj, out, strings)
+    elif obj is None:
+        out.append(_NIL)
+    elif cls is bool:
+        out.append(_TRUE if obj else _FALSE)
+    elif cls is int:
+        _pack_int(obj, out)
+    elif cls is float:
+        out.append(_FLOAT64)
+        out += _F64.pack(obj)
+    elif cls is list:
+        _pack_header(len(obj), 0x90, _ARRAY16, _ARRAY32, out)
+        for v in obj:
+            _pack(v, out, strings)
+    elif cls is dict:
+        module = obj.get(serialisation.MODULE_KEY)
+        name = obj.get(serialisation.NAME_KEY)
+        if isinstance(module, str) and isinstance(name, str):
+            out.append(_TAGGED)
+            _pack_str(module, out, strings)
+            _pack_str(name, out, strings)
+            items = [(k, v) for k, v in obj.items() if k not in _TAG_KEYS]
+        else:
+            items = obj.items()
+        _pack_header(len(items), 0x80, _MAP16, _MAP32, out)
+        for k, v in items:
+            _pack(k, out, strings)
+            _pack(v, out, strings)
+    elif cls is serialisation.Base64:
+        _pack_bin(obj.raw, out)
+    elif isinstance(obj, str):
+        _pack_str(str(obj), out, strings)
+    elif isinstance(obj, int):
+        _pack_int(int(obj), out)
+    elif isinstance(obj, float):
+        _pack(float(obj), out, strings)
+    elif isinstance(obj, (list, tuple)):
+        _pack(list(obj), out, strings)
+    elif isinstance(obj, dict):
+        _pack(dict(obj), out, strings)
+    else:
+        raise TypeError(f'Type is not serializable: {type_name(obj)}')
+
+
+def _pack_header(size: int,
+                 fixed: int,
+                 marker16: int,
+                 marker32: int,
+                 out: bytearray) -> None:
+    if size < 16:
+        out.append(fixed | size)
+    elif size < 1 << 16:
+        out.append(marker16)
+        out += _U16.pack(size)
+    else:
+        out.append(marker32)
+        out += _U32.pack(size)
+
+
+def _pack_str(obj: str, out: bytearray, strings: Dict[str, int]) -> None:
+    index = strings.get(obj)
+    if index is not None:
+        if index < 1 << 8:
+            out.append(_REF8)
+            out.append(index)
+        else:
+            out.append(_REF16)
+            out += _U16.pack(index)
+        return
+    data = obj.encode()
+    size = len(data)
+    if size <= _INTERN_MAX_BYTES and len(strings) < _INTERN_MAX_STRINGS:
+        strings[obj] = len(strings)
+    if size < 32:
+        out.append(0xa0 | size)
+    elif size < 1 << 8:
+        out.append(_STR8)
+        out.append(size)
+    elif size < 1 << 16:
+        out.append(_STR16)
+        out += _U16.pack(size)
+    else:
+        out.append(_STR32)
+        out += _U32.pack(size)
+    out += data
+
+
+def _pack_bin(data: memoryview, out: bytearray) -> None:
+    size = data.nbytes
+    if size < 1 << 8:
+        out.append(_BIN8)
+        out.append(size)
+    elif size < 1 << 16:
+        out.append(_BIN16)
+        out += _U16.pack(size)
+    else:
+        out.append(_BIN32)
+        out += _U32.pack(size)
+    out += data
+
+
+def _pack_int(obj: int, out: bytearray) -> None:
+    if 0 <= obj < 0x80:
+        out.append(obj)
+    elif -0x20 <= obj < 0:
+        out.append(obj & 0xff)
+    elif 0 <= obj:
+        if obj < 1 << 8:
+            out.append(_UINT8)
+            out.append(obj)
+        elif obj < 1 << 16:
+            out.append(_UINT16)
+            out += _U16.pack(obj)
+        elif obj < 1 << 32:
+            out.append(_UINT32)
+            out += _U32.pack(obj)
+        elif obj < 1 << 64:
+            out.append(_UINT64)
+            out += _U64.pack(obj)
+        else:
+            raise TypeError('Integer exceeds 64-bit range')
+    elif obj >= -(1 << 7):
+        out.append(_INT8)
+        out += _I8.pack(obj)
+    elif obj >= -(1 << 15):
+        out.append(_INT16)
+        out += _I16.pack(obj)
+    elif obj >= -(1 << 31):
+        out.append(_INT32)
+        out += _I32.pack(obj)
+    elif obj >= -(1 << 63):
+        out.append(_INT64)
+        out += _I64.pack(obj)
+    else:
+        raise TypeError('Integer exceeds 64-bit range')
+
+
+class _Reader:
+    """Binary format reader over a single document."""
+
+    __slots__ = ('data', 'view', 'pos', 'strings')
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.view = memoryview(data).toreadonly()
+        self.pos = 0
+        self.strings: List[str] = []
+
+    def read(self) -> serialisation.JSONType:
+        marker = self.data[self.pos]
+        self.pos += 1
+        if marker < 0x80:
+            return marker
+        if marker >= 0xe0:
+            return marker - 0x100
+        if marker < 0x90:
+            return self.read_map(marker & 0x0f)
+        if marker < 0xa0:
+            return self.read_list(marker & 0x0f)
+        if marker < 0xc0:
+            return self.read_str(marker & 0x1f)
+        sized = _READ_SIZED.get(marker)
+        if sized is not None:
+            unpack, then = sized
+            value = self.unpack(unpack)
+            return value if then is None else then(self, value)
+        if marker == _TAGGED:
+            return self.read_tagged()
+        try:
+            return _CONSTANTS[marker]
+        except KeyError:
+            raise ValueError(f'Unknown binary marker: {marker:#04x}') from None
+
+    def unpack(self, unpacker: struct.Struct) -> Any:
+        value, = unpacker.unpack_from(self.data, self.pos)
+        self.pos += unpacker.size
+        return value
+
+    def read_str(self, size: int) -> str:
+        end = self.pos + size
+        if end > len(self.data):
+            raise IndexError('String out of range')
+        value = self.data[self.pos:end].decode()
+        self.pos = end
+        if (size <= _INTERN_MAX_BYTES
+                and len(self.strings) < _INTERN_MAX_STRINGS):
+            self.strings.append(value)
+        return value
+
+    def read_ref(self, index: int) -> str:
+        return self.strings[index]
+
+    def read_tagged(self) -> serialisation.JSONType:
+        module = self.read()
+        name = self.read()
+        mapping = self.read()
+        if not isinstance(mapping, dict):
+            raise ValueError('Tagged binary object is not a map')
+        mapping[serialisation.MODULE_KEY] = module
+        mapping[serialisation.NAME_KEY] = name
+        return mapping
+
+    def read_bin(self, size: int) -> memoryview:
+        end = self.pos + size
+        if end > len(self.data):
+            raise IndexError('Buffer out of range')
+        value = self.view[self.pos:end]
+        self.pos = end
+        return value
+
+    def read_list(self, size: int) -> serialisation.JSONType:
+        return [self.read() for _ in range(size)]
+
+    def read_map(self, size: int) -> serialisation.JSONType:
+        d = {}
+        for _ in range(size):
+            k = self.read()
+            d[k] = self.read()
+        return d
+
+
+# Marker -> value, for markers without a payload
+_CONSTANTS: Dict[int, serialisation.JSONType] = {
+    _NIL: None, _FALSE: False, _TRUE: True,
+}
+
+# Marker -> (size/value struct, reader taking the unpacked value or None)
+_READ_SIZED: Dict[int, Tuple[struct.Struct,
+                             Optional[Callable[[_Reader, int], Any]]]] = {
+    _FLOAT64: (_F64, None),
+    _UINT8: (_U8, None),
+    _STR8: (_U8, _Reader.read_str),
+    _REF8: (_U8, _Reader.read_ref),
+    _REF16: (_U16, _Reader.read_ref),
+    _BIN8: (_U8, _Reader.read_bin),
+    _BIN16: (_U16, _Reader.read_bin),
+    _BIN32: (_U32, _Reader.read_bin),
+    _UINT16: (_U16, None),
+    _UINT32: (_U32, None),
+    _UINT64: (_U64, None),
+    _INT8: (_I8, None),
+    _INT16: (_I16, None),
+    _INT32: (_I32, None),
+    _INT64: (_I64, None),
+    _STR16: (_U16, _Reader.read_str),
+    _STR32: (_U32, _Reader.read_str),
+    _ARRAY16: (_U16, _Reader.read_list),
+    _ARRAY32: (_U32, _Reader.read_list),
+    _MAP16: (_U16, _Reader.read_map),
+    _MAP32: (_U32, _Reader.read_map),
+}
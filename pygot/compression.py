@@ -0,0 +1,103 @@
+"""
+HTTP response compression.
+
+Codecs are registered by their ``Content-Encoding`` name, ``gzip`` and
+``deflate`` are provided through zlib. The client's ``Accept-Encoding``
+header picks the codec.
+"""
+
+from __future__ import annotations
+
+__all__ = ('Codec', 'compress', 'DEFAULT_LEVEL', 'negotiate',
+           'register_codec')
+
+import logging
+from typing import Callable, Dict, Optional
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# Codec compressing data at a level, where higher is smaller but slower
+Codec = Callable[[bytes, int], bytes]
+
+DEFAULT_LEVEL = 6
+
+# Registered codecs, per content coding, in order of preference
+_CODECS: Dict[str, Codec] = {}
+
+
+def register_codec(encoding: str, codec: Codec) -> None:
+    """
+    Register codec for a content coding.
+
+    Codecs registered earlier are preferred when the client weighs
+    several codings equally. Registering a coding again replaces its
+    codec but keeps its preference.
+
+    :param encoding: Content coding, as in ``Content-Encoding``
+    :param codec: Codec
+    """
+    _CODECS[encoding.lower()] = codec
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the registered content coding preferred by the client.
+
+    :param accept_encoding: ``Accept-Encoding`` header
+    :return: Content coding, or None to send the data as-is
+    """
+    if not accept_encoding:
+        return None
+    qualities: Dict[str, float] = {}
+    for coding in accept_encoding.lower().split(','):
+        name, *params = (p.strip() for p in coding.split(';'))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = quality
+    wildcard = qualities.get('*', 0.0)
+    best = None
+    best_quality = 0.0
+    for name in _CODECS:
+        quality = qualities.get(name, wildcard)
+        if quality > best_quality:
+            best = name
+            best_quality = quality
+    return best
+
+
+def compress(data: bytes,
+             encoding: str,
+             level: int = DEFAULT_LEVEL) -> bytes:
+    """
+    Compress data with a registered codec.
+
+    :param data: Data
+    :param encoding: Content coding
+    :param level: Compression level
+    :return: Compressed data
+    """
+    try:
+        codec = _CODECS[encoding.lower()]
+    except KeyError:
+        raise ValueError(f'Unknown content coding: {encoding}') from None
+    return codec(data, level)
+
+
+def _zlib_codec(wbits: int) -> Codec:
+    def _compress(data: bytes, level: int) -> bytes:
+        # zlib reads the data in place, only the output is copied
+        compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+        return compressor.compress(data) + compressor.flush()
+
+    return _compress
+
+
+register_codec('gzip', _zlib_codec(16 + zlib.MAX_WBITS))
+register_codec('deflate', _zlib_codec(zlib.MAX_WBITS))
@@ -0,0 +1,522 @@
+"""
+Direct JSON bytes encoding of serialisable objects.
+
+Objects are encoded to the same bytes as
+``orjson.dumps(serialisation.jsonify(...))`` without building the
+intermediate "JSON-ified" tree, as a whole or in chunks.
+"""
+
+from __future__ import annotations
+
+__all__ = ('count_nodes', 'dumps', 'iter_jsonify_bytes',
+           'register_fragment', 'state_digest')
+
+import dataclasses
+from enum import Enum
+import hashlib
+import logging
+import math
+from typing import (Any, Callable, Dict, Iterator, Mapping, Optional, Tuple,
+                    Type)
+
+import orjson
+
+from pygot import serialisation
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+logger = logging.getLogger(__name__)
+
+
+def dumps(obj: Any,
+          camel_case_keys: bool = True,
+          arg_struct: bool = True,
+          projection: Optional[serialisation.Projection] = None,
+          canonical: bool = False) -> bytes:
+    """
+    Serialise object straight to JSON bytes.
+
+    Equivalent to ``orjson.dumps(jsonify(obj, ...))``, but without
+    building the intermediate "JSON-ified" tree: orjson walks native
+    values itself and only calls back for values that need tagging,
+    key renaming or special handling. Projections are "JSON-ified"
+    first, as they are expected to be small.
+
+    The canonical encoding sorts keys and writes negative zero as zero,
+    so equal objects always serialise to the same bytes.
+
+    :param obj: Python object
+    :param camel_case_keys: Use camelCase keys
+    :param arg_struct: Provide structure with arguments for re-creation
+    :param projection: Only serialise the selected fields
+    :param canonical: Use the canonical encoding
+    :return: JSON bytes
+    """
+    if projection is not None:
+        obj = serialisation.jsonify(obj,
+                                    camel_case_keys=camel_case_keys,
+                                    arg_struct=arg_struct,
+                                    projection=projection)
+        camel_case_keys = arg_struct = False
+    prepare, default = _fused(camel_case_keys, arg_struct, canonical)
+    return orjson.dumps(prepare(obj), default=default,
+                        option=_CANONICAL_OPTIONS if canonical
+                        else _ORJSON_OPTIONS)
+
+
+def iter_jsonify_bytes(obj: Any,
+                       camel_case_keys: bool = True,
+                       arg_struct: bool = True,
+                       chunk_size: int = 64 * 1024,
+                       canonical: bool = False) -> Iterator[bytes]:
+    """
+    Serialise object to JSON bytes in chunks.
+
+    Lists, tuples, dicts and dataclasses are walked as they are written,
+    everything else is encoded in one go, so chunks exceed `chunk_size`
+    by at most the size of one such value. Concatenated chunks equal the
+    output of `dumps` with the same options.
+
+    :param obj: Python object
+    :param camel_case_keys: Use camelCase keys
+    :param arg_struct: Provide structure with arguments for re-creation
+    :param chunk_size: Minimum chunk size in bytes, except the last chunk
+    :param canonical: Use the canonical encoding
+    :return: JSON bytes chunks
+    """
+    buffer = bytearray()
+    for part in _streamer(camel_case_keys, arg_struct, canonical)(obj):
+        buffer += part
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def state_digest(obj: Any,
+                 camel_case_keys: bool = True,
+                 arg_struct: bool = True,
+                 projection: Optional[serialisation.Projection] = None,
+                 digest_size: int = 16) -> str:
+    """
+    Hash the canonical JSON encoding of an object.
+
+    The encoding is streamed into a BLAKE2b hash in chunks, as with
+    `iter_jsonify_bytes`, rather than built as a whole. Equal to the
+    hash of ``dumps(obj, ..., canonical=True)``.
+
+    :param obj: Python object
+    :param camel_case_keys: Use camelCase keys
+    :param arg_struct: Provide structure with arguments for re-creation
+    :param projection: Only hash the selected fields
+    :param digest_size: Hash size in bytes
+    :return: Hexadecimal hash
+    """
+    if projection is not None:
+        obj = serialisation.jsonify(obj,
+                                    camel_case_keys=camel_case_keys,
+                                    arg_struct=arg_struct,
+                                    projection=projection)
+        camel_case_keys = arg_struct = False
+    digest = hashlib.blake2b(digest_size=digest_size)
+    for chunk in iter_jsonify_bytes(obj,
+                                    camel_case_keys=camel_case_keys,
+                                    arg_struct=arg_struct,
+                                    canonical=True):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Bytes of text or binary data weighed as one node by `count_nodes`
+_BYTES_PER_NODE = 64
+
+# How `count_nodes` walks instances, per type: `_SIZED`, `_BUFFER`,
+# `_ITERABLE`, `_MAPPING`, a tuple of dataclass fields or None for leaves
+_NODE_KINDS: Dict[Type[Any], Any] = {}
+_SIZED, _BUFFER, _ITERABLE, _MAPPING = range(4)
+
+
+def count_nodes(obj: Any, limit: Optional[int] = None) -> int:
+    """
+    Estimate the cost of serialising an object by counting its nodes.
+
+    Containers, dataclass instances and leaf values are a node each, text
+    and binary data an extra node per 64 bytes. Objects are counted each
+    time they are reached, as they are serialised each time, so a limit is
+    required for cyclic objects. Cheaper than serialising, and with a
+    limit only as expensive as the limit.
+
+    :param obj: Python object
+    :param limit: Stop counting once this many nodes are found
+    :return: Number of nodes, at most `limit`
+    """
+    kinds = _NODE_KINDS
+    stop = math.inf if limit is None else limit
+    count = 0
+    stack = [obj]
+    pop = stack.pop
+    extend = stack.extend
+    while stack:
+        obj = pop()
+        count += 1
+        cls = type(obj)
+        try:
+            kind = kinds[cls]
+        except KeyError:
+            kind = kinds[cls] = _node_kind(cls)
+        if kind is None:
+            pass
+        elif kind is _ITERABLE:
+            extend(obj)
+        elif type(kind) is tuple:
+            extend([getattr(obj, f) for f in kind])
+        elif kind is _MAPPING:
+            extend(obj.values())
+        elif kind is _SIZED:
+            count += len(obj) // _BYTES_PER_NODE
+        else:
+            count += obj.nbytes // _BYTES_PER_NODE
+        if count >= stop:
+            break
+    return count if limit is None else min(count, limit)
+
+
+def _node_kind(cls: Type[Any]) -> Any:
+    if issubclass(cls, (str, bytes, bytearray)):
+        return _SIZED
+    if issubclass(cls, (list, tuple, set, frozenset)):
+        return _ITERABLE
+    if issubclass(cls, Mapping):
+        return _MAPPING
+    if dataclasses.is_dataclass(cls):
+        keys = serialisation.dataclass_keys(cls, False)
+        return tuple(attr for attr, _ in keys) or None
+    if issubclass(cls, memoryview) or (
+            numpy is not None and issubclass(cls, numpy.ndarray)):
+        return _BUFFER
+    return None
+
+
+_Fragment = Callable[[Any, bool, bool], bytes]
+
+# Pre-encoded JSON providers, per type
+_FRAGMENTS: Dict[Type[Any], _Fragment] = {}
+
+# Splices pre-encoded JSON into orjson output, if this orjson supports it
+_OrjsonFragment = getattr(orjson, 'Fragment', None)
+
+
+def register_fragment(cls: Type[Any], func: _Fragment) -> None:
+    """
+    Register provider of pre-encoded JSON for instances of a type.
+
+    `func` is called with the object, `camel_case_keys` and `arg_struct`
+    and must return the same JSON bytes ``orjson.dumps(jsonify(...))``
+    would, which `dumps` and `iter_jsonify_bytes` then splice into their
+    output instead of encoding the object. Worthwhile for immutable
+    objects whose encoded form can be cached, and applies to subclasses.
+    Cached output should only be reused while the
+    `serialisation.encoder_table` it was encoded with is current.
+
+    :param cls: Type of objects
+    :param func: Pre-encoded JSON provider
+    """
+    _FRAGMENTS[cls] = func
+    serialisation.invalidate_encoders()
+
+
+def _fragment(cls: Type[Any]) -> Optional[_Fragment]:
+    for base in cls.__mro__:
+        try:
+            return _FRAGMENTS[base]
+        except KeyError:
+            pass
+    return None
+
+
+# Have orjson hand dataclasses, datetimes and builtin subclasses back to us
+_ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATACLASS
+                   | orjson.OPT_PASSTHROUGH_DATETIME
+                   | orjson.OPT_PASSTHROUGH_SUBCLASS)
+_CANONICAL_OPTIONS = _ORJSON_OPTIONS | orjson.OPT_SORT_KEYS
+
+_Encoder = Callable[[Any], serialisation.JSONType]
+
+# Types orjson writes as they are
+_PRIMITIVES = frozenset({str, int, bool, type(None)})
+_Fused = Tuple[_Encoder, _Encoder]
+
+# Fused prepare/default pairs and the encoder tables they were compiled
+# against, per (camel_case_keys, arg_struct, canonical)
+_FUSED: Dict[Tuple[bool, bool, bool], Tuple[Dict[Type[Any], _Encoder],
+                                            _Fused]] = {}
+
+
+def _fused(camel_case_keys: bool,
+           arg_struct: bool,
+           canonical: bool = False) -> _Fused:
+    # Tables are replaced by `invalidate_encoders`, so compiled functions
+    # are only reused while theirs is current
+    encoders = serialisation.encoder_table(camel_case_keys, arg_struct)
+    try:
+        table, fused = _FUSED[camel_case_keys, arg_struct, canonical]
+    except KeyError:
+        pass
+    else:
+        if table is encoders:
+            return fused
+    fused = _compile_fused(encoders, camel_case_keys, arg_struct, canonical)
+    _FUSED[camel_case_keys, arg_struct, canonical] = encoders, fused
+    return fused
+
+
+def _compile_fused(encoders: Dict[Type[Any], _Encoder],
+                   camel_case_keys: bool,
+                   arg_struct: bool,
+                   canonical: bool) -> _Fused:
+    # Base64 text is passed through as a subclass, so turn it into str
+    shallow: Dict[Type[Any], _Encoder] = {serialisation.Base64: str}
+    encoder = serialisation.compiled_encoder
+    camel_case = serialisation.camel_case
+    dispatch = serialisation.jsonify.dispatch
+    isfinite = math.isfinite
+    copysign = math.copysign
+
+    def _encode(obj: Any) -> serialisation.JSONType:
+        cls = type(obj)
+        return (encoders.get(cls)
+                or encoder(cls, camel_case_keys, arg_struct))(obj)
+
+    def _prepare(obj: Any) -> Any:
+        """Make value safe for orjson, leaving as much as possible as-is."""
+        cls = type(obj)
+        if cls in _PRIMITIVES:
+            return obj
+        if cls is float:
+            if not isfinite(obj):
+                return _encode(obj)
+            if canonical and obj == 0 and copysign(1.0, obj) < 0:
+                return 0.0
+            return obj
+        if cls is list or cls is tuple:
+            out = None
+            for i, v in enumerate(obj):
+                v_cls = type(v)
+                if v_cls in _PRIMITIVES or v_cls in shallow:
+                    continue
+                p = _prepare(v)
+                if p is not v:
+                    if out is None:
+                        out = list(obj)
+                    out[i] = p
+            return obj if out is None else out
+        if cls is dict:
+            d = {}
+            for k, v in obj.items():
+                if type(k) is not str:
+                    k = _encode(k)
+                    if isinstance(k, str):
+                        k = str(k)
+                if camel_case_keys and isinstance(k, str):
+                    k = camel_case(k)
+                d[k] = v if type(v) in _PRIMITIVES else _prepare(v)
+            return d
+        if isinstance(obj, Enum):
+            return _encode(obj)
+        # orjson hands everything else back to _default, which also
+        # records the type in shallow so it can be skipped next time
+        return obj
+
+    def _default(obj: Any) -> serialisation.JSONType:
+        cls = type(obj)
+        try:
+            return shallow[cls](obj)
+        except KeyError:
+            pass
+        fragment = None
+        # Fragments are not written with sorted keys
+        if _OrjsonFragment is not None and not canonical:
+            fragment = _fragment(cls)
+        if fragment is not None:
+            encode = _compile_fragment(fragment, camel_case_keys, arg_struct)
+        elif dispatch(cls) is dispatch(object) and issubclass(cls, str):
+            # orjson passes subclasses through, and jsonify returns them
+            # as they are, so they have to become the base type here
+            encode = str
+        elif dispatch(cls) is dispatch(object) and issubclass(cls, int):
+            encode = int
+        elif (dispatch(cls) is dispatch(object)
+                and dataclasses.is_dataclass(cls)):
+            encode = _compile_shallow_dataclass(cls, _prepare, shallow,
+                                                camel_case_keys, arg_struct)
+        else:
+            encode = _encode
+        shallow[cls] = encode
+        return encode(obj)
+
+    return _prepare, _default
+
+
+def _compile_fragment(fragment: _Fragment,
+                      camel_case_keys: bool,
+                      arg_struct: bool) -> _Encoder:
+    def _encode(obj: Any) -> Any:
+        return _OrjsonFragment(fragment(obj, camel_case_keys, arg_struct))
+
+    return _encode
+
+
+def _compile_shallow_dataclass(cls: Type[Any],
+                               prepare: _Encoder,
+                               deferred: Mapping[Type[Any], _Encoder],
+                               camel_case_keys: bool,
+                               arg_struct: bool) -> _Encoder:
+    fields = serialisation.dataclass_keys(cls, camel_case_keys)
+    module = cls.__module__
+    name = cls.__name__
+
+    def _encode(obj: Any) -> serialisation.JSONType:
+        d = {}
+        for attr, key in fields:
+            v = getattr(obj, attr)
+            v_cls = type(v)
+            if v_cls in _PRIMITIVES or v_cls in deferred:
+                d[key] = v
+            else:
+                d[key] = prepare(v)
+        if arg_struct:
+            d[serialisation.MODULE_KEY] = module
+            d[serialisation.NAME_KEY] = name
+        return d
+
+    return _encode
+
+
+_Streamer = Callable[[Any], Iterator[bytes]]
+
+# Compiled streamers and the encoder tables they were compiled against,
+# per (camel_case_keys, arg_struct, canonical)
+_STREAMERS: Dict[Tuple[bool, bool, bool], Tuple[Dict[Type[Any], _Encoder],
+                                                _Streamer]] = {}
+
+
+def _streamer(camel_case_keys: bool,
+              arg_struct: bool,
+              canonical: bool = False) -> _Streamer:
+    encoders = serialisation.encoder_table(camel_case_keys, arg_struct)
+    try:
+        table, streamer = _STREAMERS[camel_case_keys, arg_struct, canonical]
+    except KeyError:
+        pass
+    else:
+        if table is encoders:
+            return streamer
+    streamer = _compile_streamer(encoders, camel_case_keys, arg_struct,
+                                 canonical)
+    _STREAMERS[camel_case_keys, arg_struct, canonical] = encoders, streamer
+    return streamer
+
+
+def _compile_streamer(encoders: Dict[Type[Any], _Encoder],
+                      camel_case_keys: bool,
+                      arg_struct: bool,
+                      canonical: bool) -> _Streamer:
+    prepare, default = _fused(camel_case_keys, arg_struct, canonical)
+    options = _CANONICAL_OPTIONS if canonical else _ORJSON_OPTIONS
+    dump = orjson.dumps
+    encoder = serialisation.compiled_encoder
+    camel_case = serialisation.camel_case
+    dispatch = serialisation.jsonify.dispatch
+    # Dataclass field (attribute, key prefix) pairs and tag suffix,
+    # or None if the type is not walked as a plain dataclass
+    plans: Dict[Type[Any], Optional[Tuple[Tuple[Tuple[str, bytes], ...],
+                                          bytes]]] = {}
+    # Pre-encoded JSON providers, or None if the type has none
+    fragments: Dict[Type[Any], Optional[_Fragment]] = {}
+
+    def _plan(cls: Type[Any]) -> Optional[Tuple[Tuple[Tuple[str, bytes], ...],
+                                                bytes]]:
+        try:
+            return plans[cls]
+        except KeyError:
+            pass
+        plan = None
+        if dataclasses.is_dataclass(cls) and dispatch(cls) is dispatch(object):
+            keys = serialisation.dataclass_keys(cls, camel_case_keys)
+            if canonical:
+                keys = sorted(keys, key=lambda k: k[1])
+            fields = tuple((attr, dump(key) + b':') for attr, key in keys)
+            tags = b''
+            if arg_struct:
+                tags = (dump(serialisation.MODULE_KEY) + b':'
+                        + dump(cls.__module__) + b','
+                        + dump(serialisation.NAME_KEY) + b':'
+                        + dump(cls.__name__))
+            plan = fields, tags
+        plans[cls] = plan
+        return plan
+
+    def _walk(obj: Any) -> Iterator[bytes]:
+        cls = type(obj)
+        if cls in _PRIMITIVES:
+            yield dump(obj)
+        elif cls is list or cls is tuple:
+            sep = b'['
+            for v in obj:
+                yield sep
+                sep = b','
+                yield from _walk(v)
+            yield b']' if sep == b',' else b'[]'
+        elif cls is dict:
+            items = []
+            for k, v in obj.items():
+                if type(k) is not str:
+                    k = (encoders.get(type(k))
+                         or encoder(type(k), camel_case_keys, arg_struct))(k)
+                if not isinstance(k, str):
+                    raise TypeError('Dict key must be str')
+                if camel_case_keys:
+                    k = camel_case(k)
+                items.append((k, v))
+            if canonical:
+                items.sort(key=lambda item: item[0])
+            sep = b'{'
+            for k, v in items:
+                yield sep + dump(k) + b':'
+                sep = b','
+                yield from _walk(v)
+            yield b'}' if sep == b',' else b'{}'
+        else:
+            try:
+                fragment = fragments[cls]
+            except KeyError:
+                # Fragments are not written with sorted keys
+                fragment = fragments[cls] = (None if canonical
+                                             else _fragment(cls))
+            if fragment is not None:
+                yield fragment(obj, camel_case_keys, arg_struct)
+                return
+            plan = _plan(cls)
+            if plan is None:
+                yield dump(prepare(obj), default=default, option=options)
+                return
+            fields, tags = plan
+            sep = b'{'
+            # Tag keys start with '$', so sort before field keys
+            if tags and canonical:
+                yield sep + tags
+                sep = b','
+            for attr, key in fields:
+                yield sep + key
+                sep = b','
+                yield from _walk(getattr(obj, attr))
+            if tags and not canonical:
+                yield sep + tags
+                sep = b','
+            yield b'}' if sep == b',' else b'{}'
+
+    return _walk
@@ -0,0 +1,193 @@
+"""
+JSON Lines streams of serialised objects.
+
+Each line holds one object serialised with `encoding.dumps`, so
+streams of game events can be appended to and read back one record at a
+time. Lines are only complete once their newline is written, trailing
+partial lines, such as from an interrupted write, are skipped.
+"""
+
+from __future__ import annotations
+
+__all__ = ('JSONLinesReader', 'JSONLinesWriter')
+
+import io
+import logging
+from typing import Any, BinaryIO, Iterable, Iterator, List
+
+import orjson
+
+from pygot import encoding, serialisation
+
+logger = logging.getLogger(__name__)
+
+
+class JSONLinesWriter:
+    """Buffered JSON Lines writer."""
+
+    def __init__(self,
+                 file: BinaryIO,
+                 camel_case_keys: bool = True,
+                 arg_struct: bool = True,
+                 buffer_size: int = 64 * 1024) -> None:
+        """
+        Initialise writer.
+
+        Records are collected in memory and written to the file once at
+        least `buffer_size` bytes are pending, or on `flush`.
+
+        :param file: Binary file to append to
+        :param camel_case_keys: Use camelCase keys
+        :param arg_struct: Provide structure with arguments for re-creation
+        :param buffer_size: Bytes to collect before writing
+        """
+        self.file = file
+        self.camel_case_keys = camel_case_keys
+        self.arg_struct = arg_struct
+        self.buffer_size = buffer_size
+        self._buffer = bytearray()
+
+    def write(self, obj: Any) -> None:
+        """
+        Write object as a record.
+
+        :param obj: Python object
+        """
+        self._buffer += encoding.dumps(
+            obj, camel_case_keys=self.camel_case_keys,
+            arg_struct=self.arg_struct)
+        self._buffer += b'\n'
+        if len(self._buffer) >= self.buffer_size:
+            self._write()
+
+    def write_many(self, objs: Iterable[Any]) -> None:
+        """
+        Write objects as records.
+
+        :param objs: Python objects
+        """
+        for obj in objs:
+            self.write(obj)
+
+    def flush(self) -> None:
+        """Write pending records and flush the file."""
+        self._write()
+        self.file.flush()
+
+    def close(self) -> None:
+        """Write pending records and close the file."""
+        self._write()
+        self.file.close()
+
+    def _write(self) -> None:
+        if self._buffer:
+            self.file.write(self._buffer)
+            self._buffer.clear()
+
+    def __enter__(self) -> JSONLinesWriter:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.flush()
+
+
+class JSONLinesReader:
+    """Incremental JSON Lines reader."""
+
+    def __init__(self,
+                 file: BinaryIO,
+                 camel_case_keys: bool = True,
+                 chunk_size: int = 64 * 1024) -> None:
+        """
+        Initialise reader.
+
+        The file is read `chunk_size` bytes at a time, so memory use is
+        bounded by the chunk and longest line sizes. Iterating decodes
+        records as they are reached.
+
+        :param file: Binary file to read
+        :param camel_case_keys: Use camelCase keys
+        :param chunk_size: Bytes to read at a time
+        """
+        self.file = file
+        self.camel_case_keys = camel_case_keys
+        self.chunk_size = chunk_size
+
+    def __iter__(self) -> Iterator[Any]:
+        return map(self.decode, self.lines())
+
+    def decode(self, line: bytes) -> Any:
+        """
+        Decode a record.
+
+        :param line: Record line
+        :return: Python object
+        """
+        return serialisation.unjsonify(orjson.loads(line),
+                                       camel_case_keys=self.camel_case_keys)
+
+    def lines(self) -> Iterator[bytes]:
+        """
+        Read record lines onwards from the current file position.
+
+        :return: Undecoded record lines
+        """
+        buffer = bytearray()
+        while True:
+            chunk = self.file.read(self.chunk_size)
+            if not chunk:
+                return
+            buffer += chunk
+            start = 0
+            while True:
+                end = buffer.find(b'\n', start)
+                if end < 0:
+                    break
+                if end > start:
+                    yield bytes(buffer[start:end])
+                start = end + 1
+            del buffer[:start]
+
+    def tail(self, n: int) -> List[Any]:
+        """
+        Read the last records.
+
+        :param n: Maximum number of records
+        :return: Python objects, oldest first
+        """
+        return [self.decode(line) for line in self.tail_lines(n)]
+
+    def tail_lines(self, n: int) -> List[bytes]:
+        """
+        Read the last record lines, scanning backwards from the end.
+
+        Only the chunks holding the requested lines are read. The file
+        position is left at the end of the file.
+
+        :param n: Maximum number of lines
+        :return: Undecoded record lines, oldest first
+        """
+        pos = self.file.seek(0, io.SEEK_END)
+        found: List[bytes] = []
+        # Bytes before the earliest newline found so far
+        head = b''
+        partial = True
+        while pos > 0 and len(found) < n:
+            size = min(self.chunk_size, pos)
+            pos -= size
+            self.file.seek(pos)
+            head = self.file.read(size) + head
+            parts = head.split(b'\n')
+            if len(parts) == 1:
+                continue
+            head = parts[0]
+            complete = parts[1:]
+            if partial:
+                # Anything after the last newline is not a record yet
+                complete.pop()
+                partial = False
+            found.extend(line for line in reversed(complete) if line)
+        if pos == 0 and not partial and head and len(found) < n:
+            found.append(head)
+        self.file.seek(0, io.SEEK_END)
+        return found[:max(n, 0)][::-1]
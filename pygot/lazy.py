@@ -0,0 +1,208 @@
+"""
+Lazy "un-JSON-ification".
+
+Dataclasses, lists and mappings are decoded to `Lazy` proxies that only
+decode the parts that are accessed, which suits reading a few values
+from large states. References are not supported.
+"""
+
+from __future__ import annotations
+
+__all__ = ('Lazy', 'materialise', 'unjsonify')
+
+import logging
+from typing import Any, Dict, Iterator, Mapping, Sequence, Type
+
+from pygot import serialisation
+from pygot.utils import type_name
+
+logger = logging.getLogger(__name__)
+
+
+def unjsonify(json: serialisation.JSONType,
+              camel_case_keys: bool = True) -> Any:
+    """
+    Lazily "un-JSON-ify" object.
+
+    As `serialisation.unjsonify`, but dataclasses, lists and mappings are
+    returned as `Lazy` proxies.
+
+    :param json: "JSON-ified" object
+    :param camel_case_keys: Use camelCase keys
+    :return: Python object or `Lazy` proxy
+    """
+    value, doc = serialisation.read_document(json, camel_case_keys)
+    return _unjsonify_lazy(value, camel_case_keys, doc)
+
+
+def materialise(obj: Any) -> Any:
+    """
+    Fully decode lazily "un-JSON-ified" object.
+
+    :param obj: `Lazy` proxy or any other object
+    :return: Python object
+    """
+    if isinstance(obj, Lazy):
+        return obj.materialise()
+    return obj
+
+
+class Lazy:
+    """
+    Lazily "un-JSON-ified" object.
+
+    Proxies decode their "JSON-ified" sub-tree on access, caching any
+    decoded parts. Comparisons are made against the materialised value.
+    """
+
+    __slots__ = ('_json', '_camel_case_keys', '_doc', '_value')
+
+    def __init__(self,
+                 json: serialisation.JSONType,
+                 camel_case_keys: bool,
+                 doc: serialisation.Document) -> None:
+        self._json = json
+        self._camel_case_keys = camel_case_keys
+        self._doc = doc
+        self._value = _MISSING
+
+    def materialise(self) -> Any:
+        """
+        Fully decode object.
+
+        :return: Python object
+        """
+        if self._value is _MISSING:
+            self._value = serialisation.unjsonify_node(
+                self._json, self._camel_case_keys, self._doc)
+        return self._value
+
+    def __eq__(self, other: Any) -> bool:
+        return self.materialise() == materialise(other)
+
+    __hash__ = None  # type: ignore
+
+    def _decode(self, json: serialisation.JSONType) -> Any:
+        return _unjsonify_lazy(json, self._camel_case_keys, self._doc)
+
+
+_MISSING = object()
+
+
+class _LazyObject(Lazy):
+
+    __slots__ = ('_cls', '_fields', '_values')
+
+    def __init__(self,
+                 json: serialisation.JSONType,
+                 camel_case_keys: bool,
+                 doc: serialisation.Document,
+                 cls: Type[Any],
+                 fields: Dict[str, str]) -> None:
+        super().__init__(json, camel_case_keys, doc)
+        self._cls = cls
+        self._fields = fields
+        self._values: Dict[str, Any] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        if name in _LAZY_SLOTS:
+            raise AttributeError(name)
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        key = self._fields.get(name)
+        if key is None or key not in self._json:
+            # Not a stored field, so defer to the real object
+            return getattr(self.materialise(), name)
+        value = self._values[name] = self._decode(self._json[key])
+        return value
+
+    def __repr__(self) -> str:
+        return f'<Lazy {type_name(self._cls)}>'
+
+
+class _LazySequence(Lazy, Sequence[Any]):
+
+    __slots__ = ('_items',)
+
+    def __init__(self,
+                 json: serialisation.JSONType,
+                 camel_case_keys: bool,
+                 doc: serialisation.Document) -> None:
+        super().__init__(json, camel_case_keys, doc)
+        self._items = [_MISSING] * len(json)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._items)))]
+        item = self._items[index]
+        if item is _MISSING:
+            item = self._items[index] = self._decode(self._json[index])
+        return item
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __repr__(self) -> str:
+        return f'<Lazy list of {len(self._items)}>'
+
+
+class _LazyMapping(Lazy, Mapping[Any, Any]):
+
+    __slots__ = ('_keys', '_values')
+
+    def __init__(self,
+                 json: serialisation.JSONType,
+                 camel_case_keys: bool,
+                 doc: serialisation.Document) -> None:
+        super().__init__(json, camel_case_keys, doc)
+        if camel_case_keys:
+            snake_case = serialisation.snake_case
+            self._keys = {snake_case(k) if isinstance(k, str) else k: k
+                          for k in json if k not in doc.tags}
+        else:
+            self._keys = {k: k for k in json if k not in doc.tags}
+        self._values: Dict[Any, Any] = {}
+
+    def __getitem__(self, key: Any) -> Any:
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        value = self._values[key] = self._decode(self._json[self._keys[key]])
+        return value
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return f'<Lazy dict of {len(self._keys)}>'
+
+
+_LAZY_SLOTS = frozenset(Lazy.__slots__ + _LazyObject.__slots__)
+
+
+def _unjsonify_lazy(json: serialisation.JSONType,
+                    camel_case_keys: bool,
+                    doc: serialisation.Document) -> Any:
+    cls = type(json)
+    if cls is list:
+        return _LazySequence(json, camel_case_keys, doc)
+    if cls is not dict:
+        return serialisation.unjsonify_node(json, camel_case_keys, doc)
+    if doc.refs is not None and serialisation.REF_KEY in json:
+        raise ValueError('References cannot be decoded lazily')
+    if (doc.columns and serialisation.COLUMNS_KEY in json
+            or doc.zones is not None and serialisation.EPOCH_KEY in json):
+        return serialisation.unjsonify_node(json, camel_case_keys, doc)
+    decoder = serialisation.tagged_decoder(json, camel_case_keys, doc)
+    if decoder is None:
+        return _LazyMapping(json, camel_case_keys, doc)
+    fields = serialisation.decoded_fields(decoder)
+    if fields is None:
+        return decoder(json, doc)
+    return _LazyObject(json, camel_case_keys, doc, *fields)
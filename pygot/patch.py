@@ -0,0 +1,264 @@
+"""
+JSON-Patch style diffs of serialised objects.
+
+Diffs turn one "JSON-ified" state into another, so clients holding a
+previous state can be sent only what changed.
+"""
+
+from __future__ import annotations
+
+__all__ = ('diff', 'diff_json', 'patch')
+
+from copy import copy
+import logging
+import math
+from typing import Any, List, Sequence, Set
+
+from pygot import serialisation
+from pygot.utils import type_name
+
+logger = logging.getLogger(__name__)
+
+
+def diff(old: Any,
+         new: Any,
+         camel_case_keys: bool = True,
+         arg_struct: bool = True) -> List[serialisation.JSON]:
+    """
+    Compute patch between two Python object states.
+
+    Produces JSON-Patch style operations that turn ``jsonify(old, ...)``
+    into ``jsonify(new, ...)``. Sub-objects shared by both states are
+    skipped by identity without being serialised, so only the changed
+    parts of the object graph are visited.
+
+    :param old: Previous Python object state
+    :param new: Next Python object state
+    :param camel_case_keys: Use camelCase keys
+    :param arg_struct: Provide structure with arguments for re-creation
+    :return: Patch operations
+    """
+    ops: List[serialisation.JSON] = []
+    _diff(old, new, '', ops, camel_case_keys, arg_struct)
+    return ops
+
+
+def diff_json(old: serialisation.JSONType,
+              new: serialisation.JSONType) -> List[serialisation.JSON]:
+    """
+    Compute patch between two "JSON-ified" objects.
+
+    :param old: Previous "JSON-ified" object
+    :param new: Next "JSON-ified" object
+    :return: Patch operations
+    """
+    ops: List[serialisation.JSON] = []
+    _diff_json(old, new, '', ops)
+    return ops
+
+
+def patch(json: serialisation.JSONType,
+          ops: Sequence[serialisation.JSON]) -> serialisation.JSONType:
+    """
+    Apply patch to "JSON-ified" object.
+
+    The given object is left untouched: containers along patched paths
+    are copied and everything else is shared with the result, as are
+    the values from the patch.
+
+    :param json: "JSON-ified" object
+    :param ops: Patch operations
+    :return: Patched "JSON-ified" object
+    """
+    root = json
+    # Containers created by this call, safe to modify in place
+    owned: Set[int] = set()
+
+    def _own(container: Any) -> Any:
+        if id(container) not in owned:
+            container = copy(container)
+            owned.add(id(container))
+        return container
+
+    for op in ops:
+        try:
+            kind = op['op']
+            tokens = _pointer_tokens(op['path'])
+            if kind not in _PATCH_OPS:
+                raise ValueError(f'Unsupported patch operation: {kind!r}')
+            if not tokens:
+                if kind == 'remove':
+                    raise ValueError('Cannot remove document root')
+                root = op['value']
+                continue
+
+            root = parent = _own(root)
+            for token in tokens[:-1]:
+                key = _pointer_key(parent, token)
+                child = _own(parent[key])
+                parent[key] = child
+                parent = child
+
+            token = tokens[-1]
+            if kind == 'add' and isinstance(parent, list):
+                key = (len(parent) if token == '-'
+                       else _pointer_key(parent, token, len(parent) + 1))
+                parent.insert(key, op['value'])
+            elif kind == 'remove':
+                del parent[_pointer_key(parent, token)]
+            else:
+                key = _pointer_key(parent, token)
+                if (kind == 'replace' and isinstance(parent, dict)
+                        and key not in parent):
+                    raise ValueError(f'Missing patch path: {op["path"]!r}')
+                parent[key] = op['value']
+        except (KeyError, IndexError, TypeError) as e:
+            raise ValueError(f'Bad patch operation {op!r}: {e}') from e
+    return root
+
+
+_PATCH_OPS = frozenset({'add', 'remove', 'replace'})
+
+# Types compared by value
+_LEAVES = frozenset({str, int, float, bool, type(None)})
+
+# Keys telling objects of different types apart
+_TAG_KEYS = (serialisation.MODULE_KEY, serialisation.NAME_KEY,
+             serialisation.TAG_KEY)
+
+
+def _pointer_tokens(path: str) -> List[str]:
+    if not path:
+        return []
+    if path[0] != '/':
+        raise ValueError(f'Invalid patch path: {path!r}')
+    return [t.replace('~1', '/').replace('~0', '~')
+            for t in path[1:].split('/')]
+
+
+def _pointer_key(container: Any, token: str, size: int = -1) -> Any:
+    if isinstance(container, dict):
+        return token
+    if not isinstance(container, list):
+        raise ValueError(f'Cannot index {type_name(container)} with '
+                         f'{token!r}')
+    if not token.isdigit() or (token != '0' and token[0] == '0'):
+        raise ValueError(f'Invalid list index: {token!r}')
+    index = int(token)
+    if index >= (len(container) if size < 0 else size):
+        raise ValueError(f'List index out of range: {token!r}')
+    return index
+
+
+def _pointer(key: str) -> str:
+    return '/' + key.replace('~', '~0').replace('/', '~1')
+
+
+def _diff(old: Any,
+          new: Any,
+          path: str,
+          ops: List[serialisation.JSON],
+          camel_case_keys: bool,
+          arg_struct: bool) -> None:
+    if old is new:
+        return
+    jsonify = serialisation.jsonify
+    cls = type(new)
+    if type(old) is not cls:
+        ops.append({'op': 'replace', 'path': path,
+                    'value': jsonify(new, camel_case_keys=camel_case_keys,
+                                     arg_struct=arg_struct)})
+        return
+
+    if cls in _LEAVES:
+        if old != new and not (cls is float
+                               and math.isnan(old) and math.isnan(new)):
+            ops.append({'op': 'replace', 'path': path,
+                        'value': jsonify(new,
+                                         camel_case_keys=camel_case_keys,
+                                         arg_struct=arg_struct)})
+        return
+
+    if cls is list or cls is tuple:
+        common = min(len(old), len(new))
+        for i in range(common):
+            _diff(old[i], new[i], f'{path}/{i}', ops,
+                  camel_case_keys, arg_struct)
+        for i in range(len(old) - 1, common - 1, -1):
+            ops.append({'op': 'remove', 'path': f'{path}/{i}'})
+        for v in new[common:]:
+            ops.append({'op': 'add', 'path': f'{path}/-',
+                        'value': jsonify(v,
+                                         camel_case_keys=camel_case_keys,
+                                         arg_struct=arg_struct)})
+        return
+
+    if cls is dict and all(type(k) is str for k in old) \
+            and all(type(k) is str for k in new):
+        camel_case = serialisation.camel_case
+        for k in old:
+            if k not in new:
+                ops.append({'op': 'remove', 'path': path + _pointer(
+                    camel_case(k) if camel_case_keys else k)})
+        for k, v in new.items():
+            key = path + _pointer(camel_case(k) if camel_case_keys else k)
+            if k in old:
+                _diff(old[k], v, key, ops, camel_case_keys, arg_struct)
+            else:
+                ops.append({'op': 'add', 'path': key,
+                            'value': jsonify(
+                                v, camel_case_keys=camel_case_keys,
+                                arg_struct=arg_struct)})
+        return
+
+    fields = serialisation.plain_dataclass_keys(cls, camel_case_keys)
+    if fields is not None:
+        for attr, key in fields:
+            _diff(getattr(old, attr), getattr(new, attr),
+                  path + _pointer(key), ops, camel_case_keys, arg_struct)
+        return
+
+    # Anything else is compared by its serialised form
+    _diff_json(jsonify(old, camel_case_keys=camel_case_keys,
+                       arg_struct=arg_struct),
+               jsonify(new, camel_case_keys=camel_case_keys,
+                       arg_struct=arg_struct),
+               path, ops)
+
+
+def _diff_json(old: serialisation.JSONType,
+               new: serialisation.JSONType,
+               path: str,
+               ops: List[serialisation.JSON]) -> None:
+    if old is new:
+        return
+    cls = type(new)
+    if type(old) is not cls:
+        ops.append({'op': 'replace', 'path': path, 'value': new})
+    elif cls is list:
+        common = min(len(old), len(new))
+        for i in range(common):
+            _diff_json(old[i], new[i], f'{path}/{i}', ops)
+        for i in range(len(old) - 1, common - 1, -1):
+            ops.append({'op': 'remove', 'path': f'{path}/{i}'})
+        for v in new[common:]:
+            ops.append({'op': 'add', 'path': f'{path}/-', 'value': v})
+    elif cls is dict and all(type(k) is str for k in old) \
+            and all(type(k) is str for k in new):
+        # Objects of different types are replaced outright
+        for k in _TAG_KEYS:
+            if old.get(k) != new.get(k):
+                ops.append({'op': 'replace', 'path': path, 'value': new})
+                return
+        for k in old:
+            if k not in new:
+                ops.append({'op': 'remove', 'path': path + _pointer(k)})
+        for k, v in new.items():
+            if k in old:
+                _diff_json(old[k], v, path + _pointer(k), ops)
+            else:
+                ops.append({'op': 'add', 'path': path + _pointer(k),
+                            'value': v})
+    elif old != new and not (cls is float
+                             and math.isnan(old) and math.isnan(new)):
+        ops.append({'op': 'replace', 'path': path, 'value': new})
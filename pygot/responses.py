@@ -0,0 +1,349 @@
+"""Starlette responses using serialisation."""
+
+from __future__ import annotations
+
+__all__ = ('accepts_binary', 'BINARY_MEDIA_TYPE', 'JSON_MEDIA_TYPE',
+           'negotiated_response', 'ORJSONResponse',
+           'ORJSONStreamingResponse', 'PackedResponse', 'read_body')
+
+import asyncio
+from concurrent.futures import Executor
+import functools
+import hashlib
+import logging
+from typing import Any, ClassVar, Mapping, Optional, Tuple
+
+import orjson
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from pygot import binary, compression, encoding, serialisation
+
+logger = logging.getLogger(__name__)
+
+JSON_MEDIA_TYPE = 'application/json'
+BINARY_MEDIA_TYPE = 'application/x-pygot'
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response using orjson and serialisation.
+
+    Compression and offloading are configured by subclasses overriding
+    the class attributes.
+
+    :cvar compression_threshold: Minimum body size to compress
+    :cvar compression_level: Compression level
+    :cvar offload_threshold: Minimum content size to serialise off the
+                             event loop, never if None
+    :cvar executor: Executor to serialise in, defaults to the thread pool
+    """
+
+    media_type = JSON_MEDIA_TYPE
+    compression_threshold: ClassVar[int] = 1024
+    compression_level: ClassVar[int] = compression.DEFAULT_LEVEL
+    offload_threshold: ClassVar[Optional[int]] = None
+    executor: ClassVar[Optional[Executor]] = None
+
+    def __init__(self,
+                 content: Any,
+                 status_code: int = 200,
+                 headers: Optional[Mapping[str, str]] = None,
+                 media_type: Optional[str] = None,
+                 background: Optional[BackgroundTask] = None,
+                 projection: Optional[serialisation.Projection] = None,
+                 etag: bool = False,
+                 request: Optional[Request] = None) -> None:
+        """
+        Initialise response with the serialised content.
+
+        With `etag`, the body is the canonical encoding of the content and
+        the response carries a weak ``ETag`` of its hash, equal to the
+        content's `encoding.state_digest`. If `request` is also given and
+        its ``If-None-Match`` header matches, the response is an empty
+        ``304 Not Modified``.
+
+        Given `request`, bodies of at least `compression_threshold` bytes
+        are compressed with the codec the ``Accept-Encoding`` header
+        prefers, see `compression`.
+
+        Content of at least `offload_threshold` nodes, see
+        `encoding.count_nodes`, is serialised when the response is
+        sent, in the thread pool or in `executor`, so the event loop can
+        serve other requests meanwhile. Threads share the interpreter lock,
+        a process pool serialises in parallel but requires picklable
+        content and its types to be registered in the worker processes too.
+
+        :param content: Python object
+        :param status_code: HTTP status code
+        :param headers: HTTP headers
+        :param media_type: Media type, defaults to JSON
+        :param background: Task to run after the response is sent
+        :param projection: Only serialise the selected fields
+        :param etag: Add ``ETag`` header
+        :param request: Incoming request, to check ``If-None-Match`` and
+                        ``Accept-Encoding``
+        """
+        self.projection = projection
+        self.not_modified = False
+        self.content_encoding = None
+        self.deferred: Optional[Tuple[Any, bool, Optional[str]]] = None
+        self.tagged_body: Optional[bytes] = None
+        if_none_match = None
+        if request is not None:
+            self.content_encoding = compression.negotiate(
+                request.headers.get('accept-encoding'))
+            if status_code == 200:
+                if_none_match = request.headers.get('if-none-match')
+        offload_threshold = self.offload_threshold
+        if (offload_threshold is not None
+                and encoding.count_nodes(content, offload_threshold)
+                >= offload_threshold):
+            self.deferred = content, etag, if_none_match
+        elif etag:
+            tag, self.not_modified, self.tagged_body = _tagged_body(
+                content, projection, if_none_match)
+            headers = {**(headers or {}), 'etag': tag}
+            if self.not_modified:
+                status_code = 304
+        super().__init__(content,
+                         status_code=status_code,
+                         headers=headers,
+                         media_type=media_type,
+                         background=background)
+        if request is not None:
+            self.headers.add_vary_header('Accept-Encoding')
+        if self.content_encoding is not None and self.deferred is None:
+            self.headers['content-encoding'] = self.content_encoding
+
+    def render(self, content: Any) -> bytes:
+        if self.deferred is not None:
+            return b''
+        # Bodies with entity tags were serialised along with the tag
+        body, self.tagged_body = self.tagged_body, None
+        if body is None:
+            body = _body(content, self.projection)
+        body, self.content_encoding = _compressed(body,
+                                                  self.content_encoding,
+                                                  self.compression_threshold,
+                                                  self.compression_level)
+        return body
+
+    async def __call__(self, scope: Scope, receive: Receive,
+                       send: Send) -> None:
+        if self.deferred is not None:
+            await self.render_deferred()
+        await super().__call__(scope, receive, send)
+
+    async def render_deferred(self) -> None:
+        """Serialise content deferred to the thread pool or executor."""
+        if self.deferred is None:
+            return
+        (content, etag, if_none_match), self.deferred = self.deferred, None
+        render = functools.partial(_render_response, content,
+                                   self.projection, etag, if_none_match,
+                                   self.content_encoding,
+                                   self.compression_threshold,
+                                   self.compression_level)
+        if self.executor is None:
+            result = await run_in_threadpool(render)
+        else:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self.executor, render)
+        tag, self.not_modified, self.body, self.content_encoding = result
+        if tag is not None:
+            self.headers['etag'] = tag
+        if self.not_modified:
+            self.status_code = 304
+            if 'content-length' in self.headers:
+                del self.headers['content-length']
+        elif 'content-length' in self.headers:
+            self.headers['content-length'] = str(len(self.body))
+        if self.content_encoding is not None:
+            self.headers['content-encoding'] = self.content_encoding
+
+
+class ORJSONStreamingResponse(StreamingResponse):
+    """Chunked JSON response using orjson and serialisation."""
+
+    media_type = JSON_MEDIA_TYPE
+
+    def __init__(self,
+                 content: Any,
+                 status_code: int = 200,
+                 headers: Optional[Mapping[str, str]] = None,
+                 media_type: Optional[str] = None,
+                 background: Optional[BackgroundTask] = None,
+                 chunk_size: int = 64 * 1024) -> None:
+        """
+        Initialise response streaming the serialised content.
+
+        :param content: Python object
+        :param status_code: HTTP status code
+        :param headers: HTTP headers
+        :param media_type: Media type, defaults to JSON
+        :param background: Task to run after the response is sent
+        :param chunk_size: Minimum chunk size in bytes
+        """
+        super().__init__(encoding.iter_jsonify_bytes(content,
+                                                     chunk_size=chunk_size),
+                         status_code=status_code,
+                         headers=headers,
+                         media_type=media_type,
+                         background=background)
+
+
+class PackedResponse(Response):
+    """Binary response using the compact binary format."""
+
+    media_type = BINARY_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return binary.pack(content)
+
+
+def accepts_binary(request: Request) -> bool:
+    """
+    Check if the binary format is preferred over JSON by the client.
+
+    JSON is preferred on ties, so the binary format has to be explicitly
+    listed in the ``Accept`` header.
+
+    :param request: Incoming request
+    :return: ``True`` if the binary format is preferred
+    """
+    accept = request.headers.get('accept', '')
+    return (_media_quality(accept, BINARY_MEDIA_TYPE, wildcards=False)
+            > _media_quality(accept, JSON_MEDIA_TYPE))
+
+
+def negotiated_response(request: Request,
+                        content: Any,
+                        status_code: int = 200,
+                        headers: Optional[Mapping[str, str]] = None,
+                        background: Optional[BackgroundTask] = None
+                        ) -> Response:
+    """
+    Create a JSON or binary response depending on the ``Accept`` header.
+
+    :param request: Incoming request
+    :param content: Python object
+    :param status_code: HTTP status code
+    :param headers: HTTP headers
+    :param background: Task to run after the response is sent
+    :return: Response
+    """
+    if accepts_binary(request):
+        response_cls = PackedResponse
+    else:
+        response_cls = ORJSONResponse
+    return response_cls(content,
+                        status_code=status_code,
+                        headers=headers,
+                        background=background)
+
+
+async def read_body(request: Request, camel_case_keys: bool = True) -> Any:
+    """
+    Deserialise a JSON or binary body depending on the ``Content-Type``.
+
+    :param request: Incoming request
+    :param camel_case_keys: Use camelCase keys
+    :return: Python object
+    """
+    body = await request.body()
+    media_type = request.headers.get('content-type', '').split(';')[0]
+    if media_type.strip().lower() == BINARY_MEDIA_TYPE:
+        return binary.unpack(body, camel_case_keys=camel_case_keys)
+    return serialisation.unjsonify(orjson.loads(body),
+                                   camel_case_keys=camel_case_keys)
+
+
+def _body(content: Any,
+          projection: Optional[serialisation.Projection]) -> bytes:
+    if projection is None:
+        return encoding.dumps(content)
+    return encoding.dumps(content, projection=projection)
+
+
+# Hash size of entity tags, the default of `encoding.state_digest`
+_DIGEST_SIZE = 16
+
+
+def _tagged_body(content: Any,
+                 projection: Optional[serialisation.Projection],
+                 if_none_match: Optional[str]) -> Tuple[str, bool, bytes]:
+    # The canonical encoding is both hashed and sent, so the content is
+    # only serialised once
+    body = encoding.dumps(content, projection=projection, canonical=True)
+    digest = hashlib.blake2b(body, digest_size=_DIGEST_SIZE).hexdigest()
+    tag = f'W/"{digest}"'
+    not_modified = _etag_matches(if_none_match, tag)
+    return tag, not_modified, b'' if not_modified else body
+
+
+def _compressed(body: bytes,
+                content_encoding: Optional[str],
+                threshold: int,
+                level: int) -> Tuple[bytes, Optional[str]]:
+    if content_encoding is None or not body or len(body) < threshold:
+        return body, None
+    return (compression.compress(body, content_encoding, level),
+            content_encoding)
+
+
+def _render_response(content: Any,
+                     projection: Optional[serialisation.Projection],
+                     etag: bool,
+                     if_none_match: Optional[str],
+                     content_encoding: Optional[str],
+                     threshold: int,
+                     level: int
+                     ) -> Tuple[Optional[str], bool, bytes, Optional[str]]:
+    # Module level, so process pools can pickle it
+    if etag:
+        tag, not_modified, body = _tagged_body(content, projection,
+                                               if_none_match)
+    else:
+        tag, not_modified, body = None, False, _body(content, projection)
+    body, content_encoding = _compressed(body, content_encoding, threshold,
+                                         level)
+    return tag, not_modified, body, content_encoding
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # Weak comparison, as for GET and HEAD requests
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith('W/') else tag) == opaque:
+            return True
+    return False
+
+
+def _media_quality(accept: str, media_type: str, wildcards: bool = True
+                   ) -> float:
+    exact = None
+    wildcard = 0.0
+    for media_range in accept.lower().split(','):
+        kind, *params = (p.strip() for p in media_range.split(';'))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if kind == media_type:
+            exact = quality
+        elif wildcards and kind in {'*/*', media_type.split('/')[0] + '/*'}:
+            wildcard = max(wildcard, quality)
+    return wildcard if exact is None else exact
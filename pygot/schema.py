@@ -0,0 +1,289 @@
+"""
+Schema-driven serialisation.
+
+Where `serialisation.jsonify` tags every object with its type so it can
+be recreated, a `Schema` is compiled from a root dataclass' annotations
+and already knows the type of most values. Only values whose annotation
+does not pin down their type, such as `Any`, unions or subclasses of the
+annotated type, are serialised with tags.
+"""
+
+from __future__ import annotations
+
+__all__ = ('Schema',)
+
+import collections.abc
+import dataclasses
+import datetime
+from enum import Enum
+import logging
+import math
+import typing
+from typing import Any, Callable, Dict, List, Mapping, Tuple, Type
+
+import pytz
+
+from pygot import serialisation, utils
+
+logger = logging.getLogger(__name__)
+
+_Codec = Tuple[Callable[[Any], Any], Callable[[Any], Any]]
+
+_SCALARS = frozenset({str, int, bool, type(None)})
+
+
+class Schema:
+    """Untagged serialisation compiled from a dataclass' annotations."""
+
+    def __init__(self, cls: Type[Any], camel_case_keys: bool = True) -> None:
+        """
+        Compile encoder and decoder for dataclass.
+
+        :param cls: Root dataclass type
+        :param camel_case_keys: Use camelCase keys
+        """
+        if not (isinstance(cls, type) and dataclasses.is_dataclass(cls)):
+            raise TypeError(f'Not a dataclass: {utils.type_name(cls)}')
+        self.cls = cls
+        self.camel_case_keys = camel_case_keys
+        self._codecs: Dict[Any, _Codec] = {}
+        self._encode, self._decode = self._codec(cls)
+
+    def jsonify(self, obj: Any) -> serialisation.JSONType:
+        """
+        "JSON-ify" object according to schema.
+
+        :param obj: Instance of the root dataclass
+        :return: "JSON-ified" object
+        """
+        return self._encode(obj)
+
+    def unjsonify(self, json: serialisation.JSONType) -> Any:
+        """
+        "un-JSON-ify" object according to schema.
+
+        :param json: "JSON-ified" object
+        :return: Instance of the root dataclass
+        """
+        return self._decode(json)
+
+    def _codec(self, tp: Any) -> _Codec:
+        try:
+            return self._codecs[tp]
+        except (KeyError, TypeError):
+            pass
+        codec = self._compile(tp)
+        try:
+            self._codecs[tp] = codec
+        except TypeError:
+            pass
+        return codec
+
+    def _compile(self, tp: Any) -> _Codec:
+        # pylint: disable=too-many-return-statements
+        if tp in _SCALARS:
+            return _identity, _identity
+        if tp is float:
+            return _encode_float, _decode_float
+        if utils.is_optional(tp):
+            try:
+                return _optional(self._codec(utils.optional_subtype(tp)))
+            except ValueError:
+                return self._tagged()
+        if isinstance(tp, type) and issubclass(tp, Enum):
+            return _enum(tp)
+        if tp is datetime.datetime:
+            return _encode_datetime, _decode_datetime
+        if tp is datetime.date:
+            return datetime.date.isoformat, datetime.date.fromisoformat
+        if tp is datetime.time:
+            return datetime.time.isoformat, datetime.time.fromisoformat
+
+        origin = getattr(tp, '__origin__', None)
+        args = getattr(tp, '__args__', ())
+        if origin in _SEQUENCES and len(args) == 1:
+            return _sequence(self._codec(args[0]), list)
+        if origin is tuple and len(args) == 2 and args[1] is Ellipsis:
+            return _sequence(self._codec(args[0]), tuple)
+        if origin in _MAPPINGS and len(args) == 2:
+            keys = _key_codec(args[0], self.camel_case_keys)
+            if keys is not None:
+                return _mapping(keys, self._codec(args[1]))
+
+        if (isinstance(tp, type) and dataclasses.is_dataclass(tp)
+                and serialisation.jsonify.dispatch(tp)
+                is serialisation.jsonify.dispatch(object)):
+            return self._dataclass(tp)
+        return self._tagged()
+
+    def _tagged(self) -> _Codec:
+        camel_case_keys = self.camel_case_keys
+
+        def _encode(obj: Any) -> Any:
+            return serialisation.jsonify(obj, camel_case_keys=camel_case_keys)
+
+        def _decode(json: Any) -> Any:
+            return serialisation.unjsonify(json,
+                                           camel_case_keys=camel_case_keys)
+
+        return _encode, _decode
+
+    def _dataclass(self, cls: Type[Any]) -> _Codec:
+        try:
+            hints = typing.get_type_hints(cls)
+        except (NameError, TypeError) as e:
+            raise TypeError(f'Cannot resolve annotations of '
+                            f'{utils.type_name(cls)}: {e}') from e
+        fields: List[Tuple[str, str, Callable[[Any], Any]]] = []
+        decoders: Dict[str, Tuple[str, Callable[[Any], Any]]] = {}
+        tagged_encode, tagged_decode = self._tagged()
+        label = utils.type_name(cls)
+
+        def _encode(obj: Any) -> Any:
+            # Subclasses and other types need tags to be recreated
+            if type(obj) is not cls:
+                return tagged_encode(obj)
+            return {key: encode(getattr(obj, attr))
+                    for attr, key, encode in fields}
+
+        def _decode(json: Any) -> Any:
+            if not isinstance(json, Mapping):
+                raise ValueError(f'Expected mapping for {label}: {json!r}')
+            if serialisation.MODULE_KEY in json:
+                return tagged_decode(json)
+            kwargs = {}
+            for key, value in json.items():
+                try:
+                    attr, decode = decoders[key]
+                except KeyError:
+                    raise ValueError(f'Unexpected key for {label}: '
+                                     f'{key!r}') from None
+                kwargs[attr] = decode(value)
+            try:
+                return cls(**kwargs)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f'Bad arguments for {label}: {e}') from e
+
+        # Register before compiling fields, so types can be recursive
+        self._codecs[cls] = _encode, _decode
+        for f in dataclasses.fields(cls):
+            if not f.init:
+                continue
+            key = (serialisation.camel_case(f.name) if self.camel_case_keys
+                   else f.name)
+            encode, decode = self._codec(hints.get(f.name, Any))
+            fields.append((f.name, key, encode))
+            decoders[key] = f.name, decode
+        return _encode, _decode
+
+
+# Annotation origins of homogeneous lists and mappings
+_SEQUENCES = frozenset({list, collections.abc.Sequence})
+_MAPPINGS = frozenset({dict, collections.abc.Mapping})
+
+
+def _identity(obj: Any) -> Any:
+    return obj
+
+
+def _encode_float(obj: float) -> Any:
+    if math.isfinite(obj):
+        return obj
+    if math.isnan(obj):
+        return 'nan'
+    return '+inf' if obj > 0 else '-inf'
+
+
+def _decode_float(json: Any) -> float:
+    try:
+        return float(json)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'Bad float: {json!r}') from e
+
+
+def _encode_datetime(obj: datetime.datetime) -> List[Any]:
+    if obj.tzinfo is None:
+        return [obj.isoformat(), None]
+    zone = getattr(obj.tzinfo, 'zone', None)
+    if zone is None:
+        obj = obj.astimezone(pytz.utc)
+        zone = 'UTC'
+    return [obj.replace(tzinfo=None).isoformat(), zone]
+
+
+def _decode_datetime(json: Any) -> datetime.datetime:
+    try:
+        value, zone = json
+        dt = datetime.datetime.fromisoformat(value)
+        if zone is None:
+            return dt
+        return pytz.timezone(zone).localize(dt)
+    except (TypeError, ValueError, pytz.UnknownTimeZoneError) as e:
+        raise ValueError(f'Bad datetime: {json!r}') from e
+
+
+def _optional(codec: _Codec) -> _Codec:
+    encode, decode = codec
+
+    def _encode(obj: Any) -> Any:
+        return None if obj is None else encode(obj)
+
+    def _decode(json: Any) -> Any:
+        return None if json is None else decode(json)
+
+    return _encode, _decode
+
+
+def _enum(cls: Type[Enum]) -> _Codec:
+    def _encode(obj: Enum) -> str:
+        return obj.name
+
+    def _decode(json: Any) -> Enum:
+        try:
+            return cls[json]
+        except (KeyError, TypeError):
+            raise ValueError(f'Bad {utils.type_name(cls)}: '
+                             f'{json!r}') from None
+
+    return _encode, _decode
+
+
+def _sequence(codec: _Codec, factory: Callable[[Any], Any]) -> _Codec:
+    encode, decode = codec
+
+    def _encode(obj: Any) -> List[Any]:
+        return [encode(v) for v in obj]
+
+    def _decode(json: Any) -> Any:
+        if not isinstance(json, list):
+            raise ValueError(f'Expected list: {json!r}')
+        return factory(decode(v) for v in json)
+
+    return _encode, _decode
+
+
+def _key_codec(tp: Any, camel_case_keys: bool) -> Any:
+    if tp is str:
+        if camel_case_keys:
+            return serialisation.camel_case, serialisation.snake_case
+        return _identity, _identity
+    if tp is int:
+        return str, int
+    if isinstance(tp, type) and issubclass(tp, Enum):
+        return _enum(tp)
+    return None
+
+
+def _mapping(keys: _Codec, values: _Codec) -> _Codec:
+    encode_key, decode_key = keys
+    encode, decode = values
+
+    def _encode(obj: Any) -> Dict[Any, Any]:
+        return {encode_key(k): encode(v) for k, v in obj.items()}
+
+    def _decode(json: Any) -> Dict[Any, Any]:
+        if not isinstance(json, Mapping):
+            raise ValueError(f'Expected mapping: {json!r}')
+        return {decode_key(k): decode(v) for k, v in json.items()}
+
+    return _encode, _decode
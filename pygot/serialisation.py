@@ -2,26 +2,37 @@
 
 from __future__ import annotations
 
-__all__ = ('camel_case', 'JSON', 'JSONMixin', 'JSONType',
-           'MODULE_KEY', 'NAME_KEY', 'ReplaceMixin', 'snake_case')
-
+__all__ = ('Base64', 'camel_case', 'clear_key_cache', 'COLUMNS_KEY',
+           'compiled_encoder', 'dataclass_keys', 'decoded_fields', 'Document',
+           'encoder_table', 'EPOCH_KEY', 'ID_KEY', 'invalidate_decoders',
+           'invalidate_encoders', 'JSON', 'JSONMixin', 'JSONType',
+           'key_cache_info', 'MODULE_KEY', 'NAME_KEY',
+           'plain_dataclass_keys', 'Projection', 'read_document', 'REF_KEY',
+           'REFS_KEY', 'register_type', 'ReplaceMixin', 'seed_key_cache',
+           'snake_case', 'TAG_KEY', 'tagged_decoder', 'TYPES_KEY',
+           'unjsonify_node', 'VALUE_KEY', 'ZONES_KEY')
+
+import base64
 import dataclasses
 import datetime
 from enum import Enum
 import functools
-import importlib
+import inspect
 import logging
 import math
 from string import ascii_letters, digits
-from typing import (Any, Dict, List, Mapping, Optional, Sequence, Type,
-                    TypeVar, Union, cast)
+from typing import (Any, Callable, ClassVar, Dict, List, Mapping, Optional,
+                    Sequence, Set, Tuple, Type, TypeVar, Union)
 
-import orjson
 import pytz
-from starlette.responses import JSONResponse
 
 from pygot.utils import type_name
 
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
@@ -35,6 +46,15 @@ JSON = Dict[str, JSONType]
 
 MODULE_KEY = '$module'
 NAME_KEY = '$type'
+TAG_KEY = '$tag'
+TYPES_KEY = '$types'
+VALUE_KEY = '$value'
+ID_KEY = '$id'
+REF_KEY = '$ref'
+REFS_KEY = '$refs'
+COLUMNS_KEY = '$columns'
+EPOCH_KEY = '$epoch'
+ZONES_KEY = '$zones'
 
 
 # We have dispatcher functions that may not use all arguments.
@@ -42,16 +62,43 @@ NAME_KEY = '$type'
 
 
 class JSONMixin:
-    """Dataclass mixin for JSON serialisation and deserialisation."""
+    """
+    Dataclass mixin for JSON serialisation and deserialisation.
+
+    Keys are mapped from the annotated fields once per subclass, and
+    nested values are serialised through `jsonify`.
+    """
+
+    __json_keys__: ClassVar[Tuple[Tuple[str, str], ...]] = ()
+    __json_attrs__: ClassVar[Dict[str, str]] = {}
 
-    def to_json(self) -> JSON:
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.__json_keys__ = tuple((f, camel_case(f))
+                                  for f in _annotated_fields(cls))
+        cls.__json_attrs__ = {k: f for f, k in cls.__json_keys__}
+        register_type(cls)
+
+    def to_json(self,
+                camel_case_keys: bool = True,
+                arg_struct: bool = True) -> JSON:
         """
         Generate serialisable JSON structure.
 
+        :param camel_case_keys: Use camelCase keys
+        :param arg_struct: Provide structure with arguments for re-creation
         :return: Serialisable JSON structure
         """
-        self_dict = dataclasses.asdict(cast(dataclasses.dataclass, self))
-        return {camel_case(k): v for k, v in self_dict.items()}
+        encoders = _encoder_table(camel_case_keys, arg_struct)
+        json = {}
+        for attr, key in self.__json_keys__:
+            value = getattr(self, attr)
+            cls = type(value)
+            if cls not in _PRIMITIVES:
+                value = (encoders.get(cls)
+                         or _encoder(cls, camel_case_keys, arg_struct))(value)
+            json[key if camel_case_keys else attr] = value
+        return json
 
     @classmethod
     def from_json(cls: Type[T], json: JSON) -> T:
@@ -61,19 +108,113 @@ class JSONMixin:
         :param json: Serialisable JSON structure
         :return: Deserialised original dataclass
         """
-        return cls(**{snake_case(k): v for k, v in json.items()})
+        attrs = cls.__json_attrs__
+        return cls(**{attrs.get(k) or snake_case(k): v
+                      for k, v in json.items()})
+
+
+def _annotated_fields(cls: Type[Any]) -> List[str]:
+    # Collect annotated names the way dataclasses does, base classes first
+    fields: Dict[str, None] = {}
+    for base in reversed(cls.__mro__):
+        for name, annotation in base.__dict__.get('__annotations__',
+                                                  {}).items():
+            if isinstance(annotation, str):
+                pseudo = annotation.startswith(('ClassVar', 'InitVar',
+                                                'typing.ClassVar',
+                                                'dataclasses.InitVar'))
+            else:
+                pseudo = (getattr(annotation, '__origin__', None)
+                          is ClassVar
+                          or isinstance(annotation, dataclasses.InitVar))
+            if pseudo:
+                fields.pop(name, None)
+            else:
+                fields[name] = None
+    return list(fields)
 
 
 def snake_case(string: str) -> str:
     """
     Convert a string from camelCase to snake_case.
 
+    Conversions are memoised, see `key_cache_info`.
+
     TODO: Handling non-ASCII characters better.
 
     :param string: camelCase input
     :return: snake_case output
     """
-    if set(string) - set(ascii_letters + digits + '_'):
+    return _convert_key(string, False)
+
+
+def camel_case(string: str) -> str:
+    """
+    Convert a string from snake_case to camelCase.
+
+    Conversions are memoised, see `key_cache_info`.
+
+    TODO: Handling non-ASCII characters better.
+
+    :param string: snake_case input
+    :return: camelCase output
+    """
+    return _convert_key(string, True)
+
+
+# Maximum number of memoised key conversions
+_KEY_CACHE_SIZE = 4096
+
+_IDENTIFIER_CHARS = frozenset(ascii_letters + digits + '_')
+
+
+@functools.lru_cache(maxsize=_KEY_CACHE_SIZE)
+def _convert_key(string: str, camel: bool) -> str:
+    if camel:
+        return _camel_case(string)
+    return _snake_case(string)
+
+
+def key_cache_info() -> Any:
+    """
+    Get key conversion cache statistics.
+
+    :return: Named tuple of hits, misses, maxsize and currsize
+    """
+    return _convert_key.cache_info()
+
+
+def clear_key_cache() -> None:
+    """Drop all memoised key conversions and reset statistics."""
+    _convert_key.cache_clear()
+
+
+def seed_key_cache(*classes: Type[Any]) -> None:
+    """
+    Pre-populate key conversion cache with dataclass field names.
+
+    Without arguments, dataclasses registered with `register_type` or
+    `jsonify`, or already seen by the compiled encoders and decoders are
+    used.
+
+    :param classes: Dataclass types
+    """
+    if not classes:
+        known = set(jsonify.registry)
+        known.update(_TYPES.values())
+        for table in _ENCODERS.values():
+            known.update(table)
+        known.update(cls for cls, _, _ in _DATACLASS_FIELDS.values())
+        classes = tuple(known)
+    for cls in classes:
+        if not dataclasses.is_dataclass(cls):
+            continue
+        for f in dataclasses.fields(cls):
+            snake_case(camel_case(f.name))
+
+
+def _snake_case(string: str) -> str:
+    if not _IDENTIFIER_CHARS.issuperset(string):
         raise ValueError('Identifiers must only have ASCII characters')
     output = []
 
@@ -101,16 +242,8 @@ def snake_case(string: str) -> str:
     return ''.join(output)
 
 
-def camel_case(string: str) -> str:
-    """
-    Convert a string from snake_case to camelCase.
-
-    TODO: Handling non-ASCII characters better.
-
-    :param string: snake_case input
-    :return: camelCase output
-    """
-    if set(string) - set(ascii_letters + digits + '_'):
+def _camel_case(string: str) -> str:
+    if not _IDENTIFIER_CHARS.issuperset(string):
         raise ValueError('Identifiers must only have ASCII characters')
 
     if not string:
@@ -132,22 +265,97 @@ def camel_case(string: str) -> str:
     return ''.join(output)
 
 
-@functools.singledispatch
 def jsonify(obj: Any,
             camel_case_keys: bool = True,
-            arg_struct: bool = True) -> JSONType:
+            arg_struct: bool = True,
+            intern_types: bool = False,
+            references: bool = False,
+            columnar: bool = False,
+            compact_datetimes: bool = False,
+            projection: Optional[Projection] = None) -> JSONType:
     """
     "JSON-ify" object.
 
     Attemps to serialise Python object in a fashion that would make
     JSON serialisation and deserialisation easier.
 
+    Types are serialised by implementations registered through
+    `jsonify.register`, which get the `camel_case_keys` and `arg_struct`
+    options. The remaining options transform the whole document.
+    Objects nested too deeply to recurse through are serialised using
+    an explicit stack instead, which walks lists, tuples, dicts and
+    dataclasses, including `JSONMixin` subclasses that do not override
+    `to_json`. Other registered implementations are still called
+    recursively. The `references`, `columnar`, `intern_types` and
+    `compact_datetimes` options, as well as the `encoding` and `binary`
+    modules, also still recurse and raise `RecursionError` for such
+    objects. Reference cycles raise `ValueError` unless `references` is
+    set.
+
     :param obj: Python object
     :param camel_case_keys: Use camelCase keys
     :param arg_struct: Provide structure with arguments for re-creation
+    :param intern_types: Send ``$module``/``$type`` pairs once in a type
+                         table and tag objects with table indices
+    :param references: Serialise objects referenced more than once only
+                       the first time and refer back to them afterwards,
+                       which also allows for reference cycles. Documents
+                       with references are wrapped and marked with
+                       ``$refs``, other documents are left as they are
+    :param columnar: Serialise lists of same-typed dataclasses as
+                     per-field value arrays. Documents with such lists
+                     are wrapped and marked with ``$columns``
+    :param compact_datetimes: Serialise datetimes as epoch microseconds
+                              and an index into a timezone table
+    :param projection: Only serialise the selected fields
     :return: "JSON-ified" object
     """
-    if dataclasses.is_dataclass(obj):
+    if references and columnar:
+        raise ValueError('Cannot combine references and columnar')
+    cls = type(obj)
+    referenced = False
+    columned = False
+    if projection is not None:
+        if references or columnar:
+            raise ValueError('Cannot combine projection with references '
+                             'or columnar')
+        json = _jsonify_projected(obj, projection.tree,
+                                  camel_case_keys, arg_struct)
+    elif references:
+        json, referenced = _jsonify_references(obj, camel_case_keys,
+                                               arg_struct)
+    elif columnar:
+        json, columned = _jsonify_columnar(obj, camel_case_keys,
+                                           arg_struct)
+    elif cls in _PRIMITIVES:
+        json = obj
+    else:
+        # Compiled encoders form an exact type dispatch table in front
+        # of the registered implementations
+        try:
+            json = _encoder(cls, camel_case_keys, arg_struct)(obj)
+        except RecursionError:
+            json = _jsonify_iterative(obj, camel_case_keys, arg_struct)
+    if compact_datetimes:
+        json, zones = _compact_datetimes(json)
+    if intern_types:
+        json = _intern_types(json)
+    elif compact_datetimes or referenced or columned:
+        json = {VALUE_KEY: json}
+    if compact_datetimes:
+        json[ZONES_KEY] = zones
+    if referenced:
+        json[REFS_KEY] = True
+    if columned:
+        json[COLUMNS_KEY] = True
+    return json
+
+
+@functools.singledispatch
+def _jsonify(obj: Any,
+             camel_case_keys: bool = True,
+             arg_struct: bool = True) -> JSONType:
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
         return _jsonify_dataclass(obj,
                                   camel_case_keys=camel_case_keys,
                                   arg_struct=arg_struct)
@@ -157,18 +365,45 @@ def jsonify(obj: Any,
     return obj
 
 
-@jsonify.register
+def _register(cls: Any, func: Optional[Callable[..., Any]] = None) -> Any:
+    # Register like singledispatch, dropping encoders compiled from the
+    # previous registrations once the implementation is in
+    if func is None and isinstance(cls, type):
+        return lambda f: _register(cls, f)
+    impl = _jsonify.register(cls, func)
+    invalidate_encoders()
+    return impl
+
+
+# Expose the registry so jsonify can be extended like a singledispatch
+jsonify.register = _register
+jsonify.dispatch = _jsonify.dispatch
+jsonify.registry = _jsonify.registry
+
+
+@_jsonify.register
 def _jsonify_jsonmixin(obj: JSONMixin,
                        camel_case_keys: bool = True,
                        arg_struct: bool = True) -> JSONType:
-    json = obj.to_json()
+    json = _to_json(type(obj), camel_case_keys, arg_struct)(obj)
     if arg_struct:
         json[MODULE_KEY] = type(obj).__module__
         json[NAME_KEY] = type(obj).__name__
     return json
 
 
-@jsonify.register
+def _to_json(cls: Type[JSONMixin],
+             camel_case_keys: bool,
+             arg_struct: bool) -> Callable[[JSONMixin], JSON]:
+    # Overridden `to_json` methods may not take the options
+    if cls.to_json is JSONMixin.to_json:
+        return functools.partial(JSONMixin.to_json,
+                                 camel_case_keys=camel_case_keys,
+                                 arg_struct=arg_struct)
+    return cls.to_json
+
+
+@_jsonify.register
 def _jsonify_float(obj: float,
                    camel_case_keys: bool = True,
                    arg_struct: bool = True) -> JSONType:
@@ -188,28 +423,19 @@ def _jsonify_float(obj: float,
     return replacement
 
 
-@jsonify.register(list)
-@jsonify.register(tuple)
+@_jsonify.register(list)
+@_jsonify.register(tuple)
 def _jsonify_sequence(obj: Sequence[Any],
                       camel_case_keys: bool = True,
                       arg_struct: bool = True) -> JSONType:
-    return [jsonify(o,
-                    camel_case_keys=camel_case_keys,
-                    arg_struct=arg_struct) for o in obj]
+    return _encoder(type(obj), camel_case_keys, arg_struct)(obj)
 
 
-@jsonify.register(dict)
+@_jsonify.register(dict)
 def _jsonify_mapping(obj: Mapping[str, Any],
                      camel_case_keys: bool = True,
                      arg_struct: bool = True) -> JSONType:
-    _j = functools.partial(jsonify,
-                           camel_case_keys=camel_case_keys,
-                           arg_struct=arg_struct)
-    d = {_j(k): _j(v) for k, v in obj.items()}
-    if camel_case_keys:
-        d = {camel_case(k) if isinstance(k, str) else k: v
-             for k, v in d.items()}
-    return d
+    return _encoder(type(obj), camel_case_keys, arg_struct)(obj)
 
 
 def date_time(year: int,
@@ -242,10 +468,21 @@ def date_time(year: int,
                            microsecond=microsecond)
     if timezone is None:
         return dt
-    return pytz.timezone(timezone).localize(dt)
+    return _timezone(timezone).localize(dt)
+
+
+@functools.lru_cache(maxsize=None)
+def _timezone(zone: str) -> datetime.tzinfo:
+    # Unknown zones raise, so only real zones end up cached
+    return pytz.timezone(zone)
 
 
-@jsonify.register
+_EPOCH = datetime.datetime(1970, 1, 1)
+_EPOCH_UTC = pytz.utc.localize(_EPOCH)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+@_jsonify.register
 def _jsonify_datetime(obj: datetime.datetime,
                       camel_case_keys: bool = True,
                       arg_struct: bool = True) -> JSONType:
@@ -270,7 +507,7 @@ def _jsonify_datetime(obj: datetime.datetime,
     }
 
 
-@jsonify.register
+@_jsonify.register
 def _jsonify_date(obj: datetime.date,
                   camel_case_keys: bool = True,
                   arg_struct: bool = True) -> JSONType:
@@ -285,7 +522,7 @@ def _jsonify_date(obj: datetime.date,
     }
 
 
-@jsonify.register
+@_jsonify.register
 def _jsonify_time(obj: datetime.time,
                   camel_case_keys: bool = True,
                   arg_struct: bool = True) -> JSONType:
@@ -301,7 +538,122 @@ def _jsonify_time(obj: datetime.time,
     }
 
 
-@jsonify.register
+def byte_string(data: Union[str, bytes, memoryview]) -> bytes:
+    """
+    Create `bytes` object using meta form.
+
+    :param data: Base64 text or raw buffer
+    :return: `bytes` instance
+    """
+    return bytes(_buffer(data))
+
+
+def byte_view(data: Union[str, bytes, memoryview]) -> memoryview:
+    """
+    Create read-only `memoryview` object using meta form.
+
+    :param data: Base64 text or raw buffer
+    :return: `memoryview` instance
+    """
+    return memoryview(_buffer(data)).toreadonly()
+
+
+def nd_array(dtype: str,
+             shape: Sequence[int],
+             data: Union[str, bytes, memoryview]) -> Any:
+    """
+    Create read-only `numpy.ndarray` object using meta form.
+
+    The array shares memory with the decoded buffer rather than copying.
+
+    :param dtype: Array-protocol type string
+    :param shape: Array shape
+    :param data: Base64 text or raw buffer
+    :return: `numpy.ndarray` instance
+    """
+    if numpy is None:
+        raise ValueError('NumPy is required to decode arrays')
+    dtype = numpy.dtype(dtype)
+    if dtype.hasobject:
+        raise ValueError(f'Unsupported array dtype: {dtype}')
+    return numpy.frombuffer(_buffer(data), dtype=dtype).reshape(shape)
+
+
+def _buffer(data: Any) -> Any:
+    # Including `Base64`, when decoding `jsonify` output directly
+    if isinstance(data, str):
+        return base64.b64decode(data, validate=True)
+    if isinstance(data, (bytes, memoryview)):
+        return data
+    raise ValueError(f'Bad buffer: {type_name(data)}')
+
+
+class Base64(str):
+    """
+    Base64 text of a buffer, as produced by `jsonify`.
+
+    Binary encoders can write `raw` directly instead of the text.
+    """
+
+    raw: memoryview
+
+
+def _base64(data: memoryview) -> Base64:
+    text = Base64(base64.b64encode(data).decode('ascii'))
+    text.raw = data
+    return text
+
+
+@_jsonify.register
+def _jsonify_bytes(obj: bytes,
+                   camel_case_keys: bool = True,
+                   arg_struct: bool = True) -> JSONType:
+    if not arg_struct:
+        return base64.b64encode(obj).decode('ascii')
+    return {
+        MODULE_KEY: byte_string.__module__,
+        NAME_KEY: byte_string.__name__,
+        'data': _base64(memoryview(obj)),
+    }
+
+
+@_jsonify.register
+def _jsonify_memoryview(obj: memoryview,
+                        camel_case_keys: bool = True,
+                        arg_struct: bool = True) -> JSONType:
+    obj = obj.cast('B') if obj.c_contiguous else memoryview(obj.tobytes())
+    if not arg_struct:
+        return base64.b64encode(obj).decode('ascii')
+    return {
+        MODULE_KEY: byte_view.__module__,
+        NAME_KEY: byte_view.__name__,
+        'data': _base64(obj),
+    }
+
+
+def _jsonify_ndarray(obj: Any,
+                     camel_case_keys: bool = True,
+                     arg_struct: bool = True) -> JSONType:
+    if not arg_struct:
+        return obj.tolist()
+    if obj.dtype.hasobject or obj.dtype.names:
+        raise TypeError(f'Unsupported array dtype: {obj.dtype}')
+    if not obj.flags.c_contiguous:
+        obj = obj.copy(order='C')
+    return {
+        MODULE_KEY: nd_array.__module__,
+        NAME_KEY: nd_array.__name__,
+        'dtype': obj.dtype.str,
+        'shape': list(obj.shape),
+        'data': _base64(memoryview(obj.reshape(-1).view(numpy.uint8))),
+    }
+
+
+if numpy is not None:
+    _jsonify.register(numpy.ndarray, _jsonify_ndarray)
+
+
+@_jsonify.register
 def _jsonify_enum(obj: Enum,
                   camel_case_keys: bool = True,
                   arg_struct: bool = True) -> JSONType:
@@ -320,19 +672,603 @@ def _jsonify_enum(obj: Enum,
 def _jsonify_dataclass(obj: dataclasses.dataclass,
                        camel_case_keys: bool = True,
                        arg_struct: bool = True) -> JSONType:
-    d = {}
-    for f in dataclasses.fields(obj):
+    return _encoder(type(obj), camel_case_keys, arg_struct)(obj)
+
+
+_Encoder = Callable[[Any], JSONType]
+
+# Leaf types encoded as-is, checked by exact type
+_PRIMITIVES = frozenset({str, int, bool, type(None)})
+
+# Compiled encoders, per (camel_case_keys, arg_struct), per exact type
+_ENCODERS: Dict[Tuple[bool, bool], Dict[Type[Any], _Encoder]] = {}
+
+
+def invalidate_encoders() -> None:
+    """
+    Drop all compiled `jsonify` encoders.
+
+    Encoders are compiled on first sight of a type and reflect the
+    `jsonify` registrations at that time. `jsonify.register` calls this
+    already, so it is only needed if types are otherwise changed after
+    being serialised.
+    """
+    _ENCODERS.clear()
+    _PLAIN_DATACLASSES.clear()
+
+
+def _encoder_table(camel_case_keys: bool,
+                   arg_struct: bool) -> Dict[Type[Any], _Encoder]:
+    try:
+        return _ENCODERS[camel_case_keys, arg_struct]
+    except KeyError:
+        return _ENCODERS.setdefault((camel_case_keys, arg_struct), {})
+
+
+def _encoder(cls: Type[Any],
+             camel_case_keys: bool,
+             arg_struct: bool) -> _Encoder:
+    encoders = _encoder_table(camel_case_keys, arg_struct)
+    try:
+        return encoders[cls]
+    except KeyError:
+        pass
+    encoder = _compile_encoder(cls, camel_case_keys, arg_struct)
+    encoders[cls] = encoder
+    return encoder
+
+
+def encoder_table(camel_case_keys: bool,
+                  arg_struct: bool) -> Dict[Type[Any], _Encoder]:
+    """
+    Get compiled `jsonify` encoders by exact type.
+
+    Tables are replaced by `invalidate_encoders`, so anything derived
+    from a table should only be reused while the table is current.
+
+    :param camel_case_keys: Use camelCase keys
+    :param arg_struct: Provide structure with arguments for re-creation
+    :return: Encoders compiled so far
+    """
+    return _encoder_table(camel_case_keys, arg_struct)
+
+
+def compiled_encoder(cls: Type[Any],
+                     camel_case_keys: bool,
+                     arg_struct: bool) -> _Encoder:
+    """
+    Get compiled `jsonify` encoder, compiling it on first sight of type.
+
+    :param cls: Exact type of objects
+    :param camel_case_keys: Use camelCase keys
+    :param arg_struct: Provide structure with arguments for re-creation
+    :return: Encoder
+    """
+    return _encoder(cls, camel_case_keys, arg_struct)
+
+
+def dataclass_keys(cls: Type[Any],
+                   camel_case_keys: bool) -> Tuple[Tuple[str, str], ...]:
+    """
+    Get dataclass attribute names and the keys they are serialised under.
+
+    :param cls: Dataclass type
+    :param camel_case_keys: Use camelCase keys
+    :return: Pairs of attribute name and key
+    """
+    return _dataclass_keys(cls, camel_case_keys)
+
+
+def plain_dataclass_keys(cls: Type[Any], camel_case_keys: bool
+                         ) -> Optional[Tuple[Tuple[str, str], ...]]:
+    """
+    Get keys of a dataclass serialised field by field.
+
+    :param cls: Type of objects
+    :param camel_case_keys: Use camelCase keys
+    :return: Pairs of attribute name and key, or None if the type is not
+             a dataclass or has its own `jsonify` implementation
+    """
+    return _plain_dataclass_keys(cls, camel_case_keys)
+
+
+def _compile_encoder(cls: Type[Any],
+                     camel_case_keys: bool,
+                     arg_struct: bool) -> _Encoder:
+    impl = jsonify.dispatch(cls)
+    if impl is _jsonify_sequence:
+        return _compile_sequence(camel_case_keys, arg_struct)
+    if impl is _jsonify_mapping:
+        return _compile_mapping(camel_case_keys, arg_struct)
+    if impl is _jsonify_float:
+        return _compile_float(arg_struct)
+    if impl is _jsonify_jsonmixin and arg_struct:
+        return _compile_jsonmixin(cls, camel_case_keys)
+    if impl is jsonify.dispatch(object):
+        if cls in _PRIMITIVES:
+            return _identity
+        if dataclasses.is_dataclass(cls):
+            return _compile_dataclass(cls, camel_case_keys, arg_struct)
+    return functools.partial(impl,
+                             camel_case_keys=camel_case_keys,
+                             arg_struct=arg_struct)
+
+
+def _identity(obj: T) -> T:
+    return obj
+
+
+def _compile_float(arg_struct: bool) -> _Encoder:
+    isfinite = math.isfinite
+
+    def _encode(obj: float) -> JSONType:
+        if isfinite(obj):
+            return obj
+        return _jsonify_float(obj, arg_struct=arg_struct)
+
+    return _encode
+
+
+def _compile_jsonmixin(cls: Type[JSONMixin],
+                       camel_case_keys: bool) -> _Encoder:
+    module = cls.__module__
+    name = cls.__name__
+    to_json = _to_json(cls, camel_case_keys, True)
+
+    def _encode(obj: JSONMixin) -> JSONType:
+        json = to_json(obj)
+        json[MODULE_KEY] = module
+        json[NAME_KEY] = name
+        return json
+
+    return _encode
+
+
+def _compile_sequence(camel_case_keys: bool, arg_struct: bool) -> _Encoder:
+    encoders = _encoder_table(camel_case_keys, arg_struct)
+
+    def _encode(obj: Sequence[Any]) -> JSONType:
+        out = []
+        append = out.append
+        for v in obj:
+            cls = type(v)
+            if cls in _PRIMITIVES:
+                append(v)
+            else:
+                encoder = (encoders.get(cls)
+                           or _encoder(cls, camel_case_keys, arg_struct))
+                append(encoder(v))
+        return out
+
+    return _encode
+
+
+def _compile_mapping(camel_case_keys: bool, arg_struct: bool) -> _Encoder:
+    encoders = _encoder_table(camel_case_keys, arg_struct)
+
+    def _encode(obj: Mapping[Any, Any]) -> JSONType:
+        d = {}
+        for k, v in obj.items():
+            cls = type(k)
+            if cls not in _PRIMITIVES:
+                k = (encoders.get(cls)
+                     or _encoder(cls, camel_case_keys, arg_struct))(k)
+            if camel_case_keys and isinstance(k, str):
+                k = camel_case(k)
+            cls = type(v)
+            if cls not in _PRIMITIVES:
+                v = (encoders.get(cls)
+                     or _encoder(cls, camel_case_keys, arg_struct))(v)
+            d[k] = v
+        return d
+
+    return _encode
+
+
+def _dataclass_keys(cls: Type[Any],
+                    camel_case_keys: bool) -> Tuple[Tuple[str, str], ...]:
+    return tuple((f.name, camel_case(f.name) if camel_case_keys else f.name)
+                 for f in dataclasses.fields(cls))
+
+
+def _compile_dataclass(cls: Type[Any],
+                       camel_case_keys: bool,
+                       arg_struct: bool) -> _Encoder:
+    encoders = _encoder_table(camel_case_keys, arg_struct)
+    fields = _dataclass_keys(cls, camel_case_keys)
+    module = cls.__module__
+    name = cls.__name__
+
+    def _encode(obj: Any) -> JSONType:
+        d = {}
+        for attr, key in fields:
+            v = getattr(obj, attr)
+            v_cls = type(v)
+            if v_cls in _PRIMITIVES:
+                d[key] = v
+            else:
+                d[key] = (encoders.get(v_cls)
+                          or _encoder(v_cls, camel_case_keys, arg_struct))(v)
+        if arg_struct:
+            d[MODULE_KEY] = module
+            d[NAME_KEY] = name
+        return d
+
+    return _encode
+
+
+def _jsonify_references(obj: Any,
+                        camel_case_keys: bool,
+                        arg_struct: bool) -> Tuple[JSONType, bool]:
+    encoders = _encoder_table(camel_case_keys, arg_struct)
+    counts: Dict[int, int] = {}
+    active: Set[int] = set()
+
+    def _count(node: Any) -> None:
+        cls = type(node)
+        if cls in _PRIMITIVES or cls is float:
+            return
+        if cls is list or cls is tuple or cls is dict:
+            if id(node) in active:
+                raise ValueError('Reference cycle through a list or dict')
+            active.add(id(node))
+            for v in node.values() if cls is dict else node:
+                _count(v)
+            active.remove(id(node))
+            return
+        key = id(node)
+        if key in counts:
+            counts[key] += 1
+            return
+        counts[key] = 1
+        for attr, _ in _traversed_keys(cls, camel_case_keys) or ():
+            _count(getattr(node, attr))
+
+    # Object id -> reference, or None if its encoding cannot take one
+    refs: Dict[int, Optional[int]] = {}
+
+    def _encode(node: Any) -> JSONType:
+        cls = type(node)
+        if cls in _PRIMITIVES:
+            return node
+        if cls is list or cls is tuple:
+            return [_encode(v) for v in node]
+        if cls is dict:
+            d = {}
+            for k, v in node.items():
+                if type(k) is not str:
+                    k = (encoders.get(type(k))
+                         or _encoder(type(k), camel_case_keys, arg_struct))(k)
+                if camel_case_keys and isinstance(k, str):
+                    k = camel_case(k)
+                d[k] = _encode(v)
+            return d
+
+        key = id(node)
+        ref = None
+        if counts.get(key, 0) > 1:
+            if key in refs:
+                ref = refs[key]
+                if ref is not None:
+                    return {REF_KEY: ref}
+            else:
+                ref = refs[key] = len(refs)
+
+        fields = _traversed_keys(cls, camel_case_keys)
+        if fields is None:
+            encoded = (encoders.get(cls)
+                       or _encoder(cls, camel_case_keys, arg_struct))(node)
+            if ref is None:
+                return encoded
+            if not isinstance(encoded, dict):
+                refs[key] = None
+                return encoded
+            d = dict(encoded)
+        else:
+            d = {k: _encode(getattr(node, attr)) for attr, k in fields}
+            if arg_struct:
+                d[MODULE_KEY] = cls.__module__
+                d[NAME_KEY] = cls.__name__
+        if ref is not None:
+            d[ID_KEY] = ref
+        return d
+
+    _count(obj)
+    json = _encode(obj)
+    return json, any(ref is not None for ref in refs.values())
+
+
+def _jsonify_columnar(obj: Any,
+                      camel_case_keys: bool,
+                      arg_struct: bool) -> Tuple[JSONType, bool]:
+    encoders = _encoder_table(camel_case_keys, arg_struct)
+    # Types of the lists written as columns
+    columned: Set[Type[Any]] = set()
+
+    def _encode(node: Any) -> JSONType:
+        cls = type(node)
+        if cls in _PRIMITIVES:
+            return node
+        if cls is list or cls is tuple:
+            if len(node) > 1:
+                item = type(node[0])
+                fields = _plain_dataclass_keys(item, camel_case_keys)
+                if fields and all(type(v) is item for v in node):
+                    columned.add(item)
+                    d = {COLUMNS_KEY: {k: [_encode(getattr(v, attr))
+                                           for v in node]
+                                       for attr, k in fields}}
+                    if arg_struct:
+                        d[MODULE_KEY] = item.__module__
+                        d[NAME_KEY] = item.__name__
+                    return d
+            return [_encode(v) for v in node]
+        if cls is dict:
+            d = {}
+            for k, v in node.items():
+                if type(k) is not str:
+                    k = (encoders.get(type(k))
+                         or _encoder(type(k), camel_case_keys, arg_struct))(k)
+                if camel_case_keys and isinstance(k, str):
+                    k = camel_case(k)
+                d[k] = _encode(v)
+            return d
+        fields = _plain_dataclass_keys(cls, camel_case_keys)
+        if fields is None:
+            return (encoders.get(cls)
+                    or _encoder(cls, camel_case_keys, arg_struct))(node)
+        d = {k: _encode(getattr(node, attr)) for attr, k in fields}
+        if arg_struct:
+            d[MODULE_KEY] = cls.__module__
+            d[NAME_KEY] = cls.__name__
+        return d
+
+    json = _encode(obj)
+    return json, bool(columned)
+
+
+def _jsonify_iterative(obj: Any,
+                       camel_case_keys: bool,
+                       arg_struct: bool) -> JSONType:
+    encoders = _encoder_table(camel_case_keys, arg_struct)
+    # Leaf encoders, or None for types traversed here
+    leaves: Dict[Type[Any], Optional[_Encoder]] = {}
+    # Attributes and keys of traversed dataclasses
+    traversed: Dict[Type[Any], Tuple[Tuple[str, str], ...]] = {}
+
+    def _leaf(cls: Type[Any]) -> Optional[_Encoder]:
+        encoder = None
+        if cls is not list and cls is not tuple and cls is not dict:
+            keys = _traversed_keys(cls, camel_case_keys)
+            if keys is None:
+                encoder = (encoders.get(cls)
+                           or _encoder(cls, camel_case_keys, arg_struct))
+            else:
+                traversed[cls] = keys
+        leaves[cls] = encoder
+        return encoder
+
+    root: List[JSONType] = [obj]
+    # Containers whose values still need encoding in place, each pushed
+    # above the id of the object it was made from
+    stack: List[Any] = [root]
+    push = stack.append
+    pop = stack.pop
+    # Ids of the objects on the path to the current container, entered
+    # when a container is popped and left when the id below it is
+    active: Set[int] = set()
+
+    while stack:
+        out = pop()
+        if type(out) is int:
+            active.discard(out)
+            continue
+        if stack:
+            # Only the root container has no id below it
+            active.add(stack[-1])
+        for k, v in enumerate(out) if type(out) is list else out.items():
+            cls = type(v)
+            if cls in _PRIMITIVES:
+                continue
+            try:
+                encoder = leaves[cls]
+            except KeyError:
+                encoder = _leaf(cls)
+            if encoder is not None:
+                out[k] = encoder(v)
+                continue
+
+            ident = id(v)
+            if ident in active:
+                raise ValueError('Reference cycle')
+            if cls is list or cls is tuple:
+                v = list(v)
+            elif cls is dict:
+                d = {}
+                for key, value in v.items():
+                    if type(key) not in _PRIMITIVES:
+                        key = (encoders.get(type(key))
+                               or _encoder(type(key), camel_case_keys,
+                                           arg_struct))(key)
+                    if camel_case_keys and isinstance(key, str):
+                        key = camel_case(key)
+                    d[key] = value
+                v = d
+            else:
+                d = {key: getattr(v, attr) for attr, key in traversed[cls]}
+                if arg_struct:
+                    d[MODULE_KEY] = cls.__module__
+                    d[NAME_KEY] = cls.__name__
+                v = d
+            out[k] = v
+            push(ident)
+            push(v)
+
+    return root[0]
+
+
+def _traversed_keys(cls: Type[Any], camel_case_keys: bool
+                    ) -> Optional[Tuple[Tuple[str, str], ...]]:
+    # Mixins with the inherited `to_json` serialise like plain dataclasses
+    if (issubclass(cls, JSONMixin) and cls.to_json is JSONMixin.to_json
+            and jsonify.dispatch(cls) is _jsonify_jsonmixin):
         if camel_case_keys:
-            k = camel_case(f.name)
+            return cls.__json_keys__
+        return tuple((attr, attr) for attr, _ in cls.__json_keys__)
+    return _plain_dataclass_keys(cls, camel_case_keys)
+
+
+# Plain dataclass keys, or None, per (type, camel_case_keys)
+_PLAIN_DATACLASSES: Dict[Tuple[Type[Any], bool],
+                         Optional[Tuple[Tuple[str, str], ...]]] = {}
+
+
+def _plain_dataclass_keys(cls: Type[Any], camel_case_keys: bool
+                          ) -> Optional[Tuple[Tuple[str, str], ...]]:
+    try:
+        return _PLAIN_DATACLASSES[cls, camel_case_keys]
+    except KeyError:
+        pass
+    keys = None
+    if (dataclasses.is_dataclass(cls)
+            and jsonify.dispatch(cls) is jsonify.dispatch(object)):
+        keys = _dataclass_keys(cls, camel_case_keys)
+    _PLAIN_DATACLASSES[cls, camel_case_keys] = keys
+    return keys
+
+
+_MISSING = object()
+
+
+class Projection:
+    """Compiled field paths selecting what to "JSON-ify"."""
+
+    __slots__ = ('paths', 'tree')
+
+    def __init__(self, *paths: str) -> None:
+        """
+        Compile field paths.
+
+        Paths are dot-separated dataclass fields or mapping keys, named
+        as in Python, where ``*`` matches all fields, keys or list items.
+        Selecting a value selects all of its contents. Dataclasses, lists
+        and dicts only visit what is selected, other values are
+        serialised whole and then pruned.
+
+        :param paths: Field paths, such as ``units.*.state``
+        """
+        tree: Dict[str, Any] = {}
+        for path in paths:
+            if not isinstance(path, str):
+                raise TypeError(f'Projection path must be str: {path!r}')
+            segments = path.split('.')
+            if '' in segments:
+                raise ValueError(f'Bad projection path: {path!r}')
+            node = tree
+            for segment in segments[:-1]:
+                if segment in node and node[segment] is None:
+                    break
+                node = node.setdefault(segment, {})
+            else:
+                node[segments[-1]] = None
+        self.paths = paths
+        self.tree = tree
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}{self.paths!r}'
+
+
+def _projected(tree: Dict[str, Any], name: Any) -> Any:
+    # Sub-tree selected by name, None for everything or _MISSING
+    named = tree.get(name, _MISSING) if isinstance(name, str) else _MISSING
+    wildcard = tree.get('*', _MISSING)
+    if wildcard is _MISSING:
+        return named
+    if named is _MISSING:
+        return wildcard
+    return _merge_projections(named, wildcard)
+
+
+def _merge_projections(a: Any, b: Any) -> Any:
+    if a is None or b is None:
+        return None
+    merged = dict(a)
+    for k, v in b.items():
+        merged[k] = _merge_projections(merged[k], v) if k in merged else v
+    return merged
+
+
+def _jsonify_projected(obj: Any,
+                       tree: Optional[Dict[str, Any]],
+                       camel_case_keys: bool,
+                       arg_struct: bool) -> JSONType:
+    cls = type(obj)
+    if cls in _PRIMITIVES:
+        return obj
+    if tree is None:
+        return _encoder(cls, camel_case_keys, arg_struct)(obj)
+
+    if cls is list or cls is tuple:
+        sub = tree.get('*', _MISSING)
+        if sub is _MISSING:
+            return []
+        return [_jsonify_projected(v, sub, camel_case_keys, arg_struct)
+                for v in obj]
+
+    if cls is dict:
+        if '*' in tree:
+            items = obj.items()
         else:
-            k = f.name
-        v = getattr(obj, f.name)
-        d[k] = jsonify(v,
-                       camel_case_keys=camel_case_keys,
-                       arg_struct=arg_struct)
-    if arg_struct:
-        d[MODULE_KEY] = type(obj).__module__
-        d[NAME_KEY] = type(obj).__name__
+            items = ((k, obj[k]) for k in tree if k in obj)
+        d = {}
+        for k, v in items:
+            sub = _projected(tree, k)
+            if type(k) is not str:
+                k = jsonify(k, camel_case_keys=camel_case_keys,
+                            arg_struct=arg_struct)
+            if camel_case_keys and isinstance(k, str):
+                k = camel_case(k)
+            d[k] = _jsonify_projected(v, sub, camel_case_keys, arg_struct)
+        return d
+
+    fields = _plain_dataclass_keys(cls, camel_case_keys)
+    if fields is not None:
+        d = {}
+        for attr, key in fields:
+            sub = _projected(tree, attr)
+            if sub is not _MISSING:
+                d[key] = _jsonify_projected(getattr(obj, attr), sub,
+                                            camel_case_keys, arg_struct)
+        if arg_struct:
+            d[MODULE_KEY] = cls.__module__
+            d[NAME_KEY] = cls.__name__
+        return d
+
+    return _prune(_encoder(cls, camel_case_keys, arg_struct)(obj), tree,
+                  camel_case_keys)
+
+
+def _prune(json: JSONType,
+           tree: Optional[Dict[str, Any]],
+           camel_case_keys: bool) -> JSONType:
+    if tree is None:
+        return json
+    if type(json) is list:
+        sub = tree.get('*', _MISSING)
+        if sub is _MISSING:
+            return []
+        return [_prune(v, sub, camel_case_keys) for v in json]
+    if type(json) is not dict:
+        return json
+    d = {}
+    for k, v in json.items():
+        if k in _TAG_KEYS:
+            d[k] = v
+            continue
+        sub = _projected(tree, snake_case(k) if camel_case_keys
+                         and isinstance(k, str) else k)
+        if sub is not _MISSING:
+            d[k] = _prune(v, sub, camel_case_keys)
     return d
 
 
@@ -341,65 +1277,638 @@ def unjsonify(json: JSONType, camel_case_keys: bool = True) -> Any:
     "un-JSON-ify" object.
 
     Attempts to deserialise a previously "JSON-ified" Python object back
-    to its original Python object state.
-
-    TODO: dispatching depending on type
+    to its original Python object state. Documents with interned types,
+    references or compact datetimes are recognised and decoded
+    accordingly.
 
     :param json: "JSON-ified" object
     :param camel_case_keys: Use camelCase keys
     :return: Python object
     """
-    _uj = functools.partial(unjsonify, camel_case_keys=camel_case_keys)
+    value, doc = read_document(json, camel_case_keys)
+    return _unjsonify_iterative(value, camel_case_keys, doc)
+
+
+def read_document(json: JSONType,
+                  camel_case_keys: bool) -> Tuple[JSONType, Document]:
+    """
+    Split "JSON-ified" document into its value and document state.
+
+    :param json: "JSON-ified" object
+    :param camel_case_keys: Use camelCase keys
+    :return: Document value and state for `unjsonify_node`
+    """
+    if (isinstance(json, Mapping) and VALUE_KEY in json and len(json) > 1
+            and json.keys() <= _ROOT_KEYS):
+        types = None
+        if TYPES_KEY in json:
+            types = _type_table(json[TYPES_KEY], camel_case_keys)
+        zones = None
+        if ZONES_KEY in json:
+            zones = _zone_table(json[ZONES_KEY])
+        return json[VALUE_KEY], Document(types, zones, REFS_KEY in json,
+                                         COLUMNS_KEY in json)
+    return json, Document()
+
+
+def unjsonify_node(json: JSONType,
+                   camel_case_keys: bool,
+                   doc: Document) -> Any:
+    """
+    "un-JSON-ify" value within a document.
 
-    # Return basic types as-is
-    if isinstance(json, (str, int, float, bool)) or json is None:
+    :param json: "JSON-ified" value, or part of it
+    :param camel_case_keys: Use camelCase keys
+    :param doc: Document state from `read_document`
+    :return: Python object
+    """
+    return _unjsonify_iterative(json, camel_case_keys, doc)
+
+
+# Keys of documents wrapped with tables
+_ROOT_KEYS = frozenset({TYPES_KEY, ZONES_KEY, REFS_KEY, COLUMNS_KEY,
+                        VALUE_KEY})
+
+
+_Decoder = Callable[..., Any]
+
+# Errors registered types raise for malformed arguments, such as
+# `pytz.UnknownTimeZoneError`, a `KeyError`, or missing static attributes
+_BAD_ARGUMENTS = (AttributeError, KeyError, OverflowError, TypeError,
+                  ValueError)
+
+_TAG_KEYS = frozenset({MODULE_KEY, NAME_KEY, TAG_KEY})
+
+# Keys not passed on as values, per (interned types, references)
+_DOCUMENT_TAG_KEYS = {
+    (False, False): frozenset({MODULE_KEY, NAME_KEY}),
+    (True, False): _TAG_KEYS,
+    (False, True): frozenset({MODULE_KEY, NAME_KEY, ID_KEY}),
+    (True, True): _TAG_KEYS | {ID_KEY},
+}
+
+# Container types in "JSON-ified" output
+_CONTAINERS = frozenset({list, dict})
+
+
+class Document:
+    """Per-document `unjsonify` state, shared by all of its nodes."""
+
+    __slots__ = ('types', 'zones', 'refs', 'columns', 'tags', 'special')
+
+    def __init__(self,
+                 types: Optional[Sequence[_Decoder]] = None,
+                 zones: Optional[Sequence[datetime.tzinfo]] = None,
+                 references: bool = False,
+                 columns: bool = False) -> None:
+        self.types = types
+        self.zones = zones
+        self.columns = columns
+        # `$id` and `$ref` are only special in documents with references
+        self.refs: Optional[Dict[Any, Any]] = {} if references else None
+        # `$tag` is only special in documents with interned types
+        self.tags = _DOCUMENT_TAG_KEYS[types is not None, references]
+        # Keys the recursive `_unjsonify` handles, `$epoch` only with zones
+        # and `$columns` only in columnar documents
+        special = {COLUMNS_KEY} if columns else set()
+        if references:
+            special |= {ID_KEY, REF_KEY}
+        if zones is not None:
+            special.add(EPOCH_KEY)
+        self.special = frozenset(special)
+
+
+def _unjsonify(json: JSONType, camel_case_keys: bool, doc: Document) -> Any:
+    # Return basic types as-is, checking exact types before the ABCs
+    cls = type(json)
+    if cls in _SCALARS:
         return json
+    if cls is not list and cls is not dict:
+        if isinstance(json, (str, int, float, bool)):
+            return json
+        if isinstance(json, Sequence):
+            cls = list
+        elif isinstance(json, Mapping):
+            cls = dict
 
     # Recursively process collections
-    if isinstance(json, Sequence):
-        return [_uj(j) for j in json]
-    if isinstance(json, Mapping):
-        mapping = {_uj(k): _uj(v) for k, v in json.items()}
+    if cls is list:
+        return [_unjsonify(j, camel_case_keys, doc) for j in json]
+    if cls is dict:
+        if doc.refs is not None and REF_KEY in json:
+            try:
+                return doc.refs[json[REF_KEY]]
+            except (KeyError, TypeError):
+                raise ValueError(f'Unknown reference: '
+                                 f'{json[REF_KEY]!r}') from None
+
+        if doc.columns and COLUMNS_KEY in json:
+            return _unjsonify_columns(json, camel_case_keys, doc)
+
+        if doc.zones is not None and EPOCH_KEY in json:
+            return _unjsonify_epoch(json, doc)
 
         # Check if a special type, otherwise return as mapping
-        module = mapping.pop(MODULE_KEY, None)
-        name = mapping.pop(NAME_KEY, None)
+        decoder = tagged_decoder(json, camel_case_keys, doc)
+        if decoder is not None:
+            obj = decoder(json, doc)
+        elif camel_case_keys:
+            obj = {snake_case(k) if isinstance(k, str) else k:
+                   _unjsonify(v, camel_case_keys, doc)
+                   for k, v in json.items() if k not in doc.tags}
+        else:
+            obj = {k: _unjsonify(v, camel_case_keys, doc)
+                   for k, v in json.items() if k not in doc.tags}
 
-        if module is None or name is None:
-            if camel_case_keys:
-                return {snake_case(k) if isinstance(k, str) else k: v
-                        for k, v in mapping.items()}
-            return mapping
+        if doc.refs is not None and ID_KEY in json:
+            doc.refs[json[ID_KEY]] = obj
+        return obj
 
-        try:
-            cls = getattr(importlib.import_module(module), name)
-        except (ImportError, AttributeError) as e:
-            raise ValueError(f'Could not locate: {module}.{name}') from e
+    logger.warning('Unsupported type in unjsonify: %s (%r)',
+                   type_name(json), json)
+    return json
 
-        # If we explicitly have JSON deserialisation method, use it
-        if isinstance(cls, type) and issubclass(cls, JSONMixin):
-            return cls.from_json(mapping)
 
-        # If we have an enum, get correct one
-        if isinstance(cls, type) and issubclass(cls, Enum):
-            return getattr(cls, mapping['name'])
+class _Build:
+    """Deferred dataclass construction in `_unjsonify_iterative`."""
+
+    __slots__ = ('cls', 'kwargs', 'parent', 'key')
+
+    def __init__(self,
+                 cls: Type[Any],
+                 kwargs: Dict[str, Any],
+                 parent: Any,
+                 key: Any) -> None:
+        self.cls = cls
+        self.kwargs = kwargs
+        self.parent = parent
+        self.key = key
+
+
+def _unjsonify_iterative(json: JSONType,
+                         camel_case_keys: bool,
+                         doc: Document) -> Any:
+    root: List[Any] = [None]
+    # Nodes still to be decoded, with the container slot they go in,
+    # and dataclasses to build once all of their arguments are decoded
+    stack: List[Any] = [(json, root, 0)]
+    push = stack.append
+    pop = stack.pop
+
+    while stack:
+        item = pop()
+        if type(item) is _Build:
+            try:
+                item.parent[item.key] = item.cls(**item.kwargs)
+            except _BAD_ARGUMENTS as e:
+                raise ValueError(f'Bad arguments for '
+                                 f'{type_name(item.cls)}: {e}') from e
+            continue
+
+        node, parent, key = item
+        cls = type(node)
+        if cls is list:
+            out = list(node)
+            for i in range(len(out) - 1, -1, -1):
+                if type(out[i]) not in _SCALARS:
+                    push((out[i], out, i))
+            parent[key] = out
+            continue
+        if cls is not dict or not node.keys().isdisjoint(doc.special):
+            parent[key] = _unjsonify(node, camel_case_keys, doc)
+            continue
+
+        decoder = tagged_decoder(node, camel_case_keys, doc)
+        if decoder is None:
+            out = {}
+        else:
+            try:
+                dataclass, _, names = _DATACLASS_FIELDS[decoder]
+            except KeyError:
+                parent[key] = decoder(node, doc)
+                continue
+            out = {}
+            push(_Build(dataclass, out, parent, key))
+
+        for k, v in node.items():
+            if k in doc.tags:
+                continue
+            if decoder is not None:
+                k = names.get(k) or (snake_case(k) if camel_case_keys
+                                     and isinstance(k, str) else k)
+            elif camel_case_keys and isinstance(k, str):
+                k = snake_case(k)
+            out[k] = v
+        for k, v in reversed(list(out.items())):
+            if type(v) not in _SCALARS:
+                push((v, out, k))
+        if decoder is None:
+            parent[key] = out
+
+    return root[0]
+
+
+# Leaf types, including buffers read by `unpack`
+_SCALARS = frozenset({str, int, float, bool, type(None), bytes, memoryview})
+
+
+def _unjsonify_columns(json: Mapping[str, Any],
+                       camel_case_keys: bool,
+                       doc: Document) -> List[Any]:
+    columns = json[COLUMNS_KEY]
+    if (not isinstance(columns, Mapping)
+            or not all(isinstance(c, list) for c in columns.values())
+            or len({len(c) for c in columns.values()}) > 1):
+        raise ValueError('Columns must be a mapping of equal length lists')
+
+    decoder = tagged_decoder(json, camel_case_keys, doc)
+    if decoder is None:
+        keys = [snake_case(k) if camel_case_keys and isinstance(k, str)
+                else k for k in columns]
+        rows = zip(*(_unjsonify(c, camel_case_keys, doc)
+                     for c in columns.values()))
+        return [dict(zip(keys, row)) for row in rows]
+
+    try:
+        cls, _, names = _DATACLASS_FIELDS[decoder]
+    except KeyError:
+        # Not a dataclass, so decode row by row
+        keys = list(columns)
+        return [decoder(dict(zip(keys, row)), doc)
+                for row in zip(*columns.values())]
+
+    keys = [names.get(k, k) for k in columns]
+    rows = zip(*(_unjsonify(c, camel_case_keys, doc)
+                 for c in columns.values()))
+    try:
+        return [cls(**dict(zip(keys, row))) for row in rows]
+    except _BAD_ARGUMENTS as e:
+        raise ValueError(f'Bad arguments for {type_name(cls)}: {e}') from e
+
+
+def _unjsonify_epoch(json: Mapping[str, Any],
+                     doc: Document) -> datetime.datetime:
+    value = json[EPOCH_KEY]
+    try:
+        us, zone = value
+    except (TypeError, ValueError):
+        raise ValueError(f'Bad epoch datetime: {value!r}') from None
+    if type(us) is not int:
+        raise ValueError(f'Bad epoch datetime: {value!r}')
+    if zone is not None and (type(zone) is not int
+                             or not 0 <= zone < len(doc.zones)):
+        raise ValueError(f'Unknown timezone index: {zone!r}')
+    try:
+        if zone is None:
+            return _EPOCH + us * _MICROSECOND
+        return (_EPOCH_UTC + us * _MICROSECOND).astimezone(doc.zones[zone])
+    except OverflowError:
+        raise ValueError(f'Epoch datetime out of range: {us!r}') from None
+
+
+def tagged_decoder(json: Mapping[str, Any],
+                   camel_case_keys: bool,
+                   doc: Document) -> Optional[_Decoder]:
+    """
+    Get decoder of a tagged object within a document.
 
-        # Float takes no keyword args
-        if cls is float:
-            return float(mapping['x'])
+    Decoders are called with the object and `doc`.
 
-        # Otherwise use as kwargs
+    :param json: "JSON-ified" mapping
+    :param camel_case_keys: Use camelCase keys
+    :param doc: Document state from `read_document`
+    :return: Decoder, or None if the mapping is not tagged
+    """
+    module = json.get(MODULE_KEY)
+    name = json.get(NAME_KEY)
+    if module is not None and name is not None:
+        return _decoder(module, name, camel_case_keys)
+    if doc.types is not None and TAG_KEY in json:
+        tag = json[TAG_KEY]
+        if type(tag) is not int or not 0 <= tag < len(doc.types):
+            raise ValueError(f'Unknown type tag: {tag!r}')
+        return doc.types[tag]
+    return None
+
+
+def _intern_types(json: JSONType) -> JSON:
+    types: Dict[Tuple[str, str], int] = {}
+
+    def _intern(node: JSONType) -> JSONType:
+        if type(node) is list:
+            return [_intern(v) if type(v) in _CONTAINERS else v
+                    for v in node]
+        d = {k: _intern(v) if type(v) in _CONTAINERS else v
+             for k, v in node.items()}
+        module = d.get(MODULE_KEY)
+        name = d.get(NAME_KEY)
+        if module is not None and name is not None:
+            del d[MODULE_KEY]
+            del d[NAME_KEY]
+            d[TAG_KEY] = types.setdefault((module, name), len(types))
+        return d
+
+    value = _intern(json) if type(json) in _CONTAINERS else json
+    return {TYPES_KEY: [[module, name] for module, name in types],
+            VALUE_KEY: value}
+
+
+# Keys of datetimes in the arg-struct form
+_DATE_TIME_KEYS = frozenset({MODULE_KEY, NAME_KEY, 'year', 'month', 'day',
+                             'hour', 'minute', 'second', 'microsecond',
+                             'timezone'})
+
+
+def _compact_datetimes(json: JSONType) -> Tuple[JSONType, List[str]]:
+    zones: Dict[str, int] = {}
+    # Epoch microseconds of wall clock hours, per (timezone, year, month,
+    # day, hour), or None if the UTC offset changes within the hour
+    hours: Dict[Tuple[Optional[str], int, int, int, int], Optional[int]] = {}
+    module = date_time.__module__
+    name = date_time.__name__
+
+    def _compact(node: JSONType) -> JSONType:
+        if type(node) is list:
+            return [_compact(v) if type(v) in _CONTAINERS else v
+                    for v in node]
+        if (node.get(NAME_KEY) == name and node.get(MODULE_KEY) == module
+                and node.keys() == _DATE_TIME_KEYS):
+            zone = node['timezone']
+            hour = zone, node['year'], node['month'], node['day'], node['hour']
+            try:
+                base = hours[hour]
+            except KeyError:
+                base = hours[hour] = _epoch_hour(*hour)
+            if base is None:
+                dt = _timezone(zone).localize(datetime.datetime(
+                    *hour[1:], node['minute'], node['second'],
+                    node['microsecond']))
+                us = (dt - _EPOCH_UTC) // _MICROSECOND
+            else:
+                us = (base + (node['minute'] * 60 + node['second'])
+                      * 1_000_000 + node['microsecond'])
+            return {EPOCH_KEY: [us, None if zone is None
+                                else zones.setdefault(zone, len(zones))]}
+        return {k: _compact(v) if type(v) in _CONTAINERS else v
+                for k, v in node.items()}
+
+    value = _compact(json) if type(json) in _CONTAINERS else json
+    return value, list(zones)
+
+
+def _epoch_hour(zone: Optional[str],
+                year: int,
+                month: int,
+                day: int,
+                hour: int) -> Optional[int]:
+    start = datetime.datetime(year, month, day, hour)
+    if zone is None:
+        return (start - _EPOCH) // _MICROSECOND
+    tz = _timezone(zone)
+    offset = tz.localize(start).utcoffset()
+    end = start + datetime.timedelta(hours=1) - _MICROSECOND
+    if tz.localize(end).utcoffset() != offset:
+        return None
+    return (start - offset - _EPOCH) // _MICROSECOND
+
+
+def _zone_table(json: JSONType) -> List[datetime.tzinfo]:
+    if not isinstance(json, Sequence) or isinstance(json, str):
+        raise ValueError('Timezone table must be a list')
+    zones = []
+    for entry in json:
         try:
+            zones.append(_timezone(entry))
+        except (TypeError, AttributeError, pytz.UnknownTimeZoneError):
+            raise ValueError(f'Bad timezone table entry: '
+                             f'{entry!r}') from None
+    return zones
+
+
+def _type_table(json: JSONType, camel_case_keys: bool) -> List[_Decoder]:
+    if not isinstance(json, Sequence) or isinstance(json, str):
+        raise ValueError('Type table must be a list')
+    types = []
+    for entry in json:
+        if (isinstance(entry, str) or not isinstance(entry, Sequence)
+                or len(entry) != 2):
+            raise ValueError(f'Bad type table entry: {entry!r}')
+        types.append(_decoder(entry[0], entry[1], camel_case_keys))
+    return types
+
+
+# Compiled decoders, per ($module, $type, camel_case_keys)
+_DECODERS: Dict[Tuple[str, str, bool], _Decoder] = {}
+
+# Dataclass decoders -> (type, {field name: key}, {key: field name})
+_DATACLASS_FIELDS: Dict[_Decoder, Tuple[Type[Any], Dict[str, str],
+                                        Dict[str, str]]] = {}
+
+
+def _field_maps(cls: Type[Any], fields: Dict[str, str]
+                ) -> Tuple[Type[Any], Dict[str, str], Dict[str, str]]:
+    return cls, fields, {k: a for a, k in fields.items()}
+
+
+def invalidate_decoders() -> None:
+    """
+    Drop all compiled `unjsonify` decoders.
+
+    Decoders are compiled once per registered type, so this should be
+    called if registered types are changed after being decoded.
+    """
+    _DECODERS.clear()
+    _DATACLASS_FIELDS.clear()
+
+
+# Types allowed in `unjsonify`, per ($module, $type)
+_TYPES: Dict[Tuple[str, str], Any] = {}
+
+# Registered type -> function building it from its tagged mapping
+_TYPE_DECODERS: Dict[Any, Callable[[Mapping[str, Any]], Any]] = {}
+
+
+def register_type(cls: T,
+                  decoder: Optional[Callable[[Mapping[str, Any]], Any]]
+                  = None) -> T:
+    """
+    Allow type to be "un-JSON-ified".
+
+    `unjsonify` only recreates registered types, so that untrusted input
+    cannot name arbitrary callables. `JSONMixin` subclasses and static
+    data are registered automatically; other dataclasses and enums need
+    this as a decorator, before any input naming them is decoded.
+    Registering a type again under the same name replaces it.
+
+    By default the type is called with the decoded fields as keyword
+    arguments. A `decoder` instead gets the tagged mapping as is, and
+    should raise `ValueError` for mappings it cannot decode.
+
+    :param cls: Type to register
+    :param decoder: Function building the object from its tagged mapping
+    :return: Registered type
+    """
+    module = cls.__module__
+    name = cls.__name__
+    _TYPES[module, name] = cls
+    if decoder is None:
+        _TYPE_DECODERS.pop(cls, None)
+    else:
+        _TYPE_DECODERS[cls] = decoder
+    for camel_case_keys in (True, False):
+        decoder = _DECODERS.pop((module, name, camel_case_keys), None)
+        _DATACLASS_FIELDS.pop(decoder, None)
+    return cls
+
+
+def _decoder(module: str, name: str, camel_case_keys: bool) -> _Decoder:
+    try:
+        return _DECODERS[module, name, camel_case_keys]
+    except (KeyError, TypeError):
+        pass
+    try:
+        cls = _TYPES[module, name]
+    except (KeyError, TypeError):
+        raise ValueError(f'Unknown type: {module}.{name}') from None
+    decoder = _compile_decoder(cls, camel_case_keys)
+    _DECODERS[module, name, camel_case_keys] = decoder
+    return decoder
+
+
+def _compile_decoder(cls: Any, camel_case_keys: bool) -> _Decoder:
+    # If the type was registered with its own decoder, use it
+    try:
+        decode = _TYPE_DECODERS[cls]
+    except (KeyError, TypeError):
+        pass
+    else:
+        return lambda json, doc: decode(json)
+
+    # If we explicitly have JSON deserialisation method, use it
+    if isinstance(cls, type) and issubclass(cls, JSONMixin):
+        label = type_name(cls)
+        # The inherited `from_json` builds like a dataclass, so referenced
+        # mixins can be registered before their fields are decoded too
+        inherited = cls.from_json.__func__ is JSONMixin.from_json.__func__
+
+        def _decode(json: Mapping[str, Any], doc: Document) -> Any:
+            obj = None
+            if inherited and doc.refs is not None and ID_KEY in json:
+                obj = cls.__new__(cls)
+                doc.refs[json[ID_KEY]] = obj
+            fields = {k: _unjsonify(v, camel_case_keys, doc)
+                      for k, v in json.items() if k not in doc.tags}
+            try:
+                if obj is None:
+                    return cls.from_json(fields)
+                attrs = cls.__json_attrs__
+                obj.__init__(**{attrs.get(k) or snake_case(k): v
+                                for k, v in fields.items()})
+                return obj
+            except _BAD_ARGUMENTS as e:
+                raise ValueError(f'Bad arguments for {label}: {e}') from e
+
+        # Such mixins can be decoded without recursing too
+        if inherited:
+            _DATACLASS_FIELDS[_decode] = _field_maps(cls, {
+                a: k if camel_case_keys else a for a, k in cls.__json_keys__})
+        return _decode
+
+    # If we have an enum, get correct one
+    if isinstance(cls, type) and issubclass(cls, Enum):
+        def _decode_enum(json: Mapping[str, Any], doc: Document) -> Any:
+            try:
+                return cls[json['name']]
+            except (KeyError, TypeError):
+                raise ValueError(
+                    f'Unknown {type_name(cls)}: {json.get("name")!r}'
+                ) from None
+
+        return _decode_enum
+
+    # Float takes no keyword args
+    if cls is float:
+        def _decode_float(json: Mapping[str, Any], doc: Document) -> float:
+            try:
+                return float(json['x'])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f'Bad float: {json.get("x")!r}') from None
+
+        return _decode_float
+
+    # Otherwise use as kwargs
+    keys = {}
+    if camel_case_keys:
+        keys = {camel_case(a): snake_case(camel_case(a))
+                for a in _argument_names(cls)}
+    label = type_name(cls)
+    # Referenced dataclasses are registered before their fields are
+    # decoded and initialised afterwards, so they can be in cycles
+    preallocate = isinstance(cls, type) and dataclasses.is_dataclass(cls)
+
+    def _decode(json: Mapping[str, Any], doc: Document) -> Any:
+        obj = None
+        if preallocate and doc.refs is not None and ID_KEY in json:
+            obj = cls.__new__(cls)
+            doc.refs[json[ID_KEY]] = obj
+        kwargs = {}
+        for k, v in json.items():
+            if k in doc.tags:
+                continue
             if camel_case_keys:
-                return cls(**{snake_case(k) if isinstance(k, str) else k: v
-                              for k, v in mapping.items()})
-            return cls(**mapping)
-        except (TypeError, ValueError) as e:
-            raise ValueError(f'Bad arguments for {type_name(cls)}: {e}') from e
+                try:
+                    k = keys[k]
+                except KeyError:
+                    if isinstance(k, str):
+                        k = snake_case(k)
+            kwargs[k] = _unjsonify(v, camel_case_keys, doc)
+        try:
+            if obj is None:
+                return cls(**kwargs)
+            obj.__init__(**kwargs)
+            return obj
+        except _BAD_ARGUMENTS as e:
+            raise ValueError(f'Bad arguments for {label}: {e}') from e
+
+    if preallocate:
+        _DATACLASS_FIELDS[_decode] = _field_maps(cls, {
+            f.name: camel_case(f.name) if camel_case_keys else f.name
+            for f in dataclasses.fields(cls) if f.init})
+    return _decode
+
+
+def _argument_names(cls: Any) -> List[str]:
+    if dataclasses.is_dataclass(cls):
+        return [f.name for f in dataclasses.fields(cls) if f.init]
+    try:
+        return list(inspect.signature(cls).parameters)
+    except (TypeError, ValueError):
+        return []
+
+
+register_type(date_time)
+register_type(datetime.date)
+register_type(datetime.time)
+register_type(float)
+register_type(byte_string)
+register_type(byte_view)
+register_type(nd_array)
+
+
+def decoded_fields(decoder: _Decoder
+                   ) -> Optional[Tuple[Type[Any], Dict[str, str]]]:
+    """
+    Get dataclass type and field keys a decoder builds objects from.
 
-    logger.warning('Unsupported type in unjsonify: %s (%r)',
-                   type_name(json), json)
-    return json
+    :param decoder: Decoder from `tagged_decoder`
+    :return: Dataclass type and mapping of field names to keys, or None
+             if the decoder does not build dataclasses field by field
+    """
+    try:
+        cls, fields, _ = _DATACLASS_FIELDS[decoder]
+    except KeyError:
+        return None
+    return cls, fields
 
 
 class ReplaceMixin:
@@ -413,18 +1922,38 @@ class ReplaceMixin:
         """
         Create new instance with replaced attribute values.
 
+        Unchanged attribute values are shared with the new instance,
+        not copied.
+
         :param kwargs: Replacement attribute values
         :return: New instance with replaced values
         """
-        new_kwargs = dataclasses.asdict(self)
+        cls = type(self)
+        new_kwargs = {f: getattr(self, f) for f in _init_fields(cls)
+                      if f not in kwargs}
         new_kwargs.update(kwargs)
-        return type(self)(**new_kwargs)
+        return cls(**new_kwargs)
+
+    def replace_many(self: T,
+                     *updates: Mapping[str, Any],
+                     **kwargs: Any) -> T:
+        """
+        Create new instance with several sets of replaced attribute values.
 
+        Updates are applied in order, followed by keyword arguments, and
+        only a single new instance is created.
 
-class ORJSONResponse(JSONResponse):
-    """JSON response using orjson and serialisation."""
+        :param updates: Replacement attribute value mappings
+        :param kwargs: Replacement attribute values
+        :return: New instance with replaced values
+        """
+        changes: Dict[str, Any] = {}
+        for update in updates:
+            changes.update(update)
+        changes.update(kwargs)
+        return self.replace(**changes)
 
-    media_type = 'application/json'
 
-    def render(self, content: Any) -> bytes:
-        return orjson.dumps(jsonify(content))
+@functools.lru_cache(maxsize=None)
+def _init_fields(cls: Type[Any]) -> Tuple[str, ...]:
+    return tuple(f.name for f in dataclasses.fields(cls) if f.init)
@@ -28,10 +28,12 @@ from enum import Enum
 import functools
 import logging
 import textwrap
-from typing import (Any, Dict, Iterable, Iterator, List, Optional,
-                    Tuple, Type, TypeVar)
+from typing import (Any, Dict, Iterable, Iterator, List, Mapping,
+                    Optional, Tuple, Type, TypeVar)
 
-from pygot import serialisation, utils
+import orjson
+
+from pygot import encoding, serialisation, utils
 
 logger = logging.getLogger(__name__)
 
@@ -263,6 +265,7 @@ class StaticData(_Registry, metaclass=Registry):
 
         # Register instance
         mcs.register(new)
+        serialisation.register_type(new)
         logger.info('%s registered with %s',
                     utils.type_name(new), utils.type_name(mcs))
 
@@ -294,6 +297,8 @@ class StaticData(_Registry, metaclass=Registry):
             existing = getattr(StaticData, mcs.__name__)
             raise StaticTypeConflict(mcs.__name__, existing)
         StaticData.register(mcs)
+        serialisation.register_type(mcs, functools.partial(_static_member,
+                                                           mcs))
         logger.info('%s registered with %s',
                     utils.type_name(mcs), utils.type_name(StaticData))
 
@@ -307,24 +312,113 @@ class StaticData(_Registry, metaclass=Registry):
         return f'{type(cls).__name__}({", ".join(args)})'
 
 
-@serialisation.jsonify.register
-def _jsonify_static_data(obj: StaticData,
-                         camel_case_keys: bool = True,
-                         arg_struct: bool = True) -> serialisation.JSONType:
-    d = {f: getattr(obj, f) for f in obj.__static_fields__}
+def _static_member(mcs: Type[StaticData],
+                   json: Mapping[str, Any]) -> StaticData:
+    # Decoding only looks up defined instances, so input cannot create new
+    # static data classes
+    name = json.get('name')
+    member = None
+    if isinstance(name, str):
+        member = mcs.__registry__.get(name.lower())
+    if member is None or member.__name__ != name:
+        raise ValueError(f'Unknown {utils.type_name(mcs)}: {name!r}')
+    return member
+
+
+@functools.lru_cache(maxsize=None)
+def _static_keys(obj: StaticData,
+                 camel_case_keys: bool) -> Tuple[Tuple[str, str], ...]:
+    attrs = sorted(obj.__static_fields__ - {'name'})
+    if camel_case_keys:
+        return tuple((a, serialisation.camel_case(a)) for a in attrs)
+    return tuple((a, a) for a in attrs)
+
+
+def _static_json(obj: StaticData,
+                 camel_case_keys: bool,
+                 arg_struct: bool) -> serialisation.JSON:
+    d = {k: serialisation.jsonify(getattr(obj, a),
+                                  camel_case_keys=camel_case_keys,
+                                  arg_struct=arg_struct)
+         for a, k in _static_keys(obj, camel_case_keys)}
     d['name'] = obj.__name__
-    d = serialisation.jsonify(d,
-                              camel_case_keys=camel_case_keys,
-                              arg_struct=arg_struct)
     if arg_struct:
         d[serialisation.MODULE_KEY] = type(obj).__module__
         d[serialisation.NAME_KEY] = type(obj).__name__
     return d
 
 
+# JSON-ified and encoded static data, and the encoder table they were
+# made with, per (instance, camel_case_keys, arg_struct)
+_STATIC_JSON: Dict[Tuple[StaticData, bool, bool],
+                   Tuple[Dict[Type[Any], Any], serialisation.JSON]] = {}
+_STATIC_BYTES: Dict[Tuple[StaticData, bool, bool],
+                    Tuple[Dict[Type[Any], Any], bytes]] = {}
+
+
+def _static_tree(obj: StaticData,
+                 camel_case_keys: bool,
+                 arg_struct: bool) -> serialisation.JSON:
+    # Static data is fixed, so it is JSON-ified once, and again only once
+    # `serialisation.invalidate_encoders` replaced the table
+    encoders = serialisation.encoder_table(camel_case_keys, arg_struct)
+    try:
+        table, json = _STATIC_JSON[obj, camel_case_keys, arg_struct]
+    except KeyError:
+        pass
+    else:
+        if table is encoders:
+            return json
+    json = _static_json(obj, camel_case_keys, arg_struct)
+    _STATIC_JSON[obj, camel_case_keys, arg_struct] = encoders, json
+    return json
+
+
+def _static_bytes(obj: StaticData,
+                  camel_case_keys: bool,
+                  arg_struct: bool) -> bytes:
+    encoders = serialisation.encoder_table(camel_case_keys, arg_struct)
+    try:
+        table, data = _STATIC_BYTES[obj, camel_case_keys, arg_struct]
+    except KeyError:
+        pass
+    else:
+        if table is encoders:
+            return data
+    data = orjson.dumps(_static_tree(obj, camel_case_keys, arg_struct))
+    _STATIC_BYTES[obj, camel_case_keys, arg_struct] = encoders, data
+    return data
+
+
+def _copied(json: Any) -> Any:
+    # Only containers are copied, other values are immutable or were
+    # passed through by `jsonify` as they are
+    if type(json) is dict:
+        return {k: _copied(v) for k, v in json.items()}
+    if type(json) is list:
+        return [_copied(v) for v in json]
+    return json
+
+
+@serialisation.jsonify.register
+def _jsonify_static_data(obj: StaticData,
+                         camel_case_keys: bool = True,
+                         arg_struct: bool = True) -> serialisation.JSONType:
+    # Copied, so callers modifying the result at any depth do not modify
+    # the cache
+    return _copied(_static_tree(obj, camel_case_keys, arg_struct))
+
+
+encoding.register_fragment(StaticData, _static_bytes)
+
+
 class _Enum(Enum):
     """Just a nicer enum, because we do not care about values."""
 
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        serialisation.register_type(cls)
+
     def __repr__(self):
         return str(self)
 
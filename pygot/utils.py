@@ -93,7 +93,7 @@ def optional_subtype(obj: Any) -> Any:
     if not is_optional(obj):
         raise ValueError('Not a typed typing.Optional')
     try:
-        return obj.__args__[0] or obj.__args__[1]
+        return next(a for a in obj.__args__ if a is not NoneType)
     except AttributeError as e:
         raise ValueError('Not a typed typing.Optional') from e
 
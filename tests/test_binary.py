@@ -0,0 +1,89 @@
+"""Compact binary format tests."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from pygot import binary, encoding
+from tests.test_encoding import _DUMPS_CASES
+from tests.test_serialisation import (_Dataclass, _MALFORMED_CASES,
+                                      _replace_nan)
+
+
+def _pack_json(json: Any) -> bytes:
+    # Pack "JSON-ified" data as is, to get payloads `pack` would not write
+    out = bytearray()
+    binary._pack(json, out, {})  # pylint: disable=protected-access
+    return bytes(out)
+
+
+@pytest.mark.parametrize('obj', [x[0] for x in _DUMPS_CASES.values()],
+                         ids=list(_DUMPS_CASES))
+def test_pack_round_trip(obj: Any) -> None:
+    val = binary.unpack(binary.pack(obj))
+    try:
+        assert val == obj
+    except AssertionError:
+        pass
+    else:
+        return
+    assert _replace_nan(val) == _replace_nan(obj)
+
+
+@pytest.mark.parametrize('obj', [
+    [0, 127, 128, 255, 256, 2 ** 16, 2 ** 32, 2 ** 64 - 1],
+    [-1, -32, -33, -128, -129, -2 ** 15 - 1, -2 ** 31 - 1, -2 ** 63],
+    ['', 'a' * 31, 'b' * 32, 'c' * 255, 'd' * 256, 'e' * 2 ** 16, 'ö€'],
+    [list(range(15)), list(range(16)), list(range(2 ** 16))],
+    {f'key_{i}': i for i in range(300)},
+], ids=['uint', 'int', 'str', 'list', 'map'])
+def test_pack_sizes(obj: Any) -> None:
+    assert binary.unpack(binary.pack(obj, camel_case_keys=False),
+                         camel_case_keys=False) == obj
+
+
+def test_pack_interns_strings() -> None:
+    obj = [_Dataclass(i, 'text', True) for i in range(100)]
+    packed = binary.pack(obj)
+
+    assert packed.count(_Dataclass.__module__.encode()) == 1
+    assert packed.count(b'aRandomVar') == 1
+    assert len(packed) < len(encoding.dumps(obj)) / 3
+    assert binary.unpack(packed) == obj
+
+
+@pytest.mark.parametrize('obj', [2 ** 64, -2 ** 63 - 1, {1, 2}])
+def test_pack_unsupported(obj: Any) -> None:
+    with pytest.raises(TypeError):
+        binary.pack(obj)
+
+
+def test_ndarray_unpack_shares_memory() -> None:
+    numpy = pytest.importorskip('numpy')
+    obj = numpy.linspace(0, 1, 1_000)
+    packed = binary.pack([obj])
+
+    assert len(packed) < obj.nbytes + 100
+    val, = binary.unpack(packed)
+    assert numpy.shares_memory(val, numpy.frombuffer(packed, numpy.uint8))
+
+
+@pytest.mark.parametrize('data', [b'', b'\x92\x01', b'\xd9\x05abc',
+                                  b'\x01\x02', b'\xc1', b'\xd4\x00',
+                                  b'\xc4\x05abc', b'\x81\x91\x01\x01',
+                                  b'\x81\x80\x01',
+                                  b'\x91' * 100_000 + b'\x01'])
+def test_unpack_invalid(data: bytes) -> None:
+    with pytest.raises(ValueError):
+        binary.unpack(data)
+
+
+@pytest.mark.parametrize('json', list(_MALFORMED_CASES.values()),
+                         ids=list(_MALFORMED_CASES))
+def test_unpack_malformed(json: Any) -> None:
+    data = _pack_json(json)
+
+    with pytest.raises(ValueError):
+        binary.unpack(data)
@@ -0,0 +1,69 @@
+"""Test HTTP response compression."""
+
+from __future__ import annotations
+
+import gzip
+from typing import Optional
+import zlib
+
+import pytest
+
+from pygot import compression
+
+
+@pytest.mark.parametrize('accept_encoding, expected', [
+    (None, None),
+    ('', None),
+    ('identity', None),
+    ('gzip', 'gzip'),
+    ('deflate', 'deflate'),
+    ('GZip', 'gzip'),
+    ('br, deflate', 'deflate'),
+    ('gzip, deflate', 'gzip'),
+    ('deflate, gzip', 'gzip'),
+    ('gzip;q=0.5, deflate', 'deflate'),
+    ('gzip;q=0, deflate;q=0', None),
+    ('gzip;q=abc, deflate;q=0.1', 'deflate'),
+    ('*', 'gzip'),
+    ('gzip;q=0, *', 'deflate'),
+    ('*;q=0', None),
+])
+def test_negotiate(accept_encoding: Optional[str],
+                   expected: Optional[str]) -> None:
+    assert compression.negotiate(accept_encoding) == expected
+
+
+@pytest.mark.parametrize('level', [0, 1, compression.DEFAULT_LEVEL, 9])
+def test_compress(level: int) -> None:
+    data = b'{"placements":[' + b'{"area":"area1","strength":5},' * 1000
+
+    gzipped = compression.compress(data, 'gzip', level)
+    deflated = compression.compress(data, 'deflate', level)
+
+    assert gzip.decompress(gzipped) == data
+    assert zlib.decompress(deflated) == data
+    if level:
+        assert len(gzipped) < len(data) / 10
+
+
+def test_compress_unknown() -> None:
+    with pytest.raises(ValueError):
+        compression.compress(b'data', 'br')
+
+
+def test_register_codec() -> None:
+    calls = []
+
+    def _codec(data: bytes, level: int) -> bytes:
+        calls.append(level)
+        return data[::-1]
+
+    try:
+        compression.register_codec('reverse', _codec)
+        assert compression.negotiate('reverse, gzip;q=0.9') == 'reverse'
+        assert compression.negotiate('reverse, gzip') == 'gzip'
+        assert compression.compress(b'abc', 'Reverse', 3) == b'cba'
+    finally:
+        del compression._CODECS['reverse']
+
+    assert calls == [3]
@@ -0,0 +1,191 @@
+"""JSON bytes encoding tests."""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import math
+from typing import Any, List
+
+import orjson
+import pytest
+import pytz
+
+from pygot import encoding, serialisation
+from tests.test_serialisation import (_CustomEnum, _DataDict, _Dataclass,
+                                      _Int, _Node, _Str, _TEST_CASES)
+
+
+_DUMPS_CASES = {k: v for k, v in _TEST_CASES.items()
+                if not k.startswith('unsupported-')}
+_DUMPS_CASES.update({
+    'str-subclass': [_Str('abc')],
+    'int-subclass': [_Int(123)],
+    'subclass-nested': [{'some_key': [_Str('a'), _Int(1)],
+                         'str_key': {'other_key': _Str('b')}}],
+})
+
+
+@pytest.mark.parametrize('camel_case_keys', [True, False])
+@pytest.mark.parametrize('arg_struct', [True, False])
+@pytest.mark.parametrize('obj', [x[0] for x in _DUMPS_CASES.values()],
+                         ids=list(_DUMPS_CASES))
+def test_dumps(obj: Any, camel_case_keys: bool, arg_struct: bool) -> None:
+    expected = orjson.dumps(serialisation.jsonify(
+        obj, camel_case_keys=camel_case_keys, arg_struct=arg_struct))
+
+    assert encoding.dumps(obj,
+                          camel_case_keys=camel_case_keys,
+                          arg_struct=arg_struct) == expected
+
+
+@pytest.mark.parametrize('camel_case_keys', [True, False])
+@pytest.mark.parametrize('canonical', [True, False])
+def test_dumps_subclass_keys(camel_case_keys: bool, canonical: bool) -> None:
+    obj = {_Str('str_key'): _Int(1)}
+    key = 'strKey' if camel_case_keys else 'str_key'
+
+    assert encoding.dumps(obj, camel_case_keys=camel_case_keys,
+                          canonical=canonical) == orjson.dumps({key: 1})
+
+
+def test_dumps_nested() -> None:
+    obj = {'some_items': [_DataDict(dict={'a_int': 1, 'b_float': math.inf},
+                                    data=_Dataclass(1, 'str', False)),
+                          (_CustomEnum.UTC_PLUS_10, -math.inf)],
+           'a_date': datetime.date(2020, 4, 29)}
+
+    assert encoding.dumps(obj) == orjson.dumps(serialisation.jsonify(obj))
+
+
+def test_dumps_invalidated() -> None:
+    obj = _Dataclass(1, 'str', False)
+    encoding.dumps(obj)
+    serialisation.invalidate_encoders()
+
+    assert encoding.dumps(obj) == orjson.dumps(serialisation.jsonify(obj))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 16, 64 * 1024])
+@pytest.mark.parametrize('obj', [x[0] for x in _DUMPS_CASES.values()],
+                         ids=list(_DUMPS_CASES))
+def test_iter_jsonify_bytes(obj: Any, chunk_size: int) -> None:
+    chunks = list(encoding.iter_jsonify_bytes(obj, chunk_size=chunk_size))
+
+    assert b''.join(chunks) == encoding.dumps(obj)
+
+
+@pytest.mark.parametrize('camel_case_keys', [True, False])
+@pytest.mark.parametrize('arg_struct', [True, False])
+def test_iter_jsonify_bytes_chunks(camel_case_keys: bool,
+                                   arg_struct: bool) -> None:
+    obj = {'some_items': [_DataDict(dict={'a_int': i, 'b_float': math.inf},
+                                    data=_Dataclass(i, 'str', False))
+                          for i in range(100)],
+           'empty': [[], {}, ()],
+           'enum': _CustomEnum.UTC_PLUS_10}
+
+    chunks = list(encoding.iter_jsonify_bytes(
+        obj, camel_case_keys=camel_case_keys, arg_struct=arg_struct,
+        chunk_size=256))
+
+    assert len(chunks) > 1
+    assert all(len(c) < 512 for c in chunks)
+    assert b''.join(chunks) == encoding.dumps(
+        obj, camel_case_keys=camel_case_keys, arg_struct=arg_struct)
+
+
+def test_register_fragment() -> None:
+    calls = []
+
+    def _fragment(obj: _Dataclass, camel_case_keys: bool,
+                  arg_struct: bool) -> bytes:
+        calls.append((obj, camel_case_keys, arg_struct))
+        return orjson.dumps(serialisation.jsonify(
+            obj, camel_case_keys=camel_case_keys, arg_struct=arg_struct))
+
+    obj = [_Dataclass(1, 'str', True), {'nested_data': _Dataclass(2, 's', 0)}]
+    try:
+        encoding.register_fragment(_Dataclass, _fragment)
+        chunks = list(encoding.iter_jsonify_bytes(obj, arg_struct=False))
+    finally:
+        encoding._FRAGMENTS.pop(_Dataclass)
+        serialisation.invalidate_encoders()
+
+    assert calls == [(obj[0], True, False),
+                     (obj[1]['nested_data'], True, False)]
+    assert b''.join(chunks) == encoding.dumps(obj, arg_struct=False)
+
+
+@pytest.mark.parametrize('obj', [x[0] for x in _DUMPS_CASES.values()],
+                         ids=list(_DUMPS_CASES))
+@pytest.mark.parametrize('arg_struct', [True, False])
+def test_dumps_canonical(obj: Any, arg_struct: bool) -> None:
+    # Canonical encoding also writes negative zero as zero
+    expected = orjson.dumps(serialisation.jsonify(obj, arg_struct=arg_struct),
+                            option=orjson.OPT_SORT_KEYS).replace(b'-0.0',
+                                                                 b'0.0')
+
+    assert encoding.dumps(obj, arg_struct=arg_struct,
+                          canonical=True) == expected
+    assert b''.join(encoding.iter_jsonify_bytes(
+        obj, arg_struct=arg_struct, canonical=True)) == expected
+
+
+def test_dumps_canonical_order_and_zero() -> None:
+    one = {'b_key': [-0.0, 1.5], 'a_key': _DataDict({'y': 1, 'x': 2},
+                                                    _Dataclass(1, 'a', True))}
+    two = {'a_key': _DataDict({'x': 2, 'y': 1}, _Dataclass(1, 'a', True)),
+           'b_key': [0.0, 1.5]}
+
+    assert encoding.dumps(one) != encoding.dumps(two)
+    assert encoding.dumps(one, canonical=True) == \
+        encoding.dumps(two, canonical=True)
+    assert b''.join(encoding.iter_jsonify_bytes(one, canonical=True)) \
+        == encoding.dumps(two, canonical=True)
+    assert encoding.state_digest(one) == encoding.state_digest(two)
+
+
+def test_state_digest() -> None:
+    obj = {'nodes': [_Node(i, []) for i in range(100)],
+           'at': datetime.datetime(2020, 4, 29, 14, 15, 16, 789, pytz.utc)}
+    digest = encoding.state_digest(obj)
+
+    assert digest == hashlib.blake2b(encoding.dumps(obj, canonical=True),
+                                     digest_size=16).hexdigest()
+    assert len(encoding.state_digest(obj, digest_size=32)) == 64
+    obj['nodes'][50].value = -1
+    assert encoding.state_digest(obj) != digest
+
+
+def test_state_digest_projection() -> None:
+    projection = serialisation.Projection('*.text')
+    one = [_Dataclass(1, 'a', True), _Dataclass(2, 'b', False)]
+    two = [_Dataclass(3, 'a', False), _Dataclass(4, 'b', True)]
+
+    assert encoding.state_digest(one, projection=projection) == \
+        encoding.state_digest(two, projection=projection)
+    assert encoding.state_digest(one) != encoding.state_digest(two)
+
+
+@pytest.mark.parametrize('obj, expected', [
+    (1, 1),
+    ('a' * 63, 1),
+    ('a' * 128, 3),
+    (b'a' * 64, 2),
+    (memoryview(b'a' * 64), 2),
+    ([1, [2, 3], ()], 6),
+    ({'a': 1, 'b': {2, 3}}, 5),
+    (_Dataclass(1, 'a', True), 4),
+    ([_Node(1, [_Node(2, [])])], 9),
+])
+def test_count_nodes(obj: Any, expected: int) -> None:
+    assert encoding.count_nodes(obj) == expected
+
+
+def test_count_nodes_limit() -> None:
+    obj: List[Any] = [1, 2]
+    obj.append(obj)
+
+    assert encoding.count_nodes([1, 2, 3], limit=10) == 4
+    assert encoding.count_nodes(obj, limit=10) == 10
@@ -0,0 +1,150 @@
+"""Test JSON Lines streams."""
+
+from __future__ import annotations
+
+import io
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+
+from pygot import jsonlines, static
+
+RECORDS: List[Any] = [
+    {'order': 1, 'house': static.House.STARK},
+    [1, 'two', None],
+    'line\nbreak',
+    {'nested': {'unit': static.Unit.FOOTMAN(state=static.UnitState.READY)}},
+    3.5,
+]
+
+
+def _written(records: List[Any], **kwargs: Any) -> io.BytesIO:
+    file = io.BytesIO()
+    with jsonlines.JSONLinesWriter(file, **kwargs) as writer:
+        writer.write_many(records)
+    file.seek(0)
+    return file
+
+
+def test_round_trip() -> None:
+    file = _written(RECORDS)
+
+    assert file.getvalue().count(b'\n') == len(RECORDS)
+    assert list(jsonlines.JSONLinesReader(file)) == RECORDS
+
+
+def test_round_trip_snake_case() -> None:
+    file = _written([{'follow_ups': []}], camel_case_keys=False)
+
+    assert b'follow_ups' in file.getvalue()
+    assert list(jsonlines.JSONLinesReader(
+        file, camel_case_keys=False)) == [{'follow_ups': []}]
+
+
+def test_writer_batches() -> None:
+    file = io.BytesIO()
+    writer = jsonlines.JSONLinesWriter(file, buffer_size=32)
+
+    writer.write(1)
+    assert file.getvalue() == b''
+    writer.write('x' * 40)
+    assert file.getvalue().count(b'\n') == 2
+    writer.write(2)
+    assert file.getvalue().count(b'\n') == 2
+    writer.flush()
+    assert file.getvalue().count(b'\n') == 3
+
+
+def test_writer_close(tmp_path: Path) -> None:
+    path = tmp_path / 'events.jsonl'
+    writer = jsonlines.JSONLinesWriter(path.open('wb'))
+    writer.write_many(RECORDS)
+    writer.close()
+
+    with path.open('rb') as file:
+        assert list(jsonlines.JSONLinesReader(file)) == RECORDS
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 16, 64 * 1024])
+def test_reader_chunks(chunk_size: int) -> None:
+    file = _written(RECORDS)
+
+    reader = jsonlines.JSONLinesReader(file, chunk_size=chunk_size)
+
+    assert list(reader) == RECORDS
+
+
+def test_reader_lazy() -> None:
+    file = io.BytesIO(b'1\n2\n{broken\n')
+
+    records = iter(jsonlines.JSONLinesReader(file))
+
+    assert next(records) == 1
+    assert next(records) == 2
+    with pytest.raises(ValueError):
+        next(records)
+
+
+def test_reader_skips() -> None:
+    file = io.BytesIO(b'\n1\n\n2\n{"partial')
+
+    assert list(jsonlines.JSONLinesReader(file)) == [1, 2]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 16, 64 * 1024])
+@pytest.mark.parametrize('n', [0, 1, 2, len(RECORDS), len(RECORDS) + 1])
+def test_tail(chunk_size: int, n: int) -> None:
+    file = _written(RECORDS)
+
+    reader = jsonlines.JSONLinesReader(file, chunk_size=chunk_size)
+
+    assert reader.tail(n) == RECORDS[max(len(RECORDS) - n, 0):]
+    assert file.tell() == len(file.getvalue())
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 64 * 1024])
+@pytest.mark.parametrize('data, n, expected', [
+    (b'', 2, []),
+    (b'1', 2, []),
+    (b'1\n', 2, [b'1']),
+    (b'1\n2', 2, [b'1']),
+    (b'1\n\n2\n\n', 2, [b'1', b'2']),
+    (b'1\n2\n3\n{"partial', 2, [b'2', b'3']),
+])
+def test_tail_lines(chunk_size: int, data: bytes, n: int,
+                    expected: List[bytes]) -> None:
+    reader = jsonlines.JSONLinesReader(io.BytesIO(data),
+                                       chunk_size=chunk_size)
+
+    assert reader.tail_lines(n) == expected
+
+
+def test_tail_reads_backwards() -> None:
+    file = _written(list(range(10_000)))
+    reads = []
+    read = file.read
+
+    def _read(size: int = -1) -> bytes:
+        reads.append(size)
+        return read(size)
+
+    file.read = _read  # type: ignore
+    reader = jsonlines.JSONLinesReader(file, chunk_size=64)
+
+    assert reader.tail(3) == [9_997, 9_998, 9_999]
+    assert sum(reads) <= 64
+
+
+def test_follow() -> None:
+    file = io.BytesIO()
+    writer = jsonlines.JSONLinesWriter(file, buffer_size=0)
+    reader = jsonlines.JSONLinesReader(file)
+
+    writer.write_many(RECORDS[:2])
+    assert reader.tail(1) == RECORDS[1:2]
+    writer.write_many(RECORDS[2:])
+    file.seek(-sum(len(line) + 1
+                   for line in file.getvalue().splitlines()[2:]),
+              io.SEEK_END)
+    assert list(reader) == RECORDS[2:]
@@ -0,0 +1,71 @@
+"""Lazy "un-JSON-ification" tests."""
+
+from __future__ import annotations
+
+from typing import Any
+from unittest import mock
+
+import pytest
+
+from pygot import lazy, serialisation
+from tests.test_serialisation import (_CustomEnum, _DataDict, _Dataclass,
+                                      _replace_nan, _TEST_CASES)
+
+
+@pytest.mark.parametrize('obj', [
+    v[0] for k, v in _TEST_CASES.items() if not k.startswith('unsupported-')
+])
+@pytest.mark.parametrize('intern_types', [False, True])
+def test_unjsonify_lazy_round_trip(obj: Any, intern_types: bool) -> None:
+    json = serialisation.jsonify(obj, intern_types=intern_types)
+    val = lazy.unjsonify(json)
+
+    assert (_replace_nan(lazy.materialise(val))
+            == _replace_nan(serialisation.unjsonify(json)))
+
+
+def test_unjsonify_lazy() -> None:
+    obj = {'some_items': [_DataDict({'a': 1}, _Dataclass(1, 'a', True)),
+                          _CustomEnum.UTC_PLUS_10]}
+    json = serialisation.jsonify(obj)
+
+    with mock.patch('pygot.serialisation._unjsonify',
+                    wraps=serialisation._unjsonify) as _unjsonify:
+        val = lazy.unjsonify(json)
+        items = val['some_items']
+        assert isinstance(items, lazy.Lazy)
+        assert len(items) == 2
+        assert items[0].dict['a'] == 1
+        assert list(items[0].dict) == ['a']
+        _unjsonify.assert_called_once_with(1, True, mock.ANY)
+
+    assert items[0].data.text == 'a'
+    assert items[0].data is items[0].data
+    assert items[-1] is _CustomEnum.UTC_PLUS_10
+    assert items[:1] == [obj['some_items'][0]]
+    assert val == obj
+    assert lazy.materialise(items[0]) == obj['some_items'][0]
+    assert lazy.materialise(1) == 1
+
+
+def test_unjsonify_lazy_fallback() -> None:
+    json = serialisation.jsonify(_Dataclass(1, 'a', True))
+    del json['text']
+    val = lazy.unjsonify(json)
+
+    assert val.number == 1
+    with pytest.raises(ValueError):
+        _ = val.text
+    with pytest.raises(AttributeError):
+        _ = lazy.unjsonify(serialisation.jsonify(
+            _Dataclass(1, 'a', True))).missing
+
+
+def test_unjsonify_lazy_references_raises() -> None:
+    shared = _Dataclass(1, 'a', True)
+    json = serialisation.jsonify([shared, shared], references=True)
+    val = lazy.unjsonify(json)
+
+    assert val[0].number == 1
+    with pytest.raises(ValueError):
+        _ = val[1]
@@ -0,0 +1,104 @@
+"""Serialised object diff and patch tests."""
+
+from __future__ import annotations
+
+import datetime
+import math
+from typing import Any
+from unittest import mock
+
+import orjson
+import pytest
+import pytz
+
+from pygot import patch, serialisation
+from tests.test_serialisation import (_CustomEnum, _DataDict, _Dataclass,
+                                      _replace_nan)
+
+
+_DIFF_CASES = [
+    (1, 2),
+    (1, 1.5),
+    (math.nan, math.nan),
+    ('a', None),
+    ([1, 2, 3], [1, 5]),
+    ([1], [1, [2, 3], {'a': 4}]),
+    ({'a_b': 1, 'c_d': 2}, {'a_b': 1, 'e': {'f': 3}}),
+    ({1: 'a'}, {1: 'b'}),
+    (_Dataclass(1, 'a', True), _Dataclass(1, 'b', True)),
+    (_DataDict({'a': 1}, _Dataclass(1, 'a', True)),
+     _DataDict({'a': 2, 'b': 3}, _Dataclass(1, 'a', False))),
+    (_Dataclass(1, 'a', True), _DataDict({}, _Dataclass(1, 'a', True))),
+    (_CustomEnum.UTC_PLUS_10, _CustomEnum.UTC_MINUS_10),
+    (datetime.date(2020, 1, 1), datetime.date(2020, 1, 2)),
+    ([datetime.datetime(2020, 1, 1, tzinfo=pytz.utc)],
+     [datetime.datetime(2020, 1, 1, 12, tzinfo=pytz.utc)]),
+]
+
+
+@pytest.mark.parametrize('old, new', _DIFF_CASES)
+@pytest.mark.parametrize('camel_case_keys', [True, False])
+def test_diff_patch(old: Any, new: Any, camel_case_keys: bool) -> None:
+    old_json = serialisation.jsonify(old, camel_case_keys=camel_case_keys)
+    new_json = serialisation.jsonify(new, camel_case_keys=camel_case_keys)
+    snapshot = orjson.dumps(old_json, option=orjson.OPT_NON_STR_KEYS)
+
+    ops = patch.diff(old, new, camel_case_keys=camel_case_keys)
+    patched = patch.patch(old_json, ops)
+
+    assert _replace_nan(patched) == _replace_nan(new_json)
+    assert orjson.dumps(old_json, option=orjson.OPT_NON_STR_KEYS) == snapshot
+    patched = patch.patch(old_json, patch.diff_json(old_json, new_json))
+    assert _replace_nan(patched) == _replace_nan(new_json)
+
+
+def test_diff_skips_shared() -> None:
+    shared = [_Dataclass(i, str(i), True) for i in range(10)]
+    old = _DataDict({'a': 1}, shared)
+    new = _DataDict({'a': 1}, shared)
+
+    with mock.patch.object(serialisation, 'jsonify') as jsonify:
+        assert patch.diff(old, new) == []
+    jsonify.assert_not_called()
+
+
+def test_diff_minimal() -> None:
+    old = [_Dataclass(i, str(i), True) for i in range(3)]
+    new = old[:2] + [_Dataclass(2, '2', False)]
+
+    assert patch.diff(old, new) == [
+        {'op': 'replace', 'path': '/2/aRandomVar', 'value': False},
+    ]
+
+
+@pytest.mark.parametrize('json, ops, expected', [
+    ({'a': [1, 2]}, [{'op': 'add', 'path': '/a/0', 'value': 0}],
+     {'a': [0, 1, 2]}),
+    ({'a': [1, 2]}, [{'op': 'add', 'path': '/a/2', 'value': 3}],
+     {'a': [1, 2, 3]}),
+    ({'a': [1, 2]}, [{'op': 'remove', 'path': '/a'}], {}),
+    ({'a': 1}, [{'op': 'replace', 'path': '', 'value': [1]}], [1]),
+    ({'a/b': {'~': 1}},
+     [{'op': 'replace', 'path': '/a~1b/~0', 'value': 2}],
+     {'a/b': {'~': 2}}),
+])
+def test_patch(json: Any, ops: Any, expected: Any) -> None:
+    assert patch.patch(json, ops) == expected
+
+
+@pytest.mark.parametrize('ops', [
+    [{'op': 'move', 'path': '/a', 'from': '/b'}],
+    [{'op': 'replace', 'path': 'a', 'value': 1}],
+    [{'op': 'replace', 'path': '/b', 'value': 1}],
+    [{'op': 'remove', 'path': '/b'}],
+    [{'op': 'remove', 'path': ''}],
+    [{'op': 'replace', 'path': '/a/2', 'value': 1}],
+    [{'op': 'replace', 'path': '/a/01', 'value': 1}],
+    [{'op': 'add', 'path': '/a/3', 'value': 1}],
+    [{'op': 'add', 'path': '/a/0/b', 'value': 1}],
+    [{'op': 'add', 'path': '/a'}],
+    [{'path': '/a'}],
+])
+def test_patch_raises(ops: Any) -> None:
+    with pytest.raises(ValueError):
+        patch.patch({'a': [1, 2]}, ops)
@@ -0,0 +1,319 @@
+"""Serialised response tests."""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import datetime
+from typing import Any, Dict, List, Optional, Tuple, Type
+from unittest import mock
+import zlib
+
+import orjson
+import pytest
+from starlette.requests import Request
+
+from pygot import binary, encoding, responses, serialisation
+from tests.test_binary import _pack_json
+from tests.test_serialisation import (_Dataclass, _Int, _MALFORMED_CASES,
+                                      _Str)
+
+
+@mock.patch('pygot.encoding.dumps', return_value=b'123')
+def test_orjson_response(encoding_dumps: mock.MagicMock) -> None:
+    response = responses.ORJSONResponse(321)
+
+    assert encoding_dumps.call_count == 1
+    assert encoding_dumps.call_args == ((321,), {})
+    assert response.body == b'123'
+
+
+@pytest.mark.parametrize('obj', [_Str('abc'), _Int(123)])
+def test_orjson_response_subclass(obj: Any) -> None:
+    response = responses.ORJSONResponse(obj)
+
+    assert orjson.loads(response.body) == obj
+
+
+def test_orjson_response_projection() -> None:
+    obj = [_Dataclass(1, 'a', True), _Dataclass(2, 'b', False)]
+    projection = serialisation.Projection('*.text')
+    response = responses.ORJSONResponse(obj, projection=projection)
+
+    assert response.body == encoding.dumps(obj, projection=projection)
+    assert orjson.loads(response.body) == serialisation.jsonify(
+        obj, projection=projection)
+    assert 'number' not in orjson.loads(response.body)[0]
+
+
+def test_orjson_streaming_response() -> None:
+    obj = [_Dataclass(i, 'str', True) for i in range(100)]
+    response = responses.ORJSONStreamingResponse(obj, chunk_size=128)
+
+    async def _collect() -> List[bytes]:
+        return [chunk async for chunk in response.body_iterator]
+
+    chunks = asyncio.run(_collect())
+
+    assert response.media_type == 'application/json'
+    assert len(chunks) > 1
+    assert b''.join(chunks) == encoding.dumps(obj)
+
+
+def _request(headers: Dict[str, str], body: bytes = b'') -> Request:
+    async def _receive() -> Dict[str, Any]:
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    return Request({'type': 'http',
+                    'method': 'POST',
+                    'headers': [(k.lower().encode(), v.encode())
+                                for k, v in headers.items()]},
+                   _receive)
+
+
+def _response(**attrs: Any) -> Type[responses.ORJSONResponse]:
+    return type('_Response', (responses.ORJSONResponse,), attrs)
+
+
+def test_orjson_response_etag() -> None:
+    obj = [_Dataclass(1, 'a', True)]
+    response = responses.ORJSONResponse(obj, etag=True)
+    etag = f'W/"{encoding.state_digest(obj)}"'
+
+    assert response.status_code == 200
+    assert response.headers['etag'] == etag
+    assert response.body == encoding.dumps(obj, canonical=True)
+
+
+@pytest.mark.parametrize('if_none_match, status_code', [
+    (None, 200),
+    ('"other"', 200),
+    ('{etag}', 304),
+    ('{opaque}', 304),
+    ('"other", {etag}', 304),
+    ('*', 304),
+])
+def test_orjson_response_if_none_match(if_none_match: Optional[str],
+                                       status_code: int) -> None:
+    obj = {'data': _Dataclass(1, 'a', True)}
+    etag = f'W/"{encoding.state_digest(obj)}"'
+    headers = {}
+    if if_none_match is not None:
+        headers['If-None-Match'] = if_none_match.format(etag=etag,
+                                                        opaque=etag[2:])
+
+    with mock.patch.object(encoding, 'dumps',
+                           wraps=encoding.dumps) as dumps:
+        response = responses.ORJSONResponse(obj, etag=True,
+                                            request=_request(headers))
+
+    assert response.status_code == status_code
+    assert response.headers['etag'] == etag
+    assert dumps.call_count == 1
+    if status_code == 304:
+        assert response.body == b''
+    else:
+        assert response.body == encoding.dumps(obj, canonical=True)
+
+
+@pytest.mark.parametrize('accept_encoding, content_encoding', [
+    (None, None),
+    ('identity', None),
+    ('gzip', 'gzip'),
+    ('deflate, gzip;q=0.5', 'deflate'),
+])
+def test_orjson_response_compression(accept_encoding: Optional[str],
+                                     content_encoding: Optional[str]) -> None:
+    obj = [_Dataclass(i, 'text', True) for i in range(100)]
+    headers = {}
+    if accept_encoding is not None:
+        headers['Accept-Encoding'] = accept_encoding
+    response = _response(compression_level=1)(obj,
+                                              request=_request(headers))
+
+    assert response.headers.get('content-encoding') == content_encoding
+    assert response.headers['vary'] == 'Accept-Encoding'
+    assert response.headers['content-length'] == str(len(response.body))
+    if content_encoding is None:
+        assert response.body == encoding.dumps(obj)
+    else:
+        assert zlib.decompress(response.body, 47) == encoding.dumps(obj)
+        assert len(response.body) < len(encoding.dumps(obj)) / 5
+
+
+def test_orjson_response_compression_threshold() -> None:
+    obj = [_Dataclass(1, 'text', True)]
+    body = encoding.dumps(obj)
+    request = _request({'Accept-Encoding': 'gzip'})
+
+    small = _response(compression_threshold=len(body) + 1)(obj,
+                                                           request=request)
+    large = _response(compression_threshold=len(body))(obj, request=request)
+
+    assert 'content-encoding' not in small.headers
+    assert small.body == body
+    assert large.headers['content-encoding'] == 'gzip'
+
+
+def test_orjson_response_not_modified_uncompressed() -> None:
+    obj = [_Dataclass(i, 'text', True) for i in range(100)]
+    etag = f'W/"{encoding.state_digest(obj)}"'
+    request = _request({'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+
+    response = _response(compression_threshold=0)(obj, etag=True,
+                                                  request=request)
+
+    assert response.status_code == 304
+    assert response.body == b''
+    assert 'content-encoding' not in response.headers
+
+
+def _send(response: responses.ORJSONResponse
+          ) -> Tuple[int, Dict[str, str], bytes]:
+    messages = []
+
+    async def _receive() -> Dict[str, Any]:
+        return {'type': 'http.disconnect'}
+
+    async def _collect(message: Dict[str, Any]) -> None:
+        messages.append(message)
+
+    asyncio.run(response({'type': 'http'}, _receive, _collect))
+    start, body = messages
+    headers = {k.decode(): v.decode() for k, v in start['headers']}
+    return start['status'], headers, body['body']
+
+
+@pytest.mark.parametrize('offload_threshold, deferred', [
+    (None, False), (1_000, False), (100, True), (1, True),
+])
+def test_orjson_response_offload(offload_threshold: Optional[int],
+                                 deferred: bool) -> None:
+    obj = [_Dataclass(i, 'text', True) for i in range(50)]
+
+    response = _response(offload_threshold=offload_threshold)(obj)
+
+    assert (response.deferred is not None) == deferred
+    assert (response.body == b'') == deferred
+    status, headers, body = _send(response)
+    assert status == 200
+    assert body == response.body == encoding.dumps(obj)
+    assert headers['content-length'] == str(len(body))
+
+
+def test_orjson_response_offload_not_serialised() -> None:
+    obj = [_Dataclass(i, 'text', True) for i in range(50)]
+
+    with mock.patch.object(encoding, 'dumps', wraps=encoding.dumps) as dumps:
+        response = _response(offload_threshold=1)(obj)
+        assert dumps.call_count == 0
+        _send(response)
+        assert dumps.call_count == 1
+
+
+@pytest.mark.parametrize('executor_cls',
+                         [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_orjson_response_offload_executor(executor_cls: Any) -> None:
+    obj = {'numbers': list(range(1_000)), 'at': datetime.date(2020, 1, 1)}
+
+    with executor_cls(max_workers=1) as executor:
+        response = _response(offload_threshold=1, executor=executor)(obj)
+        _, _, body = _send(response)
+
+    assert body == encoding.dumps(obj)
+
+
+@pytest.mark.parametrize('matches', [True, False])
+def test_orjson_response_offload_etag(matches: bool) -> None:
+    obj = [_Dataclass(i, 'text', True) for i in range(100)]
+    etag = f'W/"{encoding.state_digest(obj)}"'
+    headers = {'Accept-Encoding': 'gzip'}
+    if matches:
+        headers['If-None-Match'] = etag
+
+    response = _response(offload_threshold=1)(obj, etag=True,
+                                              request=_request(headers))
+    assert 'etag' not in response.headers
+    status, headers, body = _send(response)
+
+    assert headers['etag'] == etag
+    assert headers['vary'] == 'Accept-Encoding'
+    if matches:
+        assert status == 304
+        assert body == b''
+        assert 'content-length' not in headers
+        assert 'content-encoding' not in headers
+    else:
+        assert status == 200
+        assert headers['content-encoding'] == 'gzip'
+        assert headers['content-length'] == str(len(body))
+        assert zlib.decompress(body, 47) == encoding.dumps(obj,
+                                                           canonical=True)
+
+
+def test_orjson_response_offload_uncompressed() -> None:
+    obj = [_Dataclass(1, 'text', True)]
+    request = _request({'Accept-Encoding': 'gzip'})
+
+    response = _response(offload_threshold=1)(obj, request=request)
+    _, headers, body = _send(response)
+
+    assert 'content-encoding' not in headers
+    assert body == encoding.dumps(obj)
+
+
+@pytest.mark.parametrize('accept, expected', [
+    ('', False),
+    ('*/*', False),
+    ('application/json', False),
+    ('application/x-pygot', True),
+    ('application/json, application/x-pygot', False),
+    ('application/json;q=0.5, application/x-pygot', True),
+    ('application/*;q=0.9, application/x-pygot', True),
+    ('application/x-pygot;q=0.1, */*;q=0.2', False),
+])
+def test_accepts_binary(accept: str, expected: bool) -> None:
+    request = _request({'Accept': accept})
+
+    assert responses.accepts_binary(request) is expected
+
+
+def test_negotiated_response() -> None:
+    obj = [_Dataclass(1, 'text', True)]
+
+    json = responses.negotiated_response(
+        _request({'Accept': 'application/json'}), obj)
+    packed = responses.negotiated_response(
+        _request({'Accept': 'application/x-pygot'}), obj)
+
+    assert isinstance(json, responses.ORJSONResponse)
+    assert json.body == encoding.dumps(obj)
+    assert isinstance(packed, responses.PackedResponse)
+    assert packed.media_type == responses.BINARY_MEDIA_TYPE
+    assert packed.body == binary.pack(obj)
+
+
+@pytest.mark.parametrize('content_type, encode', [
+    ('application/json', encoding.dumps),
+    ('application/json; charset=utf-8', encoding.dumps),
+    ('application/x-pygot', binary.pack),
+])
+def test_read_body(content_type: str, encode: Any) -> None:
+    obj = [_Dataclass(1, 'text', True), {'a_date': datetime.date(2020, 1, 1)}]
+    request = _request({'Content-Type': content_type}, encode(obj))
+
+    assert asyncio.run(responses.read_body(request)) == obj
+
+
+@pytest.mark.parametrize('content_type, encode', [
+    ('application/json', orjson.dumps),
+    ('application/x-pygot', _pack_json),
+])
+@pytest.mark.parametrize('json', list(_MALFORMED_CASES.values()),
+                         ids=list(_MALFORMED_CASES))
+def test_read_body_malformed(content_type: str, encode: Any,
+                             json: Any) -> None:
+    request = _request({'Content-Type': content_type}, encode(json))
+
+    with pytest.raises(ValueError):
+        asyncio.run(responses.read_body(request))
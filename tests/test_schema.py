@@ -0,0 +1,145 @@
+"""Test schema-driven serialisation."""
+
+from __future__ import annotations
+
+import dataclasses
+import datetime
+from enum import Enum
+import math
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import orjson
+import pytest
+import pytz
+
+from pygot import schema, serialisation, static
+
+
+@serialisation.register_type
+class _Colour(Enum):
+    """Test enum."""
+
+    RED = 'red'
+    BLUE = 'blue'
+
+
+@serialisation.register_type
+@dataclasses.dataclass
+class _Leaf:
+    """Test dataclass."""
+
+    number: int
+    ratio: float
+    colour: _Colour
+
+
+@serialisation.register_type
+@dataclasses.dataclass
+class _SubLeaf(_Leaf):
+    """Test dataclass subclass."""
+
+    extra: str = 'extra'
+
+
+@dataclasses.dataclass
+class _Tree:
+    """Test dataclass with most supported annotations."""
+
+    some_name: str
+    leaf: _Leaf
+    leaves: List[_Leaf]
+    by_name: Dict[str, _Leaf]
+    by_colour: Mapping[_Colour, int]
+    by_number: Dict[int, Optional[str]]
+    numbers: Tuple[int, ...]
+    more_numbers: Sequence[float]
+    created: datetime.datetime
+    day: datetime.date
+    time: datetime.time
+    anything: Any
+    children: List[_Tree] = dataclasses.field(default_factory=list)
+    maybe: Optional[_Leaf] = None
+    count: int = dataclasses.field(default=0, init=False)
+
+
+def _tree() -> _Tree:
+    return _Tree(
+        some_name='root',
+        leaf=_Leaf(1, 1.5, _Colour.RED),
+        leaves=[_Leaf(2, math.inf, _Colour.BLUE),
+                _SubLeaf(3, -math.inf, _Colour.RED)],
+        by_name={'some_leaf': _Leaf(4, 0.0, _Colour.BLUE)},
+        by_colour={_Colour.RED: 1, _Colour.BLUE: 2},
+        by_number={1: 'a', 2: None},
+        numbers=(1, 2, 3),
+        more_numbers=[1.0, 2.5],
+        created=pytz.timezone('Europe/London').localize(
+            datetime.datetime(2020, 6, 1, 12, 30, 15, 123)),
+        day=datetime.date(2020, 6, 1),
+        time=datetime.time(12, 30),
+        anything=static.Knight(state=static.UnitState.READY),
+        children=[_Tree(
+            some_name='child',
+            leaf=_Leaf(5, 2.0, _Colour.RED),
+            leaves=[],
+            by_name={},
+            by_colour={},
+            by_number={},
+            numbers=(),
+            more_numbers=[],
+            created=datetime.datetime(2020, 1, 1),
+            day=datetime.date(2020, 1, 1),
+            time=datetime.time(1, 2, 3, 4),
+            anything=[1, {'a': static.House.Stark}],
+            maybe=_Leaf(6, 3.0, _Colour.BLUE),
+        )],
+    )
+
+
+@pytest.mark.parametrize('camel_case_keys', [True, False])
+def test_schema_round_trip(camel_case_keys: bool) -> None:
+    tree = _tree()
+    codec = schema.Schema(_Tree, camel_case_keys=camel_case_keys)
+
+    json = orjson.loads(orjson.dumps(codec.jsonify(tree)))
+    val = codec.unjsonify(json)
+
+    assert val == tree
+    assert type(val.leaves[1]) is _SubLeaf
+    assert isinstance(val.numbers, tuple)
+
+
+def test_schema_untagged() -> None:
+    codec = schema.Schema(_Leaf)
+
+    assert codec.jsonify(_Leaf(1, math.nan, _Colour.BLUE)) == {
+        'number': 1, 'ratio': 'nan', 'colour': 'BLUE'}
+    assert codec.jsonify(_SubLeaf(1, 1.0, _Colour.BLUE)) == \
+        serialisation.jsonify(_SubLeaf(1, 1.0, _Colour.BLUE))
+
+
+def test_schema_smaller() -> None:
+    # Tagged serialisation has no JSON form for non-string keys
+    tree = dataclasses.replace(_tree(), by_colour={}, by_number={})
+    json = orjson.dumps(schema.Schema(_Tree).jsonify(tree))
+
+    assert b'$module' in json
+    assert len(json) * 2 < len(orjson.dumps(serialisation.jsonify(tree)))
+
+
+@pytest.mark.parametrize('cls', [int, _Colour, _tree()])
+def test_schema_raises(cls: Any) -> None:
+    with pytest.raises(TypeError):
+        schema.Schema(cls)
+
+
+@pytest.mark.parametrize('json', [
+    [],
+    {'number': 1, 'ratio': 1.0},
+    {'number': 1, 'ratio': 1.0, 'colour': 'GREEN'},
+    {'number': 1, 'ratio': None, 'colour': 'RED'},
+    {'number': 1, 'ratio': 1.0, 'colour': 'RED', 'other': 1},
+])
+def test_schema_unjsonify_raises(json: Any) -> None:
+    with pytest.raises(ValueError):
+        schema.Schema(_Leaf).unjsonify(json)
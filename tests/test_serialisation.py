@@ -2,17 +2,20 @@
 
 from __future__ import annotations
 
+import base64
 import dataclasses
 import datetime
 from enum import Enum
 import math
-from typing import Any, Dict, List, Mapping, Optional, Sequence, Type, TypeVar
+from typing import (Any, Callable, ClassVar, Dict, List, Mapping, Optional,
+                    Sequence, Tuple, Type, TypeVar)
 from unittest import mock
 
+import orjson
 import pytest
 import pytz
 
-from pygot import serialisation, utils
+from pygot import binary, encoding, lazy, serialisation, static, utils
 
 T = TypeVar('T')
 
@@ -75,6 +78,59 @@ def test_camel_case_non_ascii(string: str) -> None:
         serialisation.camel_case(string)
 
 
+def test_key_cache() -> None:
+    # pylint: disable=protected-access
+    serialisation.clear_key_cache()
+
+    assert serialisation.camel_case('key_word') == 'keyWord'
+    assert serialisation.camel_case('key_word') == 'keyWord'
+    assert serialisation.snake_case('key_word') == 'key_word'
+    with pytest.raises(ValueError):
+        serialisation.snake_case('key!')
+
+    info = serialisation.key_cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 3, 2)
+    assert info.maxsize == serialisation._KEY_CACHE_SIZE
+
+    serialisation.clear_key_cache()
+    assert serialisation.key_cache_info().currsize == 0
+
+
+def test_seed_key_cache() -> None:
+    serialisation.clear_key_cache()
+    serialisation.seed_key_cache(_Dataclass, _DataDict, int)
+    misses = serialisation.key_cache_info().misses
+
+    assert serialisation.camel_case('a_random_var') == 'aRandomVar'
+    assert serialisation.snake_case('dict') == 'dict'
+    assert serialisation.key_cache_info().misses == misses
+
+    serialisation.jsonify(_Dataclass(1, 'a', True))
+    serialisation.clear_key_cache()
+    serialisation.seed_key_cache()
+    misses = serialisation.key_cache_info().misses
+
+    assert serialisation.snake_case('aRandomVar') == 'a_random_var'
+    assert serialisation.key_cache_info().misses == misses
+
+
+def test_seed_key_cache_registered() -> None:
+    @serialisation.register_type
+    @dataclasses.dataclass
+    class _Seeded:
+        """Dataclass only ever registered."""
+
+        seeded_field_name: int
+
+    serialisation.clear_key_cache()
+    serialisation.seed_key_cache()
+    misses = serialisation.key_cache_info().misses
+
+    assert serialisation.camel_case(
+        'seeded_field_name') == 'seededFieldName'
+    assert serialisation.key_cache_info().misses == misses
+
+
 @dataclasses.dataclass(frozen=True)
 class DummyDataclass(serialisation.JSONMixin):
     """Dummy dataclass with JSON types."""
@@ -130,6 +186,73 @@ def test_json_mixin_deserialisation() -> None:
     assert DummyDataclass.from_json(expected_json) == dummy
 
 
+@dataclasses.dataclass
+class NestedDummyDataclass(serialisation.JSONMixin):
+    """Dummy JSON mixin dataclass type with nested values."""
+
+    some_date: datetime.date
+    some_dummies: List[DummyDataclass]
+    some_class_var: ClassVar[int] = 1
+
+
+def test_json_mixin_keys() -> None:
+    assert NestedDummyDataclass.__json_keys__ == (
+        ('some_date', 'someDate'), ('some_dummies', 'someDummies'))
+    assert NestedDummyDataclass.__json_attrs__ == {
+        'someDate': 'some_date', 'someDummies': 'some_dummies'}
+
+
+def test_json_mixin_nested() -> None:
+    dummy = DummyDataclass(int_var=123,
+                           str_var='one two three',
+                           float_var=math.inf,
+                           bool_var=True,
+                           optional_var=None,
+                           empty_var=None)
+    nested = NestedDummyDataclass(datetime.date(2020, 1, 2), [dummy])
+
+    json = nested.to_json()
+
+    assert json['someDate'] == serialisation.jsonify(nested.some_date)
+    assert json['someDummies'] == serialisation.jsonify([dummy])
+    assert serialisation.unjsonify(serialisation.jsonify(nested)) == nested
+    with mock.patch('pygot.serialisation.snake_case') as snake_case:
+        NestedDummyDataclass.from_json({'someDate': nested.some_date,
+                                        'someDummies': [dummy]})
+    snake_case.assert_not_called()
+
+
+@dataclasses.dataclass
+class _MixinHolder(serialisation.JSONMixin):
+    """JSON mixin dataclass type holding arbitrary values."""
+
+    some_value: Any
+
+
+@pytest.mark.parametrize('camel_case_keys', [True, False])
+@pytest.mark.parametrize('arg_struct', [True, False])
+def test_json_mixin_options(camel_case_keys: bool, arg_struct: bool) -> None:
+    obj = _MixinHolder({'snake_key': [_Dataclass(1, 'a', True)]})
+    json = serialisation.jsonify(obj, camel_case_keys=camel_case_keys,
+                                 arg_struct=arg_struct)
+    expected = serialisation.jsonify({'some_value': obj.some_value},
+                                     camel_case_keys=camel_case_keys,
+                                     arg_struct=arg_struct)
+
+    assert obj.to_json(camel_case_keys=camel_case_keys,
+                       arg_struct=arg_struct) == expected
+    if arg_struct:
+        expected[serialisation.MODULE_KEY] = __name__
+        expected[serialisation.NAME_KEY] = '_MixinHolder'
+    assert json == expected
+    assert orjson.loads(encoding.dumps(
+        obj, camel_case_keys=camel_case_keys,
+        arg_struct=arg_struct)) == json
+    if arg_struct:
+        assert serialisation.unjsonify(
+            json, camel_case_keys=camel_case_keys) == obj
+
+
 @dataclasses.dataclass(frozen=True)
 class ReplaceDummyDataclass(serialisation.ReplaceMixin):
     """Dummy replaceable attribute dataclass type."""
@@ -158,6 +281,35 @@ def test_replace_mixin() -> None:
     assert c == c_ref
 
 
+@dataclasses.dataclass(frozen=True)
+class ReplaceNestedDataclass(serialisation.ReplaceMixin):
+    """Dummy replaceable nested attribute dataclass type."""
+
+    dummy: ReplaceDummyDataclass
+    items: List[int]
+    counter: int = dataclasses.field(default=0, init=False)
+
+
+def test_replace_mixin_shallow() -> None:
+    a = ReplaceNestedDataclass(ReplaceDummyDataclass(123, '123'), [1, 2])
+    b = a.replace(items=[3])
+
+    assert b == ReplaceNestedDataclass(ReplaceDummyDataclass(123, '123'), [3])
+    assert b.dummy is a.dummy
+    assert a.replace().items is a.items
+    with pytest.raises(TypeError):
+        a.replace(missing=1)
+
+
+def test_replace_mixin_replace_many() -> None:
+    a = ReplaceDummyDataclass(123, '123')
+
+    assert a.replace_many() == a
+    assert a.replace_many({'a': 1}, {'a': 2, 'b': 'b'}) == \
+        ReplaceDummyDataclass(2, 'b')
+    assert a.replace_many({'a': 1}, a=3) == ReplaceDummyDataclass(3, '123')
+
+
 class _CustomTZ(datetime.tzinfo):
     """Simple custom minute-based timezones."""
 
@@ -179,6 +331,7 @@ class _CustomTZ(datetime.tzinfo):
         return isinstance(other, _CustomTZ) and other.offset == self.offset
 
 
+@serialisation.register_type
 class _CustomEnum(Enum):
     """Custom timezone enum."""
 
@@ -186,6 +339,7 @@ class _CustomEnum(Enum):
     UTC_MINUS_10 = {'some_time': datetime.time(12, 13, 00, 456789)}
 
 
+@serialisation.register_type
 @dataclasses.dataclass
 class _Dataclass:
     """Test case dataclass."""
@@ -195,6 +349,7 @@ class _Dataclass:
     a_random_var: bool
 
 
+@serialisation.register_type
 @dataclasses.dataclass
 class _DataDict:
     """Test case dataclass."""
@@ -219,6 +374,24 @@ class _JsonDataclass(serialisation.JSONMixin, _Dataclass):
                    a_random_var=json['a'][0]['random_var'])
 
 
+@serialisation.register_type
+@dataclasses.dataclass(eq=False)
+class _Node:
+    """Test case dataclass that can be in a reference cycle."""
+
+    value: int
+    children: List[_Node]
+    parent: Optional[_Node] = None
+
+
+class _Str(str):
+    """Plain str subclass."""
+
+
+class _Int(int):
+    """Plain int subclass."""
+
+
 # Mapping of test case ID -> [py, vanilla, camel case, camel case + meta, meta]
 _TEST_CASES: Dict[str, List[Any]] = {
     'string': [
@@ -800,14 +973,812 @@ def test_unjsonify_raises(obj: Any, expected: Any) -> None:
         serialisation.unjsonify(obj)
 
 
-@mock.patch('orjson.dumps', return_value=b'123')
-@mock.patch('pygot.serialisation.jsonify', return_value=123)
-def test_orjson_response(serialisation_jsonify: mock.MagicMock,
-                         orjson_dumps: mock.MagicMock) -> None:
-    serialisation.ORJSONResponse(321)
+def test_jsonify_compiled_encoder_reused() -> None:
+    obj = _DataDict(dict={'a_int': 1}, data=_Dataclass(1, 'str', False))
+    serialisation.invalidate_encoders()
+
+    first = serialisation.jsonify(obj)
+    with mock.patch('pygot.serialisation._compile_encoder') as compile_:
+        second = serialisation.jsonify(obj)
+
+    assert first == second
+    assert compile_.call_count == 0
+
+
+def test_jsonify_register_invalidates_encoders() -> None:
+    @dataclasses.dataclass
+    class _Late:
+        """Dataclass getting a registration after first use."""
+
+        value: int
+
+    assert serialisation.jsonify([_Late(1)], arg_struct=False) == [
+        {'value': 1}]
+
+    @serialisation.jsonify.register(_Late)
+    def _jsonify_late(obj: _Late,
+                      camel_case_keys: bool = True,
+                      arg_struct: bool = True) -> serialisation.JSONType:
+        return obj.value
+
+    assert serialisation.jsonify.dispatch(_Late) is _jsonify_late
+    assert serialisation.jsonify([_Late(1)], arg_struct=False) == [1]
+    assert serialisation.jsonify(_Late(2), arg_struct=False) == 2
+
+
+def test_invalidate_encoders() -> None:
+    obj = [_Dataclass(1, 'a', True)]
+    serialisation.jsonify(obj)
+    serialisation.invalidate_encoders()
+
+    with mock.patch('pygot.serialisation._compile_encoder',
+                    wraps=serialisation._compile_encoder) as compile_:
+        serialisation.jsonify(obj)
+        serialisation.jsonify(obj)
+
+    assert compile_.call_count == 2
+
+
+@pytest.mark.parametrize('obj', ['abc', 1, True, None])
+def test_jsonify_primitive_fast_path(obj: Any) -> None:
+    with mock.patch('pygot.serialisation._encoder') as encoder:
+        assert serialisation.jsonify(obj) is obj
+    encoder.assert_not_called()
+
+
+def test_unjsonify_compiled_decoder_reused() -> None:
+    json = serialisation.jsonify(_DataDict(dict={'a_int': 1},
+                                           data=_Dataclass(1, 'str', False)))
+    serialisation.invalidate_decoders()
+
+    first = serialisation.unjsonify(json)
+    with mock.patch('importlib.import_module') as import_module:
+        second = serialisation.unjsonify(json)
+
+    assert first == second
+    assert import_module.call_count == 0
+
+
+def test_invalidate_decoders() -> None:
+    json = serialisation.jsonify(_Dataclass(1, 'a', True))
+    serialisation.unjsonify(json)
+    serialisation.invalidate_decoders()
+
+    with mock.patch('pygot.serialisation._compile_decoder',
+                    wraps=serialisation._compile_decoder) as compile_:
+        serialisation.unjsonify(json)
+        serialisation.unjsonify(json)
+
+    assert compile_.call_count == 1
+
+
+def test_register_type() -> None:
+    json = {'$module': __name__, '$type': '_Swapped', 'value': 1}
+
+    with mock.patch('importlib.import_module') as import_module:
+        with pytest.raises(ValueError):
+            serialisation.unjsonify(json)
+    import_module.assert_not_called()
+
+    @serialisation.register_type
+    @dataclasses.dataclass
+    class _Swapped:
+        """Dataclass registered under a name taken over later."""
+
+        value: int
+
+    first = _Swapped
+    assert type(serialisation.unjsonify(json)) is first
+
+    @serialisation.register_type
+    @dataclasses.dataclass
+    class _Swapped:  # type: ignore
+        """Dataclass taking over a registered name."""
+
+        value: int
+
+    assert _Swapped is not first
+    assert type(serialisation.unjsonify(json)) is _Swapped
+
+
+@pytest.mark.parametrize('json', [
+    {'$module': 'os', '$type': 'system', 'command': 'true'},
+    {'$module': 'builtins', '$type': 'dict', 'a': 1},
+    {'$module': __name__, '$type': 'ReplaceDummyDataclass', 'a': 1, 'b': ''},
+])
+def test_unjsonify_unregistered_raises(json: Any) -> None:
+    with pytest.raises(ValueError):
+        serialisation.unjsonify(json)
+
+
+_DATE_TIME = {'$module': 'pygot.serialisation', '$type': 'date_time',
+              'year': 2020, 'month': 1, 'day': 1, 'hour': 0, 'minute': 0,
+              'second': 0, 'microsecond': 0, 'timezone': None}
+
+# Well-formed types with malformed arguments
+_MALFORMED_CASES = {
+    'float_missing': {'$module': 'builtins', '$type': 'float'},
+    'float_list': {'$module': 'builtins', '$type': 'float', 'x': [1]},
+    'float_text': {'$module': 'builtins', '$type': 'float', 'x': 'one'},
+    'timezone': {**_DATE_TIME, 'timezone': 'Mars/Olympus_Mons'},
+    'timezone_list': {**_DATE_TIME, 'timezone': ['UTC']},
+    'date_time_missing': {**_DATE_TIME, 'minute': None},
+    'date_overflow': {'$module': 'datetime', '$type': 'date',
+                      'year': 2 ** 40, 'month': 1, 'day': 1},
+    'date_month': {'$module': 'datetime', '$type': 'date',
+                   'year': 2020, 'month': 13, 'day': 1},
+    'dataclass_key': {'$module': __name__, '$type': '_Dataclass',
+                      'aRandomVar': 1, 'unknown': 1},
+    'mixin_key': {'$module': __name__, '$type': 'DummyDataclass',
+                  'intVar': 1, 'unknown': 1},
+    'static_data': {'$module': 'pygot.static', '$type': 'House',
+                    'name': 'Targaryen', 'words': 'Fire and Blood'},
+}
+
+
+@pytest.mark.parametrize('json', list(_MALFORMED_CASES.values()),
+                         ids=list(_MALFORMED_CASES))
+def test_unjsonify_malformed_raises(json: Any) -> None:
+    with pytest.raises(ValueError):
+        serialisation.unjsonify(json)
+
+
+def test_register_type_automatic() -> None:
+    class _LateEnum(Enum):
+        """Enum never registered."""
+
+        A = 1
+
+    json = {'$module': __name__, '$type': '_LateEnum', 'name': 'A',
+            'value': 1}
+
+    # Serialising does not register, decoding depends on definitions only
+    assert serialisation.jsonify(_LateEnum.A) == json
+    with pytest.raises(ValueError):
+        serialisation.unjsonify(json)
+    assert serialisation.unjsonify(
+        serialisation.jsonify(DummyDataclass(1, 'a', 1.5, True, None, None))
+    ) == DummyDataclass(1, 'a', 1.5, True, None, None)
+
+
+def test_unjsonify_enum_never_serialised() -> None:
+    class _FreshState(static._Enum):  # pylint: disable=protected-access
+        """Static enum only ever decoded."""
+
+        FRESH = 'Fresh'
+
+    json = {'$module': __name__, '$type': '_FreshState', 'name': 'FRESH',
+            'value': 'Fresh'}
+
+    assert serialisation.unjsonify(json) is _FreshState.FRESH
+    assert serialisation.unjsonify({
+        '$module': 'pygot.static', '$type': 'UnitState',
+        'name': 'READY', 'value': 'Ready',
+    }) is static.UnitState.READY
+
+
+@pytest.mark.parametrize('name', ['MISSING', 'mro', '__class__', [1], None])
+def test_unjsonify_enum_unknown_name(name: Any) -> None:
+    with pytest.raises(ValueError):
+        serialisation.unjsonify({'$module': 'pygot.static',
+                                 '$type': 'UnitState', 'name': name})
+
+
+@pytest.mark.parametrize('obj', [x[0] for x in _TEST_CASES.values()],
+                         ids=list(_TEST_CASES))
+def test_jsonify_intern_types_round_trip(obj: Any) -> None:
+    json = serialisation.jsonify(obj, intern_types=True)
+
+    assert set(json) == {'$types', '$value'}
+    assert '$module' not in str(json['$value'])
+
+    val = serialisation.unjsonify(json)
+    try:
+        assert val == obj
+    except AssertionError:
+        pass
+    else:
+        return
+    assert _replace_nan(val) == _replace_nan(obj)
+
+
+def test_jsonify_intern_types() -> None:
+    obj = [_Dataclass(1, 'a', True),
+           _DataDict({'b': 2}, _Dataclass(3, 'c', False))]
+
+    assert serialisation.jsonify(obj, intern_types=True) == {
+        '$types': [[_Dataclass.__module__, _Dataclass.__name__],
+                   [_DataDict.__module__, _DataDict.__name__]],
+        '$value': [
+            {'number': 1, 'text': 'a', 'aRandomVar': True, '$tag': 0},
+            {'dict': {'b': 2},
+             'data': {'number': 3, 'text': 'c', 'aRandomVar': False,
+                      '$tag': 0},
+             '$tag': 1},
+        ],
+    }
+
+
+@pytest.mark.parametrize('unjsonify', [serialisation.unjsonify,
+                                       lazy.unjsonify])
+def test_unjsonify_tag_key_without_types(unjsonify: Callable[..., Any]
+                                         ) -> None:
+    obj = {'$tag': 1, 'nested': [{'$tag': 2, 'value': 'a'}]}
+    json = serialisation.jsonify(obj, camel_case_keys=False)
+
+    assert unjsonify(json, camel_case_keys=False) == obj
+
+
+@pytest.mark.parametrize('json', [
+    {'$types': 'abc', '$value': None},
+    {'$types': [['datetime']], '$value': None},
+    {'$types': [['datetime', 'foo_bar']], '$value': None},
+    {'$types': [], '$value': {'$tag': 0}},
+    {'$types': [['datetime', 'date']], '$value': {'$tag': -1}},
+    {'$types': [['datetime', 'date']], '$value': {'$tag': '0'}},
+])
+def test_unjsonify_intern_types_raises(json: Any) -> None:
+    with pytest.raises(ValueError):
+        serialisation.unjsonify(json)
+
+
+@pytest.mark.parametrize('intern_types', [False, True])
+@pytest.mark.parametrize('unjsonify', [serialisation.unjsonify,
+                                       lazy.unjsonify])
+def test_jsonify_compact_datetimes_round_trip(intern_types: bool,
+                                              unjsonify: Any) -> None:
+    ljubljana = pytz.timezone('Europe/Ljubljana')
+    obj = {'events': [
+        {'at': ljubljana.localize(datetime.datetime(2020, 3, 29, 1, 59)),
+         'data': _Dataclass(1, 'a', True)},
+        {'at': ljubljana.localize(datetime.datetime(2020, 3, 29, 3, 0, 0, 1))},
+        {'at': datetime.datetime(2020, 4, 29, 14, 15, 16, 789, pytz.utc)},
+        {'at': datetime.datetime(1969, 12, 31, 23, 59, 59, 999999)},
+    ]}
+    json = serialisation.jsonify(obj, intern_types=intern_types,
+                                 compact_datetimes=True)
+
+    assert set(json) == ({'$types', '$zones', '$value'} if intern_types
+                         else {'$zones', '$value'})
+    assert 'year' not in str(json['$value'])
+    val = lazy.materialise(unjsonify(json))
+    assert val == obj
+    assert [e['at'].tzname() for e in val['events']] == [
+        'CET', 'CEST', 'UTC', None]
+
+
+def test_jsonify_compact_datetimes() -> None:
+    london = pytz.timezone('Europe/London')
+    obj = [datetime.datetime(1970, 1, 1, 0, 0, 1),
+           london.localize(datetime.datetime(1970, 1, 1, 0, 0, 0, 5)),
+           datetime.datetime(1970, 1, 2, tzinfo=pytz.utc),
+           london.localize(datetime.datetime(2000, 6, 1))]
+
+    assert serialisation.jsonify(obj, compact_datetimes=True) == {
+        '$zones': ['Europe/London', 'UTC'],
+        '$value': [
+            {'$epoch': [1_000_000, None]},
+            {'$epoch': [-3_600_000_000 + 5, 0]},
+            {'$epoch': [86_400_000_000, 1]},
+            {'$epoch': [959_814_000_000_000, 0]},
+        ],
+    }
+
+
+@pytest.mark.parametrize('zone, day', [
+    ('Europe/Ljubljana', datetime.datetime(2020, 3, 29)),
+    ('Europe/Ljubljana', datetime.datetime(2020, 10, 25)),
+    ('Australia/Lord_Howe', datetime.datetime(2020, 4, 5)),
+    ('Europe/Amsterdam', datetime.datetime(1937, 7, 1)),
+])
+def test_jsonify_compact_datetimes_transitions(zone: str,
+                                               day: datetime.datetime
+                                               ) -> None:
+    tz = pytz.timezone(zone)
+    obj = [tz.localize(day + datetime.timedelta(seconds=s, microseconds=s))
+           for s in range(0, 86_400, 97)]
+
+    json = serialisation.jsonify(obj, compact_datetimes=True)
+
+    assert [j['$epoch'][0] for j in json['$value']] == [
+        (dt - datetime.datetime(1970, 1, 1, tzinfo=pytz.utc))
+        // datetime.timedelta(microseconds=1) for dt in obj]
+    assert serialisation.unjsonify(json) == obj
+
+
+@pytest.mark.parametrize('unjsonify', [serialisation.unjsonify,
+                                       lazy.unjsonify])
+def test_unjsonify_epoch_key_without_zones(unjsonify: Callable[..., Any]
+                                           ) -> None:
+    obj = {'$epoch': [0, 0], 'nested': [{'$epoch': 'a'}]}
+    json = serialisation.jsonify(obj, camel_case_keys=False)
+
+    assert unjsonify(json, camel_case_keys=False) == obj
+
+
+@pytest.mark.parametrize('json', [
+    {'$zones': 'UTC', '$value': None},
+    {'$zones': ['Nowhere/Special'], '$value': None},
+    {'$zones': [['UTC']], '$value': None},
+    {'$zones': ['UTC'], '$value': {'$epoch': [0, 1]}},
+    {'$zones': ['UTC'], '$value': {'$epoch': [0, '0']}},
+    {'$zones': ['UTC'], '$value': {'$epoch': ['0', 0]}},
+    {'$zones': ['UTC'], '$value': {'$epoch': 0}},
+    {'$zones': ['UTC'], '$value': {'$epoch': [2 ** 62, None]}},
+    {'$zones': ['UTC'], '$value': {'$epoch': [-2 ** 62, 0]}},
+    {'$zones': ['UTC'], '$value': {'$epoch': [2 ** 100, 0]}},
+    {'$zones': ['Asia/Tokyo'],
+     '$value': {'$epoch': [253_402_300_799_999_999, 0]}},
+])
+def test_unjsonify_compact_datetimes_raises(json: Any) -> None:
+    with pytest.raises(ValueError):
+        serialisation.unjsonify(json)
+
+
+@pytest.mark.parametrize('intern_types', [False, True])
+def test_jsonify_references_round_trip(intern_types: bool) -> None:
+    shared = _Dataclass(1, 'a', True)
+    obj = {'a': [shared, _DataDict({'b': 2}, shared)],
+           'b': [_CustomEnum.UTC_PLUS_10, _CustomEnum.UTC_PLUS_10],
+           'c': [datetime.date(2020, 1, 1)] * 2}
+
+    json = serialisation.jsonify(obj, intern_types=intern_types,
+                                 references=True)
+    val = serialisation.unjsonify(orjson.loads(orjson.dumps(json)))
+
+    assert val == obj
+    assert val['a'][0] is val['a'][1].data
+    assert val['b'][0] is val['b'][1]
+
+
+def test_jsonify_references() -> None:
+    shared = _Dataclass(1, 'a', True)
+    once = _Dataclass(2, 'b', False)
+
+    json = serialisation.jsonify([shared, once, shared], references=True)
+    unshared = serialisation.jsonify([shared, once], references=True)
+
+    assert json == {'$refs': True, '$value': [
+        {'number': 1, 'text': 'a', 'aRandomVar': True,
+         '$module': _Dataclass.__module__, '$type': _Dataclass.__name__,
+         '$id': 0},
+        {'number': 2, 'text': 'b', 'aRandomVar': False,
+         '$module': _Dataclass.__module__, '$type': _Dataclass.__name__},
+        {'$ref': 0},
+    ]}
+    assert unshared == serialisation.jsonify([shared, once])
+
+
+@pytest.mark.parametrize('json', [
+    {'$id': 1, 'a': 2},
+    {'$ref': 1, 'a': 2},
+    [{'$id': 'x'}, {'$ref': 'x'}],
+    {'$value': {'$id': 1}, '$zones': []},
+])
+@pytest.mark.parametrize('unjsonify', [serialisation.unjsonify,
+                                       lazy.unjsonify])
+def test_unjsonify_reference_keys_unreferenced(json: Any,
+                                               unjsonify: Any) -> None:
+    val = unjsonify(json, camel_case_keys=False)
+    expected = json['$value'] if '$value' in json else json
+
+    assert lazy.materialise(val) == expected
+
+
+@pytest.mark.parametrize('intern_types', [True, False])
+@pytest.mark.parametrize('compact_datetimes', [True, False])
+def test_jsonify_references_wrapped(intern_types: bool,
+                                    compact_datetimes: bool) -> None:
+    shared = _Dataclass(1, 'a', True)
+    obj = [shared, shared,
+           pytz.timezone('Europe/London').localize(
+               datetime.datetime(2020, 1, 1))]
+
+    json = serialisation.jsonify(obj, references=True,
+                                 intern_types=intern_types,
+                                 compact_datetimes=compact_datetimes)
+    val = serialisation.unjsonify(orjson.loads(orjson.dumps(json)))
+
+    assert json['$refs'] is True
+    assert val == obj
+    assert val[0] is val[1]
+
+
+def test_jsonify_references_smaller() -> None:
+    shared = _DataDict({str(i): i for i in range(100)},
+                       _Dataclass(1, 'a', True))
+    obj = [shared] * 10
+
+    plain = orjson.dumps(serialisation.jsonify(obj))
+    referenced = orjson.dumps(serialisation.jsonify(obj, references=True))
+
+    assert len(referenced) * 5 < len(plain)
+
+
+def test_jsonify_references_cycle() -> None:
+    root = _Node(0, [])
+    root.children = [_Node(1, [], root), _Node(2, [], root)]
+
+    json = serialisation.jsonify(root, references=True)
+    val = serialisation.unjsonify(orjson.loads(orjson.dumps(json)))
+
+    assert [c.value for c in val.children] == [1, 2]
+    assert all(c.parent is val for c in val.children)
+
+
+@pytest.mark.parametrize('camel_case_keys', [True, False])
+def test_jsonify_references_mixin_cycle(camel_case_keys: bool) -> None:
+    root = _MixinHolder(None)
+    root.some_value = {'own': [root], 'node': _Node(1, [], root)}
+
+    json = serialisation.jsonify(root, camel_case_keys=camel_case_keys,
+                                 references=True)
+    val = serialisation.unjsonify(orjson.loads(orjson.dumps(json)),
+                                  camel_case_keys=camel_case_keys)
+
+    assert isinstance(val, _MixinHolder)
+    assert val.some_value['own'][0] is val
+    assert val.some_value['node'].parent is val
+
+
+def test_jsonify_references_list_cycle() -> None:
+    obj: List[Any] = []
+    obj.append(obj)
+
+    with pytest.raises(ValueError):
+        serialisation.jsonify(obj, references=True)
+
+
+@pytest.mark.parametrize('json', [
+    {'$ref': 0},
+    [{'$ref': 0}, {'a': 1, '$id': 0}],
+    {'$ref': []},
+])
+def test_unjsonify_references_raises(json: Any) -> None:
+    with pytest.raises(ValueError):
+        serialisation.unjsonify(json)
 
-    assert serialisation_jsonify.call_count == 1
-    assert serialisation_jsonify.call_args == ((321,), {})
 
-    assert orjson_dumps.call_count == 1
-    assert orjson_dumps.call_args == ((123,), {})
+@pytest.mark.parametrize('obj', [
+    v[0] for k, v in _TEST_CASES.items() if not k.startswith('unsupported-')
+])
+@pytest.mark.parametrize('camel_case_keys', [True, False])
+def test_jsonify_columnar_round_trip(obj: Any, camel_case_keys: bool) -> None:
+    json = serialisation.jsonify(obj, camel_case_keys=camel_case_keys,
+                                 columnar=True)
+    val = serialisation.unjsonify(json, camel_case_keys=camel_case_keys)
+
+    assert _replace_nan(val) == _replace_nan(serialisation.unjsonify(
+        serialisation.jsonify(obj, camel_case_keys=camel_case_keys),
+        camel_case_keys=camel_case_keys))
+
+
+@pytest.mark.parametrize('intern_types', [False, True])
+@pytest.mark.parametrize('unjsonify', [serialisation.unjsonify,
+                                       lazy.unjsonify])
+def test_jsonify_columnar_nested(intern_types: bool, unjsonify: Any) -> None:
+    obj = {'items': [_DataDict({'a': i}, _Dataclass(i, str(i), True))
+                     for i in range(10)],
+           'mixed': [_Dataclass(1, 'a', True), _DataDict({}, None), 1]}
+
+    json = serialisation.jsonify(obj, intern_types=intern_types,
+                                 columnar=True)
+    val = unjsonify(orjson.loads(orjson.dumps(json)))
+
+    assert lazy.materialise(val) == obj
+
+
+def test_jsonify_columnar() -> None:
+    obj = [_Dataclass(1, 'a', True), _Dataclass(2, 'b', False)]
+
+    assert serialisation.jsonify(obj, columnar=True) == {
+        '$value': {
+            '$columns': {'number': [1, 2], 'text': ['a', 'b'],
+                         'aRandomVar': [True, False]},
+            '$module': _Dataclass.__module__,
+            '$type': _Dataclass.__name__,
+        },
+        '$columns': True,
+    }
+    assert (serialisation.jsonify(obj[:1], columnar=True)
+            == serialisation.jsonify(obj[:1]))
+    assert serialisation.unjsonify(serialisation.jsonify(
+        obj, arg_struct=False, columnar=True)) == [
+        {'number': 1, 'text': 'a', 'a_random_var': True},
+        {'number': 2, 'text': 'b', 'a_random_var': False},
+    ]
+
+
+def test_jsonify_columnar_smaller() -> None:
+    obj = [_Dataclass(i, str(i), True) for i in range(100)]
+
+    plain = orjson.dumps(serialisation.jsonify(obj))
+    columnar = orjson.dumps(serialisation.jsonify(obj, columnar=True))
+
+    assert len(columnar) * 3 < len(plain)
+
+
+def test_jsonify_columnar_references_raises() -> None:
+    with pytest.raises(ValueError):
+        serialisation.jsonify([], references=True, columnar=True)
+
+
+@pytest.mark.parametrize('value', [
+    {'$columns': [1, 2]},
+    {'$columns': {'a': [1], 'b': [1, 2]}},
+    {'$columns': {'a': 1}},
+    {'$columns': {'number': [1], 'text': ['a']},
+     '$module': _Dataclass.__module__, '$type': _Dataclass.__name__},
+])
+def test_unjsonify_columnar_raises(value: Any) -> None:
+    with pytest.raises(ValueError):
+        serialisation.unjsonify({'$value': value, '$columns': True})
+
+
+@pytest.mark.parametrize('unjsonify', [serialisation.unjsonify,
+                                       lazy.unjsonify])
+def test_unjsonify_columns_key_without_columnar(unjsonify: Callable[..., Any]
+                                                ) -> None:
+    obj = {'$columns': [1, 2], 'nested': [{'$columns': {'a': 1}}]}
+    json = serialisation.jsonify(obj, camel_case_keys=False, columnar=True)
+
+    assert json == obj
+    assert unjsonify(json, camel_case_keys=False) == obj
+
+
+@pytest.mark.parametrize('obj', [
+    v[0] for k, v in _TEST_CASES.items() if not k.startswith('unsupported-')
+])
+@pytest.mark.parametrize('camel_case_keys', [True, False])
+@pytest.mark.parametrize('arg_struct', [True, False])
+def test_jsonify_iterative(obj: Any,
+                           camel_case_keys: bool,
+                           arg_struct: bool) -> None:
+    expected = serialisation.jsonify(obj, camel_case_keys=camel_case_keys,
+                                     arg_struct=arg_struct)
+    json = serialisation._jsonify_iterative(obj, camel_case_keys, arg_struct)
+
+    assert _replace_nan(json) == _replace_nan(expected)
+    assert orjson.dumps(json) == orjson.dumps(expected)
+
+
+def test_jsonify_deep() -> None:
+    obj: List[Any] = []
+    node = obj
+    for i in range(5000):
+        child = _DataDict({'a': i}, [])
+        node.append(child)
+        node = child.data
+
+    json = serialisation.jsonify(obj)
+    val = serialisation.unjsonify(json)
+
+    for i in range(5000):
+        assert val[0].dict == {'a': i}
+        val = val[0].data
+    assert val == []
+
+
+def test_jsonify_deep_shared() -> None:
+    shared = _DataDict({'a': 0}, [])
+    obj: List[Any] = [shared]
+    node = obj
+    for _ in range(5000):
+        node.append([shared])
+        node = node[-1]
+
+    json = serialisation.jsonify(obj)
+
+    for _ in range(5000):
+        assert json[0] == serialisation.jsonify(shared)
+        json = json[-1]
+
+
+def _cyclic_list() -> List[Any]:
+    obj: List[Any] = [1]
+    obj.append([obj])
+    return obj
+
+
+def _cyclic_dict() -> Dict[str, Any]:
+    obj: Dict[str, Any] = {'a': 1}
+    obj['b'] = {'c': obj}
+    return obj
+
+
+def _cyclic_node() -> _Node:
+    root = _Node(0, [])
+    root.children = [_Node(1, [], root)]
+    return root
+
+
+@pytest.mark.parametrize('make', [_cyclic_list, _cyclic_dict,
+                                  _cyclic_node])
+def test_jsonify_cycle_raises(make: Callable[[], Any]) -> None:
+    with pytest.raises(ValueError, match='Reference cycle'):
+        serialisation.jsonify(make())
+
+
+@pytest.mark.parametrize('camel_case_keys', [True, False])
+def test_jsonify_deep_mixin(camel_case_keys: bool) -> None:
+    obj = _MixinHolder(None)
+    for i in range(5000):
+        obj = _MixinHolder([i, obj])
+
+    json = serialisation.jsonify(obj, camel_case_keys=camel_case_keys)
+    val = serialisation.unjsonify(json, camel_case_keys=camel_case_keys)
+
+    for i in reversed(range(5000)):
+        assert isinstance(val, _MixinHolder)
+        assert val.some_value[0] == i
+        val = val.some_value[1]
+    assert val == _MixinHolder(None)
+
+
+@pytest.mark.parametrize('obj', [b'', b'\x00bytes\xff', bytes(range(256)),
+                                 memoryview(b'view'),
+                                 memoryview(bytes(range(10)))[::3]])
+def test_buffer_round_trip(obj: Any) -> None:
+    json = orjson.loads(orjson.dumps(serialisation.jsonify(obj)))
+    packed = binary.pack(obj)
+
+    assert json['data'] == base64.b64encode(bytes(obj)).decode()
+    assert orjson.loads(encoding.dumps(obj)) == json
+    assert b''.join(encoding.iter_jsonify_bytes(obj)) == \
+        encoding.dumps(obj)
+    assert bytes(obj) in packed
+    for val in (serialisation.unjsonify(json),
+                serialisation.unjsonify(serialisation.jsonify(obj)),
+                binary.unpack(packed)):
+        assert type(val) is type(obj)
+        assert val == obj
+    assert serialisation.jsonify(obj, arg_struct=False) == json['data']
+
+
+@pytest.mark.parametrize('dtype', ['<f8', '>i4', 'u1', '?', '<c16',
+                                   '<M8[s]', '<U3'])
+@pytest.mark.parametrize('shape', [(), (0,), (7,), (2, 3, 4)])
+def test_ndarray_round_trip(dtype: str, shape: Tuple[int, ...]) -> None:
+    numpy = pytest.importorskip('numpy')
+    obj = numpy.arange(int(numpy.prod(shape))).astype(dtype).reshape(shape)
+    state = {'heatmap': obj, 'transposed': obj.T}
+    json = orjson.loads(encoding.dumps(state))
+    packed = binary.pack(state)
+
+    assert json == orjson.loads(orjson.dumps(serialisation.jsonify(state)))
+    for val in (serialisation.unjsonify(json),
+                serialisation.unjsonify(serialisation.jsonify(state)),
+                binary.unpack(packed)):
+        for k, v in state.items():
+            assert val[k].dtype == v.dtype
+            assert val[k].shape == v.shape
+            assert numpy.array_equal(val[k], v)
+            assert not val[k].flags.writeable
+
+
+def test_ndarray_no_arg_struct() -> None:
+    numpy = pytest.importorskip('numpy')
+    obj = numpy.arange(6).reshape(2, 3)
+
+    assert serialisation.jsonify(obj, arg_struct=False) == [[0, 1, 2],
+                                                            [3, 4, 5]]
+
+
+def test_ndarray_unsupported_dtype() -> None:
+    numpy = pytest.importorskip('numpy')
+
+    with pytest.raises(TypeError):
+        serialisation.jsonify(numpy.array([object()]))
+
+
+@pytest.mark.parametrize('json', [
+    {'$module': 'pygot.serialisation', '$type': 'byte_string',
+     'data': 'not base64!'},
+    {'$module': 'pygot.serialisation', '$type': 'byte_view', 'data': 1},
+    {'$module': 'pygot.serialisation', '$type': 'nd_array', 'dtype': '<f8',
+     'shape': [2], 'data': 'AAAA'},
+    {'$module': 'pygot.serialisation', '$type': 'nd_array', 'dtype': 'O',
+     'shape': [1], 'data': 'AAAAAAAAAAA='},
+    {'$module': 'pygot.serialisation', '$type': 'nd_array', 'dtype': 'bad',
+     'shape': [1], 'data': 'AAAAAAAAAAA='},
+])
+def test_unjsonify_buffer_raises(json: Any) -> None:
+    pytest.importorskip('numpy')
+
+    with pytest.raises(ValueError):
+        serialisation.unjsonify(json)
+
+
+def test_projection_tree() -> None:
+    projection = serialisation.Projection('units.*.state', 'house.words',
+                                          'units.*.state.name', 'round',
+                                          'house')
+
+    assert projection.tree == {'units': {'*': {'state': None}},
+                               'house': None,
+                               'round': None}
+
+
+@pytest.mark.parametrize('path, error', [
+    ('', ValueError), ('a..b', ValueError), ('a.', ValueError),
+    (1, TypeError),
+])
+def test_projection_bad_path(path: Any, error: Type[Exception]) -> None:
+    with pytest.raises(error):
+        serialisation.Projection(path)
+
+
+@pytest.mark.parametrize('arg_struct', [True, False])
+def test_jsonify_projection(arg_struct: bool) -> None:
+    obj = {'nodes': [_Node(1, [_Node(2, [])]), _Node(3, [])],
+           'data_dict': _DataDict({'a_key': 1, 'b_key': 2},
+                                  _Dataclass(4, 'text', True)),
+           'other': _Dataclass(5, 'other', False)}
+    projection = serialisation.Projection(
+        'nodes.*.value', 'nodes.*.children.*.value', 'data_dict.dict.b_key',
+        'data_dict.data.a_random_var', 'missing.value')
+    tags = {}
+    if arg_struct:
+        tags = {'$module': _Node.__module__, '$type': _Node.__name__}
+
+    json = serialisation.jsonify(obj, arg_struct=arg_struct,
+                                 projection=projection)
+
+    assert json['nodes'] == [
+        {'value': 1, 'children': [{'value': 2, **tags}], **tags},
+        {'value': 3, 'children': [], **tags},
+    ]
+    assert json['dataDict']['dict'] == {'bKey': 2}
+    assert json['dataDict']['data']['aRandomVar'] is True
+    assert 'number' not in json['dataDict']['data']
+    assert set(json) == {'nodes', 'dataDict'}
+
+
+def test_jsonify_projection_wildcards() -> None:
+    obj = {'first': _Dataclass(1, 'a', True),
+           'second': _Dataclass(2, 'b', False)}
+    projection = serialisation.Projection('*.number', 'second.text')
+
+    assert serialisation.jsonify(obj, camel_case_keys=False,
+                                 arg_struct=False,
+                                 projection=projection) == {
+        'first': {'number': 1},
+        'second': {'number': 2, 'text': 'b'},
+    }
+
+
+def test_jsonify_projection_skips_unselected() -> None:
+    obj = _DataDict({'a': 1}, _Dataclass(4, 'text', True))
+    projection = serialisation.Projection('dict')
+
+    with mock.patch.object(serialisation, '_encoder',
+                           wraps=serialisation._encoder) as encoder:
+        json = serialisation.jsonify(obj, projection=projection)
+
+    assert json == {'dict': {'a': 1}, '$module': _DataDict.__module__,
+                    '$type': _DataDict.__name__}
+    assert [c[0][0] for c in encoder.call_args_list] == [dict]
+
+
+def test_jsonify_projection_prunes_encoded() -> None:
+    obj = [datetime.datetime(2020, 4, 29, 14, 15, 16, 789, pytz.utc),
+           _CustomEnum.UTC_PLUS_10]
+    projection = serialisation.Projection('*.year', '*.name')
+
+    assert serialisation.jsonify(obj, projection=projection) == [
+        {'$module': serialisation.date_time.__module__,
+         '$type': serialisation.date_time.__name__,
+         'year': 2020},
+        {'$module': _CustomEnum.__module__,
+         '$type': _CustomEnum.__name__,
+         'name': 'UTC_PLUS_10'},
+    ]
+
+
+def test_jsonify_projection_combination_raises() -> None:
+    projection = serialisation.Projection('a')
+
+    with pytest.raises(ValueError):
+        serialisation.jsonify({}, references=True, projection=projection)
+    with pytest.raises(ValueError):
+        serialisation.jsonify({}, columnar=True, projection=projection)
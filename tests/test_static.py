@@ -5,12 +5,14 @@ from __future__ import annotations
 __all__ = tuple()
 
 import dataclasses
-from typing import Dict
+import datetime
+from typing import Any, Dict
 
 from _pytest.fixtures import FixtureRequest
+import orjson
 import pytest
 
-from pygot import serialisation, static
+from pygot import encoding, serialisation, static
 
 
 # Fixtures. Need to make a PR for this.
@@ -757,6 +759,134 @@ def test_instance_serialisation(reset_registry) -> None:
                               'surname': 'Eilish'}
 
 
+def test_instance_serialisation_cached(reset_registry) -> None:
+    class Name123(static.StaticData):
+        """Test class."""
+
+        b: int = static.STATIC
+
+    class GoodBoy(metaclass=Name123):
+        """Test class."""
+
+        b = 2
+        c: Dict[str, int] = {'age_in_dog_years': 100}
+
+    first = serialisation.jsonify(GoodBoy)
+    first['b'] = 3
+    first['c']['ageInDogYears'] = 7
+    second = serialisation.jsonify(GoodBoy)
+
+    assert second['b'] == 2
+    assert second['c'] == {'ageInDogYears': 100}
+    assert second is not first
+    assert static._static_json(GoodBoy, True, True) == second
+
+
+def test_instance_serialisation_cached_nested() -> None:
+    first = serialisation.jsonify(static.Land)
+    first['unitConstraint'].append('X')
+
+    assert 'X' not in serialisation.jsonify(static.Land)['unitConstraint']
+
+
+@pytest.mark.parametrize('camel_case_keys', [True, False])
+@pytest.mark.parametrize('arg_struct', [True, False])
+def test_instance_serialisation_all(camel_case_keys: bool,
+                                    arg_struct: bool) -> None:
+    instances = [i for kind in static.StaticData for i in kind]
+
+    assert static.Sea in instances
+    for instance in instances:
+        for _ in range(2):
+            expected = static._static_json(instance, camel_case_keys,
+                                           arg_struct)
+
+            assert serialisation.jsonify(
+                instance, camel_case_keys=camel_case_keys,
+                arg_struct=arg_struct) == expected
+
+
+def test_instance_serialisation_not_orjson(reset_registry) -> None:
+    class Name123(static.StaticData):
+        """Test class."""
+
+        b: Any = static.STATIC
+
+    class GoodBoy(metaclass=Name123):
+        """Test class."""
+
+        b = {1: datetime.timedelta(days=1), 2: float('nan')}
+
+    for _ in range(2):
+        json = serialisation.jsonify(GoodBoy)
+
+        assert json['b'] == serialisation.jsonify(GoodBoy.b)
+        assert json['b'][1] == datetime.timedelta(days=1)
+
+
+def test_instance_serialisation_invalidated(reset_registry) -> None:
+    @dataclasses.dataclass
+    class _Late:
+        """Dataclass getting a registration after first use."""
+
+        value: int
+
+    class Name123(static.StaticData):
+        """Test class."""
+
+        b: Any = static.STATIC
+
+    class GoodBoy(metaclass=Name123):
+        """Test class."""
+
+        b = _Late(1)
+
+    assert serialisation.jsonify(GoodBoy, arg_struct=False)['b'] == {
+        'value': 1}
+    assert orjson.loads(encoding.dumps(GoodBoy, arg_struct=False))[
+        'b'] == {'value': 1}
+
+    @serialisation.jsonify.register(_Late)
+    def _jsonify_late(obj: _Late,
+                      camel_case_keys: bool = True,
+                      arg_struct: bool = True) -> serialisation.JSONType:
+        return obj.value
+
+    assert serialisation.jsonify(GoodBoy, arg_struct=False)['b'] == 1
+    assert orjson.loads(encoding.dumps(GoodBoy, arg_struct=False))[
+        'b'] == 1
+
+
+@pytest.mark.parametrize('camel_case_keys', [True, False])
+@pytest.mark.parametrize('arg_struct', [True, False])
+def test_instance_serialisation_bytes(reset_registry,
+                                      camel_case_keys: bool,
+                                      arg_struct: bool) -> None:
+    obj = {'houses': list(static.House),
+           'units': [static.Footman(state=static.UnitState.READY)],
+           'terrain': static.Land}
+    expected = orjson.dumps(serialisation.jsonify(
+        obj, camel_case_keys=camel_case_keys, arg_struct=arg_struct))
+
+    assert encoding.dumps(
+        obj, camel_case_keys=camel_case_keys,
+        arg_struct=arg_struct) == expected
+    assert b''.join(encoding.iter_jsonify_bytes(
+        obj, camel_case_keys=camel_case_keys,
+        arg_struct=arg_struct)) == expected
+    canonical = orjson.dumps(serialisation.jsonify(
+        obj, camel_case_keys=camel_case_keys, arg_struct=arg_struct),
+        option=orjson.OPT_SORT_KEYS)
+    assert b''.join(encoding.iter_jsonify_bytes(
+        obj, camel_case_keys=camel_case_keys, arg_struct=arg_struct,
+        canonical=True)) == canonical
+    assert static._static_bytes(
+        static.Stark, camel_case_keys, arg_struct) == orjson.dumps(
+            serialisation.jsonify(static.Stark,
+                                  camel_case_keys=camel_case_keys,
+                                  arg_struct=arg_struct))
+
+
 def test_instance_deserialisation(reset_registry) -> None:
     class Name123(static.StaticData):
         """Test class."""
@@ -797,25 +927,26 @@ def test_instance_deserialisation(reset_registry) -> None:
             'c': {'age_in_dog_years': 100}
         }, camel_case_keys=False)
 
-        fresh = serialisation.unjsonify({
-            '$module': Name123.__module__,
-            '$type': Name123.__name__,
-            'name': 'FreshBoy',
-            'b': 3,
-            'c': {'ageInDogYears': 10}
-        })
+        # Input only selects defined instances, it never defines new ones
+        with pytest.raises(ValueError):
+            serialisation.unjsonify({
+                '$module': Name123.__module__,
+                '$type': Name123.__name__,
+                'name': 'FreshBoy',
+                'b': 3,
+                'c': {'ageInDogYears': 10}
+            })
+        with pytest.raises(ValueError):
+            serialisation.unjsonify({
+                '$module': Name123.__module__,
+                '$type': Name123.__name__,
+                'name': 'goodboy',
+            })
 
         assert one in GoodBoy
         assert two is GoodBoy
         assert three is GoodBoy
-
-        assert fresh.__name__ == 'FreshBoy'
-        assert fresh.__module__ == static.__name__
-        assert isinstance(fresh, Name123)
-        assert fresh in Name123
-        assert fresh is not GoodBoy
-        assert fresh is Name123.FreshBoy
-        assert fresh.b == 3
-        assert fresh.c == {'age_in_dog_years': 10}
+        assert 'FreshBoy' not in Name123
+        assert len(Name123) == 1
     finally:
         del globals()['Name123']
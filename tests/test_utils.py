@@ -38,6 +38,7 @@ def test_is_optional(obj: Any, expected: bool) -> None:
     (Optional[str], str),
     (Optional[int], int),
     (Optional[List[int]], List[int]),
+    (Union[None, str], str),
 ], ids=repr)
 def test_optional_subtype(obj: Any, expected: Any) -> None:
     assert utils.optional_subtype(obj) == expected